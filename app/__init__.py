@@ -2,15 +2,25 @@ from flask import Flask
 from flask_caching import Cache
 from config import Config
 from flask_talisman import Talisman
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.utils.session_store import SessionStore
+import logging
 
 cache = Cache()
+session_store = SessionStore()
+talisman = Talisman()
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    if Config.TRUSTED_PROXY_HOPS:
+        # remote_addr from the proxies' X-Forwarded-For, never a hop the client added
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXY_HOPS)
+    if not Config.WEBHOOK_BASE_URL:
+        logging.warning("BASE_URL is not set: webhook signatures cannot be checked and outbound calls will fail")
     
     # Add security headers
-    Talisman(app, force_https=True)
+    talisman.init_app(app, force_https=True)
     
     # Initialize cache
     cache.init_app(app, config={
@@ -18,8 +28,19 @@ def create_app():
         'CACHE_DEFAULT_TIMEOUT': 300
     })
     
+    # Initialize shared conversation state
+    session_store.init_app(app)
+    
     # Register blueprints
     from app.routes.voice_routes import voice_bp
+    from app.routes.audio_routes import audio_bp
+    from app.routes.campaign_routes import campaign_bp
+    from app.routes.ledger_routes import ledger_bp
+    from app.routes.metrics_routes import metrics_bp
     app.register_blueprint(voice_bp)
+    app.register_blueprint(audio_bp)
+    app.register_blueprint(campaign_bp)
+    app.register_blueprint(ledger_bp)
+    app.register_blueprint(metrics_bp)
     
     return app 
\ No newline at end of file
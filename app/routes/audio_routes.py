@@ -0,0 +1,21 @@
+from flask import Blueprint, send_from_directory
+from config import Config
+import os
+
+audio_bp = Blueprint('audio', __name__)
+
+# Asset names are content hashes, so the bytes behind a URL never change
+ONE_YEAR = 365 * 24 * 3600
+
+@audio_bp.route('/audio/<path:filename>', methods=['GET', 'HEAD'])
+def serve_audio(filename):
+    """Serve pre-synthesized prompts with ETag, Range and long-lived cache headers"""
+    response = send_from_directory(
+        os.path.abspath(Config.AUDIO_ASSET_DIR),
+        filename,
+        conditional=True,
+        etag=True,
+        max_age=ONE_YEAR
+    )
+    response.headers['Cache-Control'] = f'public, max-age={ONE_YEAR}, immutable'
+    return response
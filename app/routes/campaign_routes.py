@@ -0,0 +1,119 @@
+from flask import Blueprint, request, jsonify
+from app.services.campaign_service import CampaignDialer, parse_numbers
+from app.routes.voice_routes import (
+    campaign_store, client_identity, rate_limiter, too_many_requests, twilio_service
+)
+from app.utils.auth import check_admin_key
+from config import Config
+import logging
+import threading
+
+campaign_bp = Blueprint('campaign', __name__)
+# Upper bounds on what a campaign may ask for; the rate is capped at CAMPAIGN_CALLS_PER_SECOND
+MAX_ATTEMPTS_LIMIT = 10
+RETRY_DELAY_LIMIT = 86400
+dialer = CampaignDialer(
+    campaign_store,
+    twilio_service,
+    workers=Config.CAMPAIGN_WORKERS,
+    result_timeout=Config.CAMPAIGN_RESULT_TIMEOUT,
+    lease_timeout=Config.CAMPAIGN_LEASE_TIMEOUT
+)
+
+@campaign_bp.before_request
+def admin_only():
+    """Campaigns dial whatever numbers they are given: rate limit, then require the admin key"""
+    refused = rate_limiter.check(('admin', client_identity()))
+    if refused:
+        return too_many_requests(*refused)
+    return check_admin_key()
+
+def bounded(options, name, cast, default, limit):
+    """A campaign setting from the request, which must be above 0 and at most limit"""
+    value = cast(options.get(name, default))
+    if not 0 < value <= limit:
+        raise ValueError(f'{name} must be above 0 and at most {limit}')
+    return value
+
+@campaign_bp.route('/campaigns', methods=['POST'])
+def create_campaign():
+    """Create a campaign from a JSON list of numbers or an uploaded CSV/JSONL file"""
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            numbers = parse_numbers(upload.read().decode('utf-8'), upload.filename or '')
+            options = request.form
+        else:
+            options = request.json or {}
+            numbers = parse_numbers('\n'.join(str(n) for n in options.get('numbers', [])))
+
+        if not numbers:
+            return jsonify({
+                'status': 'error',
+                'message': 'At least one valid phone number is required'
+            }), 400
+
+        try:
+            settings = (
+                bounded(options, 'calls_per_second', float, Config.CAMPAIGN_CALLS_PER_SECOND,
+                        Config.CAMPAIGN_CALLS_PER_SECOND),
+                bounded(options, 'max_attempts', int, Config.CAMPAIGN_MAX_ATTEMPTS, MAX_ATTEMPTS_LIMIT),
+                bounded(options, 'retry_delay', float, Config.CAMPAIGN_RETRY_DELAY, RETRY_DELAY_LIMIT)
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': f'Invalid campaign settings: {str(e)}'}), 400
+
+        campaign_id = campaign_store.create(options.get('name', 'campaign'), numbers, *settings)
+        return jsonify({
+            'status': 'success',
+            'campaign_id': campaign_id,
+            'numbers': len(numbers)
+        }), 201
+
+    except Exception as e:
+        logging.error(f"Error creating campaign: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@campaign_bp.route('/campaigns/<int:campaign_id>/start', methods=['POST'])
+def start_campaign(campaign_id):
+    """Start (or resume) dialing a campaign in the background"""
+    campaign = campaign_store.get(campaign_id)
+    if not campaign:
+        return jsonify({'status': 'error', 'message': 'Campaign not found'}), 404
+
+    # The lease lives in the campaign database, so this holds across workers
+    token = dialer.acquire(campaign_id)
+    if not token:
+        return jsonify({'status': 'success', 'message': 'Campaign already running'})
+
+    threading.Thread(
+        target=dialer.run,
+        args=(campaign_id, token),
+        name=f'campaign-{campaign_id}',
+        daemon=True
+    ).start()
+    return jsonify({'status': 'success', 'message': 'Campaign started'}), 202
+
+@campaign_bp.route('/campaigns/<int:campaign_id>/stop', methods=['POST'])
+def stop_campaign(campaign_id):
+    """Pause a campaign, whichever worker dials it; it can be resumed with /start"""
+    if not campaign_store.get(campaign_id):
+        return jsonify({'status': 'error', 'message': 'Campaign not found'}), 404
+    if not dialer.stop(campaign_id):
+        return jsonify({'status': 'error', 'message': 'Campaign is not running'}), 409
+    return jsonify({'status': 'success', 'message': 'Campaign stopping'})
+
+@campaign_bp.route('/campaigns/<int:campaign_id>', methods=['GET'])
+def campaign_status(campaign_id):
+    """Campaign settings and per-status target counts"""
+    campaign = campaign_store.get(campaign_id)
+    if not campaign:
+        return jsonify({'status': 'error', 'message': 'Campaign not found'}), 404
+    return jsonify({
+        'status': 'success',
+        'campaign': campaign,
+        'targets': campaign_store.progress(campaign_id)
+    })
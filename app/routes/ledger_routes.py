@@ -0,0 +1,71 @@
+from flask import Blueprint, request, jsonify
+from app.services.call_ledger import FILTERS, GROUPS
+from app.routes.voice_routes import call_ledger, client_identity, rate_limiter, too_many_requests
+from app.utils.auth import check_admin_key
+import logging
+
+ledger_bp = Blueprint('ledger', __name__)
+MAX_PAGE = 500
+
+@ledger_bp.before_request
+def admin_only():
+    """The ledger lists callers' numbers: rate limit, then require the admin key"""
+    refused = rate_limiter.check(('admin', client_identity()))
+    if refused:
+        return too_many_requests(*refused)
+    return check_admin_key()
+
+def time_range():
+    """since and until query parameters as epoch seconds, None when absent"""
+    return tuple(
+        float(request.args[name]) if request.args.get(name) else None
+        for name in ('since', 'until')
+    )
+
+@ledger_bp.route('/calls', methods=['GET'])
+def list_calls():
+    """Finished calls newest first; filter by status, language, phone_number, direction, since, until"""
+    try:
+        since, until = time_range()
+        limit = max(1, min(int(request.args.get('limit', 50)), MAX_PAGE))
+        calls, next_cursor = call_ledger.calls(
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            since=since,
+            until=until,
+            **{column: request.args.get(column) for column in FILTERS}
+        )
+        return jsonify({
+            'status': 'success',
+            'calls': calls,
+            'next_cursor': next_cursor
+        })
+
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'Invalid query: {str(e)}'}), 400
+    except Exception as e:
+        logging.error(f"Error listing calls: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'Failed to list calls'}), 500
+
+@ledger_bp.route('/calls/stats', methods=['GET'])
+def call_stats():
+    """Call counts, durations and turns grouped by status, language, direction, day or hour"""
+    try:
+        since, until = time_range()
+        group_by = request.args.get('group_by', 'status')
+        if group_by not in GROUPS:
+            return jsonify({
+                'status': 'error',
+                'message': f"group_by must be one of {', '.join(GROUPS)}"
+            }), 400
+        return jsonify({
+            'status': 'success',
+            'group_by': group_by,
+            'groups': call_ledger.stats(group_by, since=since, until=until)
+        })
+
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'Invalid query: {str(e)}'}), 400
+    except Exception as e:
+        logging.error(f"Error computing call stats: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'Failed to compute call stats'}), 500
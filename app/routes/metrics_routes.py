@@ -0,0 +1,12 @@
+from flask import Blueprint, Response
+from app import talisman
+from app.utils.metrics import render_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@talisman(force_https=False)
+def metrics():
+    """Prometheus scrape endpoint, summed across gunicorn workers"""
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
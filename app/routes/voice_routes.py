@@ -1,19 +1,163 @@
-from flask import Blueprint, request, abort, jsonify, session, current_app
+from flask import Blueprint, request, jsonify, g
 from twilio.request_validator import RequestValidator
 from twilio.twiml.voice_response import VoiceResponse
 from app.services.twilio_service import TwilioService
 from app.services.gemini_service import GeminiService
-from app import cache
+from app.services.response_stream import ResponseStreamer, FALLBACK_SENTENCE
+from app.services.speculation import Speculator
+from app.services.audio_service import AudioAssetStore
+from app.services.call_ledger import CallLedger
+from app.services.campaign_service import CallbackDialer, CampaignStore
+from app.services.transcript_sink import TranscriptSink
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.history import Exchange, append_exchange, last_turn, load_history, turn_before
+from app.utils.idempotency import TurnDeduplicator
+from app.utils.intents import classify, template
+from app.utils.lazy import ProcessLocal
+from app.utils.language import detect
+from app.utils.metrics import (
+    CALLS_ENDED, CALLS_STARTED, FALLBACKS, INTENTS, OVERLOAD, TURN_SECONDS, TURNS, span
+)
+from app.utils.overload import Overloaded
+from app.utils.rate_limit import RateLimiter
+from app.utils.twiml import (
+    TwimlRenderer, BUSY_MESSAGE, CALLBACK_MESSAGE, ERROR_MESSAGE, GOODBYE_MESSAGE, HOLD_MESSAGE,
+    SLOW_DOWN_MESSAGE, split_answer
+)
+from app import session_store
 from config import Config
+import atexit
+import hashlib
 import logging
-import re
 from datetime import datetime
 import secrets
+import time
 import uuid
 
 voice_bp = Blueprint('voice', __name__)
-twilio_service = TwilioService()
-gemini_service = GeminiService()
+# Built on first use in each worker (or by warm_up), never at import or in a preloading master
+audio_assets = ProcessLocal(lambda: AudioAssetStore(Config.AUDIO_ASSET_DIR, Config.BASE_URL))
+twilio_service = ProcessLocal(lambda: TwilioService(audio=audio_assets.instance()))
+campaign_store = ProcessLocal(lambda: CampaignStore(Config.CAMPAIGN_DB))
+callback_dialer = ProcessLocal(lambda: CallbackDialer(
+    campaign_store.instance(),
+    twilio_service.instance(),
+    calls_per_second=Config.CAMPAIGN_CALLS_PER_SECOND,
+    result_timeout=Config.CAMPAIGN_RESULT_TIMEOUT
+))
+gemini_service = ProcessLocal(GeminiService)
+response_streamer = ProcessLocal(lambda: ResponseStreamer(session_store, max_workers=Config.STREAM_WORKERS))
+twiml = ProcessLocal(lambda: TwimlRenderer(Config.SUPPORTED_LANGUAGES, audio=audio_assets.instance()))
+transcript_sink = TranscriptSink(
+    Config.TRANSCRIPT_DIR,
+    max_queue=Config.TRANSCRIPT_QUEUE_SIZE,
+    policy=Config.TRANSCRIPT_FULL_POLICY,
+    segment_bytes=Config.TRANSCRIPT_SEGMENT_BYTES,
+    segment_seconds=Config.TRANSCRIPT_SEGMENT_SECONDS
+)
+atexit.register(transcript_sink.close)
+call_ledger = ProcessLocal(lambda: CallLedger(
+    Config.CALL_LEDGER_DB,
+    max_queue=Config.CALL_LEDGER_QUEUE_SIZE,
+    utc_offset_minutes=Config.CALL_LEDGER_UTC_OFFSET
+))
+atexit.register(lambda: call_ledger.is_built() and call_ledger.close())
+turn_dedup = TurnDeduplicator(session_store, ttl=Config.TURN_DEDUP_TTL)
+rate_limiter = ProcessLocal(lambda: RateLimiter(session_store, {
+    'caller': (Config.RATE_LIMIT_CALLER_PER_MINUTE, Config.RATE_LIMIT_CALLER_BURST),
+    'turns': (Config.RATE_LIMIT_TURNS_PER_MINUTE, Config.RATE_LIMIT_TURNS_BURST),
+    'client': (Config.RATE_LIMIT_CLIENT_PER_MINUTE, Config.RATE_LIMIT_CLIENT_BURST),
+    'api': (Config.RATE_LIMIT_API_PER_MINUTE, Config.RATE_LIMIT_API_BURST),
+    'calls': (Config.RATE_LIMIT_CALLS_PER_MINUTE, Config.RATE_LIMIT_CALLS_BURST),
+    'admin': (Config.RATE_LIMIT_ADMIN_PER_MINUTE, Config.RATE_LIMIT_ADMIN_BURST),
+    'speculation': (Config.SPECULATION_PER_MINUTE, Config.SPECULATION_BURST)
+}))
+speculator = ProcessLocal(lambda: Speculator(
+    session_store,
+    gemini_service.instance(),
+    rate_limiter.instance(),
+    predictor=Config.SPECULATION_PREDICTOR,
+    max_followups=Config.SPECULATION_MAX_FOLLOWUPS,
+    max_load=Config.SPECULATION_MAX_LOAD,
+    match_threshold=Config.SPECULATION_MATCH,
+    ttl=Config.SPECULATION_TTL,
+    workers=Config.SPECULATION_WORKERS
+))
+
+def warm_up():
+    """Build this process's services and open their connections before the first call arrives"""
+    started = time.monotonic()
+    for service in (
+        audio_assets, twiml, campaign_store, call_ledger, response_streamer, gemini_service, twilio_service
+    ):
+        service.instance()
+    gemini_service.warm_up()
+    twilio_service.warm_up()
+    # Dials callbacks that fell due, including ones queued before this worker started
+    callback_dialer.start()
+    logging.info(f"Worker warmed up in {time.monotonic() - started:.2f}s")
+
+@voice_bp.before_request
+def start_turn_deadline():
+    """Give every webhook a time budget under Twilio's timeout"""
+    g.deadline = Deadline(Config.TURN_BUDGET)
+    # A no-op once running; starts the poller in workers that were not warmed up
+    callback_dialer.start()
+
+@voice_bp.after_request
+def record_turn_metrics(response):
+    """Count every conversational webhook by the outcome its handler reported"""
+    if request.endpoint in ('voice.handle_call', 'voice.continue_call', 'voice.replay_turn', 'voice.retry_turn'):
+        outcome = g.get('turn_outcome', 'error')
+        TURNS.labels(outcome).inc()
+        TURN_SECONDS.labels(outcome).observe(g.deadline.elapsed())
+    return response
+
+def call_direction():
+    """'outbound' for calls we placed (outbound-api, outbound-dial), otherwise 'inbound'"""
+    return 'outbound' if request.values.get('Direction', 'inbound').startswith('outbound') else 'inbound'
+
+def caller_number():
+    """The farmer's number: the far end of an outbound call, the caller of an inbound one"""
+    return request.values.get('To' if call_direction() == 'outbound' else 'From')
+
+def api_key_name(api_key):
+    """Store key of an issued API key; only its hash is kept"""
+    return f"api_key_{hashlib.sha256(api_key.encode('utf-8')).hexdigest()}"
+
+def client_identity():
+    """Who is calling the API: their API key if it is one we issued, otherwise their address.
+
+    The address is remote_addr, which ProxyFix sets from the trusted proxy
+    hops only (TRUSTED_PROXY_HOPS); a client cannot pick a fresh one by
+    sending its own X-Forwarded-For.
+    """
+    api_key = request.headers.get('X-API-Key')
+    if api_key and session_store.get(api_key_name(api_key)):
+        return f'key:{api_key}'
+    return f'addr:{request.remote_addr}'
+
+def redirect_language():
+    """The lang of a redirect we issued, if it is one we speak; it goes into templates and <Gather>"""
+    language = request.args.get('lang')
+    return language if language in Config.SUPPORTED_LANGUAGES else 'hi-IN'
+
+def redirect_hops():
+    """The hops count of a redirect we issued, within the limits the redirect loops stop at"""
+    try:
+        hops = int(request.args.get('hops', 0))
+    except ValueError:
+        return 0
+    return max(0, min(hops, max(Config.STREAM_MAX_REDIRECTS, Config.OVERLOAD_HOLD_REDIRECTS)))
+
+def too_many_requests(bucket, retry_after):
+    """Cheap JSON refusal for an API client over its limit"""
+    response = jsonify({
+        'status': 'error',
+        'message': f'Rate limit exceeded ({bucket}), retry in {retry_after:.0f} seconds'
+    })
+    response.headers['Retry-After'] = str(max(1, round(retry_after)))
+    return response, 429
 
 def validate_twilio_request():
     """Validate that the request is coming from Twilio"""
@@ -26,15 +170,16 @@ def validate_twilio_request():
         
         params = request.form.to_dict()
         
-        logging.info(f"Validating request - URL: {url}")
-        logging.info(f"Twilio signature: {twilio_signature}")
-        logging.info(f"Params: {params}")
+        logging.debug(f"Validating request - URL: {url}")
+        logging.debug(f"Twilio signature: {twilio_signature}")
+        logging.debug(f"Params: {params}")
         
-        is_valid = validator.validate(
-            url,
-            params,
-            twilio_signature
-        )
+        with span('validate'):
+            is_valid = validator.validate(
+                url,
+                params,
+                twilio_signature
+            )
         
         if not is_valid:
             logging.warning(f"Validation failed for URL: {url}")
@@ -46,138 +191,329 @@ def validate_twilio_request():
         logging.error(f"Validation error: {str(e)}")
         return False
 
-def detect_language(text):
-    """
-    Enhanced language detection with better word recognition
-    """
-    # Common farming words in different languages
-    hindi_words = [
-        r'खेती', r'फसल', r'पानी', r'बीज', r'मौसम', r'किसान', 
-        r'मैं', r'हमारे', r'कैसे', r'क्या', r'कब', r'कहाँ',
-        r'बताओ', r'समस्या', r'मदद', r'धन्यवाद', r'नमस्ते'
-    ]
-    
-    marathi_words = [
-        r'शेती', r'पीक', r'पाणी', r'बी', r'हवामान', r'शेतकरी',
-        r'मी', r'आमचे', r'कसे', r'काय', r'केव्हा', r'कुठे',
-        r'सांगा', r'समस्या', r'मदत', r'धन्यवाद', r'नमस्कार'
-    ]
-    
-    # Count words in each language
-    hindi_matches = sum(1 for word in hindi_words if re.search(word, text))
-    marathi_matches = sum(1 for word in marathi_words if re.search(word, text))
-    english_words = len(re.findall(r'\b[a-zA-Z]+\b', text))
+def log_conversation(call_sid, role, language, text):
+    """Queue one message of the conversation for the transcript sink"""
+    transcript_sink.emit('message', call_sid, role=role, language=language, text=text)
+
+def record_exchange(call_sid, user_text, ai_text, language, turn):
+    """Append one exchange to the call history and the transcript"""
+    log_conversation(call_sid, 'user', language, user_text)
+    log_conversation(call_sid, 'assistant', language, ai_text)
+    # Append only the new exchange so concurrent workers never clobber each other
+    with span('state_store'):
+        append_exchange(
+            session_store,
+            call_sid,
+            Exchange(user_text, ai_text, turn=turn),
+            max_bytes=Config.HISTORY_CALL_MAX_BYTES
+        )
+    if Config.SPECULATION_ENABLED:
+        speculator.after_turn(call_sid, ai_text, language, turn)
+
+def streamed_answer_response(call_sid, turn_id, position, language, wait, hops=0):
+    """Speak the sentences buffered so far, redirecting to /voice/continue until the answer is done"""
+    sentences, done = response_streamer.read(call_sid, turn_id, position, wait=wait)
+    if done:
+        with span('render'):
+            return twiml.answer(sentences, language)
+    if hops >= Config.STREAM_MAX_REDIRECTS:
+        logging.warning(f"Giving up on turn {turn_id} for {call_sid} after {hops} redirects")
+        FALLBACKS.labels('stream_redirects').inc()
+        return twiml.answer([FALLBACK_SENTENCE], language)
     
-    # More lenient detection logic
-    if hindi_matches > marathi_matches and hindi_matches > english_words:
-        return 'hi-IN'
-    elif marathi_matches > hindi_matches and marathi_matches > english_words:
-        return 'mr-IN'
-    elif english_words > 2:  # If there are more than 2 English words
-        return 'en-IN'
+    redirect_url = (
+        f"/voice/continue?turn={turn_id}&pos={position + len(sentences)}"
+        f"&lang={language}&hops={hops + 1}"
+    )
+    # Nothing ready yet: keep the caller on the line instead of leaving silence
+    with span('render'):
+        return twiml.partial(sentences or [HOLD_MESSAGE], redirect_url, language)
+
+def start_streaming_turn(call_sid, speech_result, history, language):
+    """Generate the answer in the background and return TwiML as soon as the first sentence is ready"""
+    turn_id = uuid.uuid4().hex[:12]
+    turn = last_turn(history) + 1
+    response_streamer.start(
+        call_sid,
+        turn_id,
+        gemini_service.stream_response(
+            speech_result,
+            history=history,
+            language=language,
+            call_sid=call_sid
+        ),
+        on_complete=lambda text: record_exchange(call_sid, speech_result, text, language, turn),
+        first_sentence_timeout=min(Config.STREAM_FIRST_SENTENCE_TIMEOUT, g.deadline.remaining())
+    )
+    return streamed_answer_response(call_sid, turn_id, 0, language, wait=0)
+
+def hold_response(call_sid, speech_result, pending, language, turn):
+    """Answer is late: play a filler and pick the answer up on /voice/continue when it lands"""
+    turn_id = uuid.uuid4().hex[:12]
+    logging.warning(f"Turn deadline exceeded for {call_sid}, holding as turn {turn_id}")
+    FALLBACKS.labels('deadline').inc()
+    response_streamer.attach(
+        call_sid,
+        turn_id,
+        pending,
+        on_complete=lambda text: record_exchange(call_sid, speech_result, text, language, turn)
+    )
+    return streamed_answer_response(call_sid, turn_id, 0, language, wait=0)
+
+def replayed_turn(call_sid, digest, language, hops=0):
+    """Answer a retried webhook with the TwiML its first copy produced, waiting if it is still in flight"""
+    g.turn_outcome = 'duplicate'
+    replay = turn_dedup.wait(
+        turn_dedup.key(call_sid, digest),
+        timeout=min(Config.STREAM_CONTINUE_WAIT, g.deadline.remaining())
+    )
+    if replay is None or (replay == TurnDeduplicator.PENDING and hops >= Config.STREAM_MAX_REDIRECTS):
+        # The first copy failed or never finished; ask the caller to repeat
+        FALLBACKS.labels('duplicate').inc()
+        return twiml.answer([FALLBACK_SENTENCE], language)
+    if replay == TurnDeduplicator.PENDING:
+        return twiml.partial([HOLD_MESSAGE], f"/voice/replay?turn={digest}&lang={language}&hops={hops + 1}", language)
+    return replay
+
+def local_turn(call_sid, speech_result, history, language, intent):
+    """Answer a greeting, thanks, repeat or goodbye without Gemini"""
+    g.turn_outcome = 'local'
+    if intent == 'goodbye':
+        log_conversation(call_sid, 'user', language, speech_result)
+        return twilio_service.say_goodbye(language)
+    if intent == 'repeat' and history:
+        sentences = split_answer(history[-1].ai)
     else:
-        # Default to Hindi if unclear
-        return 'hi-IN'
+        sentences = template(intent, language)
+    # Only the transcript keeps these; the history and the chat session stay about farming
+    log_conversation(call_sid, 'user', language, speech_result)
+    log_conversation(call_sid, 'assistant', language, ' '.join(sentences))
+    with span('render'):
+        return twiml.answer(sentences, language)
 
-def log_conversation(call_sid, role, language, text):
-    """Log conversation details to terminal"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"\n{'='*80}")
-    print(f"Time: {timestamp}")
-    print(f"Call SID: {call_sid}")
-    print(f"Language: {language}")
-    print(f"Role: {role}")
-    print(f"Message: {text}")
-    print(f"{'='*80}\n")
+def overloaded_turn(call_sid, speech_result, language, reason, hops):
+    """Gemini cannot take the turn and nothing cached answers it: hold and ask again, then offer a callback"""
+    g.turn_outcome = 'overloaded'
+    if hops < Config.OVERLOAD_HOLD_REDIRECTS:
+        OVERLOAD.labels(reason, 'hold').inc()
+        session_store.set(f'overloaded_{call_sid}', speech_result)
+        with span('render'):
+            return twiml.partial([BUSY_MESSAGE], f"/voice/retry?lang={language}&hops={hops + 1}", language)
+    logging.warning(f"Gemini still {reason} after {hops} holds, offering {call_sid} a callback")
+    OVERLOAD.labels(reason, 'callback').inc()
+    with span('render'):
+        return twiml.callback_offer()
+
+def answer_turn(call_sid, speech_result, history, language, hops=0):
+    """Generate the answer to one utterance and return its TwiML"""
+    # Follow the caller if they clearly switch language mid-call
+    guess = detect(speech_result)
+    if guess.confident and guess.language != language:
+        logging.info(f"Switching {call_sid} from {language} to {guess.language}")
+        language = guess.language
+        session_store.set(f'language_{call_sid}', language)
+
+    with span('intent'):
+        intent = classify(speech_result)
+    # "Yes" or "okay" may answer a question the assistant just asked
+    if intent == 'ack' and history and history[-1].ai.rstrip().endswith('?'):
+        intent = None
+    INTENTS.labels(intent or 'none').inc()
+    if intent:
+        return local_turn(call_sid, speech_result, history, language, intent)
+
+    # Rate limits come before any Gemini work; a held turn coming back on
+    # /voice/retry already took the caller's token
+    with span('rate_limit'):
+        refused = rate_limiter.check(*([] if hops else [('caller', caller_number() or call_sid)]), ('turns', 'all'))
+    if refused and refused[0] == 'caller':
+        logging.warning(f"Caller on {call_sid} is over their turn limit, retry in {refused[1]:.1f}s")
+        g.turn_outcome = 'rate_limited'
+        with span('render'):
+            return twiml.answer([SLOW_DOWN_MESSAGE], language)
+    if refused:
+        return overloaded_turn(call_sid, speech_result, language, 'rate_limited', hops)
+
+    if Config.SPECULATION_ENABLED:
+        with span('speculation'):
+            answer = speculator.match(call_sid, speech_result, last_turn(history))
+        if answer:
+            turn = last_turn(history) + 1
+            gemini_service.sessions.record(call_sid, turn - 1, speech_result, answer)
+            record_exchange(call_sid, speech_result, answer, language, turn)
+            g.turn_outcome = 'speculated'
+            with span('render'):
+                return twiml.answer(split_answer(answer), language)
+
+    # Past the breaker or limit the plain path serves a cached answer or a hold
+    if Config.STREAMING_ENABLED and gemini_service.admissible():
+        g.turn_outcome = 'streamed'
+        return start_streaming_turn(call_sid, speech_result, history, language)
+
+    # For ongoing conversation
+    turn = last_turn(history) + 1
+    try:
+        ai_response = gemini_service.get_response(
+            speech_result,
+            history=history,
+            language=language,
+            call_sid=call_sid,
+            deadline=g.deadline
+        )
+    except DeadlineExceeded as e:
+        g.turn_outcome = 'hold'
+        return hold_response(call_sid, speech_result, e.pending, language, turn)
+    except Overloaded as e:
+        return overloaded_turn(call_sid, speech_result, language, e.reason, hops)
+    
+    record_exchange(call_sid, speech_result, ai_response, language, turn)
+    
+    # Break response into natural chunks
+    g.turn_outcome = 'answered'
+    with span('render'):
+        return twiml.answer(split_answer(ai_response), language)
 
 @voice_bp.route('/voice', methods=['POST'])
 def handle_call():
     """Handle incoming voice calls with better timeout"""
     try:
         call_sid = request.values.get('CallSid')
-        language = cache.get(f'language_{call_sid}') or 'hi-IN'
         speech_result = request.values.get('SpeechResult', '').strip()
         
-        # Get complete conversation history
-        history = cache.get(f'history_{call_sid}') or []
+        with span('state_load'):
+            language = session_store.get(f'language_{call_sid}') or 'hi-IN'
+            # Get complete conversation history
+            history = load_history(session_store, call_sid)
         
         if not speech_result:
-            welcome_msg = 'नमस्ते, मैं दीक्षा हूं, आपकी कृषि सहायक। मैं आपकी कैसे मदद कर सकती हूं?'
-            response = VoiceResponse()
-            # Set 30 second timeout
-            gather = response.gather(
-                input='speech',
-                timeout=30,  # Changed from 5 to 30 seconds
-                speech_timeout='auto',
-                language=language
-            )
-            gather.say(welcome_msg, language='hi-IN', voice='Polly.Aditi')
-            
-            # Add message after timeout
-            response.say(
-                "आप काफी देर से चुप हैं। मैं कॉल काट रही हूं। जरूरत हो तो फिर से कॉल करना।", 
-                language='hi-IN', 
-                voice='Polly.Aditi'
-            )
-            response.hangup()
-            return str(response)
+            if not history:
+                CALLS_STARTED.inc()
+                # Start fetching the caller's forecast before they can ask for it
+                gemini_service.weather.remember_caller(call_sid, request.values)
+            g.turn_outcome = 'welcome'
+            with span('render'):
+                return twiml.welcome(language)
 
-        # For ongoing conversation
-        ai_response = gemini_service.get_response(
-            speech_result,
-            history=history,
-            language=language,
-            call_sid=call_sid
+        # Twilio retries a slow webhook with the same idempotency token; only
+        # the first copy of a turn may call Gemini and append to the history.
+        # Without a token the turn is the utterance at this point of the call,
+        # so "हां" to a later question is a new turn and not a retry. A retry
+        # that loads the history after the first copy recorded the turn still
+        # keys on the turn before it (a caller saying the same words twice in
+        # a row hears the same answer again)
+        digest = turn_dedup.digest(
+            request.headers.get('I-Twilio-Idempotency-Token')
+            or f'{call_sid}:{turn_before(history, speech_result)}:{speech_result}'
         )
-        
-        # Update conversation history
-        history.append({
-            'user': speech_result,
-            'ai': ai_response,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-        cache.set(f'history_{call_sid}', history)
-        
-        # Create response with 30 second timeout
-        response = VoiceResponse()
-        gather = response.gather(
-            input='speech',
-            timeout=30,  # Changed from 5 to 30 seconds
-            speech_timeout='auto',
-            language=language
+        turn_key = turn_dedup.key(call_sid, digest)
+        if not turn_dedup.claim(turn_key):
+            return replayed_turn(call_sid, digest, language)
+        try:
+            response = answer_turn(call_sid, speech_result, history, language)
+        except Exception:
+            turn_dedup.release(turn_key)
+            raise
+        turn_dedup.complete(turn_key, response)
+        return response
+
+    except Exception as e:
+        logging.error(f"Error: {str(e)}")
+        g.turn_outcome = 'error'
+        FALLBACKS.labels('exception').inc()
+        return twiml.message(ERROR_MESSAGE)
+
+@voice_bp.route('/voice/continue', methods=['POST'])
+def continue_call():
+    """Serve the next buffered sentences of a streaming or late answer"""
+    try:
+        call_sid = request.values.get('CallSid')
+        turn_id = request.args.get('turn', '')
+        position = int(request.args.get('pos', 0))
+        language = redirect_language()
+        hops = redirect_hops()
+        g.turn_outcome = 'continued'
+        return streamed_answer_response(
+            call_sid, turn_id, position, language,
+            wait=min(Config.STREAM_CONTINUE_WAIT, g.deadline.remaining()),
+            hops=hops
         )
         
-        # Break response into natural chunks
-        sentences = ai_response.split('।')
-        for sentence in sentences:
-            if sentence.strip():
-                gather.say(
-                    sentence.strip() + '।', 
-                    language='hi-IN', 
-                    voice='Polly.Aditi',
-                    prosody={'rate': '90%', 'volume': 'loud'}
-                )
-                gather.pause(length=0.5)
-        
-        # Add timeout message and hangup
-        response.say(
-            "आप काफी देर से चुप हैं। मैं कॉल काट रही हूं। जरूरत हो तो फिर से कॉल करना।", 
-            language='hi-IN', 
-            voice='Polly.Aditi'
+    except Exception as e:
+        logging.error(f"Error in continue_call: {str(e)}")
+        g.turn_outcome = 'error'
+        FALLBACKS.labels('exception').inc()
+        return twiml.message(ERROR_MESSAGE)
+
+@voice_bp.route('/voice/replay', methods=['POST'])
+def replay_turn():
+    """Keep polling for the answer to a retried turn"""
+    try:
+        return replayed_turn(
+            request.values.get('CallSid'),
+            request.args.get('turn', ''),
+            redirect_language(),
+            hops=redirect_hops()
         )
-        response.hangup()
         
-        return str(response)
+    except Exception as e:
+        logging.error(f"Error in replay_turn: {str(e)}")
+        g.turn_outcome = 'error'
+        FALLBACKS.labels('exception').inc()
+        return twiml.message(ERROR_MESSAGE)
 
+@voice_bp.route('/voice/retry', methods=['POST'])
+def retry_turn():
+    """Ask again for the answer to an utterance held while Gemini was unavailable"""
+    try:
+        call_sid = request.values.get('CallSid')
+        language = redirect_language()
+        hops = redirect_hops()
+        with span('state_load'):
+            speech_result = session_store.get(f'overloaded_{call_sid}')
+            history = load_history(session_store, call_sid)
+        if not speech_result:
+            g.turn_outcome = 'error'
+            FALLBACKS.labels('exception').inc()
+            return twiml.answer([FALLBACK_SENTENCE], language)
+        return answer_turn(call_sid, speech_result, history, language, hops=hops)
+        
     except Exception as e:
-        logging.error(f"Error: {str(e)}")
-        response = VoiceResponse()
-        response.say(
-            "मैं समझ नहीं पाई। फिर से बताओ।", 
-            language='hi-IN',
-            voice='Polly.Aditi'
+        logging.error(f"Error in retry_turn: {str(e)}")
+        g.turn_outcome = 'error'
+        FALLBACKS.labels('exception').inc()
+        return twiml.message(ERROR_MESSAGE)
+
+@voice_bp.route('/voice/callback', methods=['POST'])
+def request_callback():
+    """Queue a callback for a caller who pressed 1 on the callback offer"""
+    try:
+        # A forged request would have us dial any number it names
+        if not Config.DEBUG and not validate_twilio_request():
+            return twiml.message(ERROR_MESSAGE)
+
+        call_sid = request.values.get('CallSid')
+        if request.values.get('Digits', '') != '1':
+            return twiml.message(GOODBYE_MESSAGE)
+        
+        phone_number = caller_number()
+        # Kept in the campaign database like a one-number campaign: every worker's callback
+        # poller sees it, including after a restart, and busy lines are retried
+        campaign_id = campaign_store.create(
+            f'callback {call_sid}',
+            [phone_number],
+            Config.CAMPAIGN_CALLS_PER_SECOND,
+            Config.CAMPAIGN_MAX_ATTEMPTS,
+            Config.CAMPAIGN_RETRY_DELAY,
+            start_at=time.time() + Config.CALLBACK_DELAY,
+            kind=CallbackDialer.KIND
         )
-        return str(response)
+        logging.info(f"Callback for {call_sid} queued as campaign {campaign_id}")
+        transcript_sink.emit('callback_requested', call_sid, to=phone_number, campaign_id=campaign_id)
+        return twiml.message(CALLBACK_MESSAGE)
+        
+    except Exception as e:
+        logging.error(f"Error in request_callback: {str(e)}")
+        return twiml.message(ERROR_MESSAGE)
 
 @voice_bp.route('/voice/set-language', methods=['POST'])
 def set_language():
@@ -198,7 +534,7 @@ def set_language():
         }
         
         selected_language = language_map.get(digits, 'hi-IN')
-        cache.set(f'language_{call_sid}', selected_language)
+        session_store.set(f'language_{call_sid}', selected_language)
         
         return twilio_service.get_initial_response(selected_language)
         
@@ -212,17 +548,21 @@ def set_language():
 def generate_api_key():
     """Generate API key for call initiation"""
     try:
+        refused = rate_limiter.check(('client', client_identity()), ('api', 'all'))
+        if refused:
+            return too_many_requests(*refused)
+        
         # Generate a unique API key
         api_key = secrets.token_urlsafe(32)
         
-        # Store API key with timestamp
-        cache.set(
-            f'api_key_{api_key}', 
+        # Store API key with timestamp, shared by every worker
+        session_store.set(
+            api_key_name(api_key),
             {
                 'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'is_active': True
             },
-            timeout=86400  # Key valid for 24 hours
+            ttl=86400  # Key valid for 24 hours
         )
         
         return jsonify({
@@ -252,15 +592,20 @@ def initiate_call():
                 'status': 'error',
                 'message': 'Phone number is required'
             }), 400
-            
-        # Log call initiation
-        print(f"\n{'*'*40} INITIATING CALL {'*'*40}")
-        print(f"To Number: {phone_number}")
         
+        refused = rate_limiter.check(('client', client_identity()), ('api', 'all'), ('calls', 'all'))
+        if refused:
+            return too_many_requests(*refused)
+            
         # Initiate call using Twilio service
         result = twilio_service.initiate_call(phone_number)
-        print(f"Result: {result}")
-        print(f"{'*'*89}\n")
+        transcript_sink.emit(
+            'call_initiated',
+            result.get('call_sid'),
+            to=phone_number,
+            status=result.get('status'),
+            message=result.get('message')
+        )
         
         return jsonify(result)
         
@@ -279,14 +624,28 @@ def call_status():
         call_status = request.values.get('CallStatus')
         logging.info(f"Call {call_sid} status: {call_status}")
         
-        # Print complete conversation on call end
+        if call_status == 'completed':
+            CALLS_ENDED.inc()
         if call_status in ['completed', 'busy', 'failed', 'no-answer']:
-            history = cache.get(f'history_{call_sid}')
-            if history:
-                print(f"\n{'*'*40} COMPLETE CONVERSATION {'*'*40}")
-                for exchange in history:
-                    print(f"User: {exchange['user']}\nDiksha: {exchange['ai']}\n")
-                print(f"{'*'*89}\n")
+            # Busy and unanswered campaign calls go back on the retry queue
+            campaign_store.record_status(call_sid, call_status)
+            # Closes the call's transcript; transcripts.py assembles it from the sink
+            transcript_sink.emit('call_ended', call_sid, status=call_status)
+            with span('state_load'):
+                language = session_store.get(f'language_{call_sid}') or 'hi-IN'
+                turns = last_turn(load_history(session_store, call_sid))
+            call_ledger.record(
+                call_sid,
+                call_status,
+                ended_at=time.time(),
+                duration=float(request.values.get('CallDuration') or 0),
+                phone_number=caller_number(),
+                direction=call_direction(),
+                language=language,
+                turns=turns
+            )
+            if Config.SPECULATION_ENABLED:
+                speculator.discard(call_sid, turns)
         return '', 200
     except Exception as e:
         logging.error(f"Error in call_status: {str(e)}")
@@ -0,0 +1,151 @@
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import struct
+import threading
+import wave
+from xml.sax.saxutils import escape
+
+class TTSEngine:
+    """Renders text to audio for the offline asset build"""
+
+    def synthesize(self, text, language, rate=None):
+        """Return (audio bytes, file extension); rate mirrors the <Say> prosody used for answers"""
+        raise NotImplementedError
+
+class PollyTTSEngine(TTSEngine):
+    """Amazon Polly with the same Aditi voice Twilio uses for <Say voice="Polly.Aditi">"""
+
+    # Aditi is bilingual; Marathi text is read with the Hindi voice, as <Say> does today
+    LANGUAGE_CODES = {'hi-IN': 'hi-IN', 'en-IN': 'en-IN'}
+
+    def __init__(self, voice_id='Aditi'):
+        import boto3
+        self.client = boto3.client('polly')
+        self.voice_id = voice_id
+
+    def synthesize(self, text, language, rate=None):
+        text_type = 'text'
+        if rate:
+            text = f'<speak><prosody rate="{rate}" volume="loud">{escape(text)}</prosody></speak>'
+            text_type = 'ssml'
+        result = self.client.synthesize_speech(
+            Text=text,
+            TextType=text_type,
+            OutputFormat='mp3',
+            VoiceId=self.voice_id,
+            LanguageCode=self.LANGUAGE_CODES.get(language, 'hi-IN')
+        )
+        return result['AudioStream'].read(), 'mp3'
+
+class ToneTTSEngine(TTSEngine):
+    """Local stand-in that writes a quiet tone as long as the text would take to speak"""
+
+    def __init__(self, sample_rate=8000, seconds_per_char=0.06):
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+
+    def synthesize(self, text, language, rate=None):
+        frames = int(self.sample_rate * max(0.3, len(text) * self.seconds_per_char))
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(self.sample_rate)
+            output.writeframes(b''.join(
+                struct.pack('<h', int(2000 * math.sin(2 * math.pi * 440 * i / self.sample_rate)))
+                for i in range(frames)
+            ))
+        return buffer.getvalue(), 'wav'
+
+ENGINES = {
+    'polly': PollyTTSEngine,
+    'tone': ToneTTSEngine
+}
+
+class AudioAssetStore:
+    """Pre-synthesized prompts on disk, indexed by a manifest that build_audio.py writes.
+
+    Files are named by a hash of their content, so they can be cached forever.
+    The manifest is read at startup; workers pick up a rebuilt one on restart.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory, base_url):
+        self.directory = directory
+        self.base_url = base_url.rstrip('/') if base_url else ''
+        self.assets = {}
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    @staticmethod
+    def key(text, language):
+        return f"{language}|{text}"
+
+    def reload(self):
+        """Pick up a manifest written since the last check"""
+        path = os.path.join(self.directory, self.MANIFEST)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                assets = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not load audio manifest {path}: {str(e)}")
+            return
+        with self._lock:
+            self.assets = assets
+            self._manifest_mtime = mtime
+        logging.info(f"Loaded {len(assets)} audio assets from {path}")
+
+    def url_for(self, text, language='hi-IN'):
+        """URL of the pre-synthesized audio for text, or None to fall back to <Say>"""
+        filename = self.assets.get(self.key(text, language))
+        return f"{self.base_url}/audio/{filename}" if filename else None
+
+    def has(self, text, language='hi-IN'):
+        return self.key(text, language) in self.assets
+
+    def add(self, text, language, audio, extension):
+        """Write one rendered asset; call save() afterwards to publish it"""
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{hashlib.sha1(audio).hexdigest()[:20]}.{extension}"
+        path = os.path.join(self.directory, filename)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(audio)
+        with self._lock:
+            self.assets[self.key(text, language)] = filename
+        return filename
+
+    def save(self):
+        """Atomically replace the manifest so running workers never read a partial one"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, self.MANIFEST)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with self._lock:
+            assets = dict(self.assets)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(assets, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+def build_assets(store, engine, items):
+    """Render every (text, language, rate) item that has no asset yet"""
+    rendered = 0
+    for text, language, rate in items:
+        if store.has(text, language):
+            continue
+        audio, extension = engine.synthesize(text, language, rate=rate)
+        store.add(text, language, audio, extension)
+        rendered += 1
+    store.save()
+    return rendered
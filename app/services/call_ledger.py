@@ -0,0 +1,227 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+
+from app.utils.metrics import LEDGER_DROPPED
+
+# Columns a list of calls can be filtered on, each with an index that also orders by start time
+FILTERS = ('status', 'language', 'phone_number', 'direction')
+# What /calls/stats can group by; day and hour are in the ledger's UTC offset
+GROUPS = ('status', 'language', 'direction', 'day', 'hour')
+# Rollup tables and the seconds each of their periods spans
+ROLLUPS = {'hour': 3600, 'day': 86400}
+
+
+class CallLedger:
+    """One row per finished call in SQLite, written off the request path.
+
+    record() only queues the call; a background thread in each process
+    inserts queued calls in batches. Rows are never updated: a repeated
+    status callback for a call already in the ledger is ignored. Every
+    insert also adds the call to hourly and daily rollups by status,
+    language and direction in the same transaction, so aggregates read a
+    few rows per day however many calls there are. Rollup periods are
+    counted in the ledger's UTC offset, so days start at local midnight.
+    """
+
+    def __init__(self, path, max_queue=10000, flush_interval=1.0, batch_size=500, utc_offset_minutes=0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.utc_offset = int(utc_offset_minutes * 60)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._local = threading.local()
+        self._pid = None
+        self._lock = threading.Lock()
+        conn = self._get_connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                call_sid TEXT NOT NULL UNIQUE,
+                phone_number TEXT,
+                direction TEXT NOT NULL,
+                language TEXT NOT NULL,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                ended_at REAL NOT NULL,
+                duration REAL NOT NULL,
+                turns INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS calls_started_at ON calls (started_at);
+            CREATE INDEX IF NOT EXISTS calls_status ON calls (status, started_at);
+            CREATE INDEX IF NOT EXISTS calls_language ON calls (language, started_at);
+            CREATE INDEX IF NOT EXISTS calls_phone_number ON calls (phone_number, started_at);
+            CREATE INDEX IF NOT EXISTS calls_direction ON calls (direction, started_at);
+        ''')
+        for period in ROLLUPS:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS call_rollup_{period} ('
+                'period INTEGER NOT NULL, status TEXT NOT NULL, language TEXT NOT NULL, direction TEXT NOT NULL, '
+                'calls INTEGER NOT NULL, duration REAL NOT NULL, turns INTEGER NOT NULL, '
+                'PRIMARY KEY (period, status, language, direction)) WITHOUT ROWID'
+            )
+
+    def _get_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_started(self):
+        # Started lazily so every gunicorn worker gets its own writer thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='call-ledger', daemon=True).start()
+
+    def record(self, call_sid, status, ended_at, duration, phone_number=None, direction='inbound',
+               language='hi-IN', turns=0):
+        """Queue a finished call; returns False if it was dropped because the queue is full"""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((
+                call_sid, phone_number, direction, language, status,
+                ended_at - duration, ended_at, duration, turns
+            ))
+            return True
+        except queue.Full:
+            LEDGER_DROPPED.inc()
+            return False
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logging.error(f"Call ledger write error: {str(e)}")
+
+    def _write(self, batch):
+        conn = self._get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for row in batch:
+                inserted = conn.execute(
+                    'INSERT OR IGNORE INTO calls (call_sid, phone_number, direction, language, status, '
+                    'started_at, ended_at, duration, turns) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    row
+                ).rowcount
+                if inserted:
+                    _, _, direction, language, status, started_at, _, duration, turns = row
+                    for period, seconds in ROLLUPS.items():
+                        conn.execute(
+                            f'INSERT INTO call_rollup_{period} (period, status, language, direction, calls, duration, turns) '
+                            'VALUES (?, ?, ?, ?, 1, ?, ?) ON CONFLICT (period, status, language, direction) DO UPDATE '
+                            'SET calls = calls + 1, duration = duration + excluded.duration, turns = turns + excluded.turns',
+                            (self._period(started_at, seconds), status, language, direction, duration, turns)
+                        )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _period(self, timestamp, seconds):
+        return int((timestamp + self.utc_offset) // seconds)
+
+    def close(self):
+        """Write whatever is queued"""
+        if self._pid != os.getpid():
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def calls(self, limit=50, cursor=None, since=None, until=None, **filters):
+        """Calls newest first, one page at a time.
+
+        cursor is the next_cursor of the previous page: pages continue from
+        the last (started_at, id) seen, so a deep page costs the same as the
+        first and calls recorded meanwhile never shift a page.
+        """
+        clauses, params = [], []
+        for column in FILTERS:
+            if filters.get(column):
+                clauses.append(f'{column} = ?')
+                params.append(filters[column])
+        if since is not None:
+            clauses.append('started_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('started_at < ?')
+            params.append(until)
+        if cursor:
+            started_at, row_id = cursor.split(':')
+            clauses.append('(started_at, id) < (?, ?)')
+            params.extend([float(started_at), int(row_id)])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._get_connection().execute(
+            f'SELECT * FROM calls {where} ORDER BY started_at DESC, id DESC LIMIT ?',
+            params + [limit + 1]
+        ).fetchall()
+        page = [dict(row) for row in rows[:limit]]
+        next_cursor = f"{page[-1]['started_at']!r}:{page[-1]['id']}" if len(rows) > limit else None
+        return page, next_cursor
+
+    def stats(self, group_by='status', since=None, until=None):
+        """Calls, total and average duration and turns per group, from the rollups.
+
+        The daily rollup answers unless grouping by hour or since or until
+        falls inside a day; since and until are rounded down to the period.
+        """
+        if group_by not in GROUPS:
+            raise ValueError(f"Cannot group calls by {group_by!r}")
+        within_day = any((moment + self.utc_offset) % 86400 for moment in (since, until) if moment is not None)
+        period = 'hour' if group_by == 'hour' or within_day else 'day'
+        seconds = ROLLUPS[period]
+        if group_by in ROLLUPS:
+            # Days and hours come back as the epoch seconds they start at
+            size = ROLLUPS[group_by]
+            key = f'period * {seconds} / {size} * {size} - {self.utc_offset}'
+        else:
+            key = group_by
+        clauses, params = [], []
+        if since is not None:
+            clauses.append('period >= ?')
+            params.append(self._period(since, seconds))
+        if until is not None:
+            clauses.append('period < ?')
+            params.append(self._period(until, seconds))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._get_connection().execute(
+            f'SELECT {key} AS grp, SUM(calls) AS calls, SUM(duration) AS duration, SUM(turns) AS turns '
+            f'FROM call_rollup_{period} {where} GROUP BY grp ORDER BY grp',
+            params
+        ).fetchall()
+        return [
+            {
+                group_by: row['grp'],
+                'calls': row['calls'],
+                'total_duration': row['duration'],
+                'average_duration': row['duration'] / row['calls'],
+                'average_turns': row['turns'] / row['calls']
+            }
+            for row in rows
+        ]
@@ -0,0 +1,442 @@
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+PHONE_NUMBER = re.compile(r'^\+?\d{8,15}$')
+
+# Outcomes worth another attempt later; anything else reported by Twilio is final
+RETRY_STATUSES = ('busy', 'no-answer', 'failed')
+
+def parse_numbers(content, filename=''):
+    """Read phone numbers from CSV (phone_number column or first column) or JSONL"""
+    numbers = []
+    if filename.endswith('.jsonl') or content.lstrip().startswith('{'):
+        for line in content.splitlines():
+            if line.strip():
+                numbers.append(str(json.loads(line)['phone_number']))
+    else:
+        rows = list(csv.reader(io.StringIO(content)))
+        if rows and 'phone_number' in rows[0]:
+            column = rows[0].index('phone_number')
+            rows = rows[1:]
+        else:
+            column = 0
+        numbers = [row[column] for row in rows if len(row) > column]
+
+    cleaned = []
+    for number in numbers:
+        number = re.sub(r'[\s\-()]', '', number)
+        if PHONE_NUMBER.match(number):
+            cleaned.append(number)
+        elif number:
+            logging.warning(f"Skipping invalid phone number: {number}")
+    return cleaned
+
+class RateLimiter:
+    """Spaces calls evenly so no more than calls_per_second are placed"""
+
+    def __init__(self, calls_per_second):
+        self.interval = 1.0 / calls_per_second
+        self.next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class CampaignStore:
+    """Campaign and per-number state in SQLite, so a campaign can resume after a restart"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._get_connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS campaigns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'created',
+                calls_per_second REAL NOT NULL,
+                max_attempts INTEGER NOT NULL,
+                retry_delay REAL NOT NULL,
+                created_at REAL NOT NULL,
+                kind TEXT NOT NULL DEFAULT 'bulk',
+                lease_owner TEXT,
+                lease_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS campaign_targets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                campaign_id INTEGER NOT NULL REFERENCES campaigns (id),
+                phone_number TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                call_sid TEXT,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS campaign_targets_due
+                ON campaign_targets (campaign_id, status, next_attempt_at);
+            CREATE UNIQUE INDEX IF NOT EXISTS campaign_targets_call_sid
+                ON campaign_targets (call_sid);
+            CREATE INDEX IF NOT EXISTS campaign_targets_status_due
+                ON campaign_targets (status, next_attempt_at);
+        ''')
+        columns = [row['name'] for row in conn.execute('PRAGMA table_info(campaigns)')]
+        if 'kind' not in columns:
+            # Databases from before callbacks had a kind of their own
+            try:
+                conn.execute("ALTER TABLE campaigns ADD COLUMN kind TEXT NOT NULL DEFAULT 'bulk'")
+                conn.execute("UPDATE campaigns SET kind = 'callback' WHERE name LIKE 'callback %'")
+            except sqlite3.OperationalError:
+                pass  # Another worker added it first
+        if 'lease_owner' not in columns:
+            # Nor a dialing lease
+            try:
+                conn.execute('ALTER TABLE campaigns ADD COLUMN lease_owner TEXT')
+                conn.execute('ALTER TABLE campaigns ADD COLUMN lease_at REAL')
+            except sqlite3.OperationalError:
+                pass
+
+    def _get_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, name, numbers, calls_per_second, max_attempts, retry_delay, start_at=0, kind='bulk'):
+        conn = self._get_connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            campaign_id = conn.execute(
+                'INSERT INTO campaigns (name, calls_per_second, max_attempts, retry_delay, created_at, kind) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (name, calls_per_second, max_attempts, retry_delay, now, kind)
+            ).lastrowid
+            conn.executemany(
+                'INSERT INTO campaign_targets (campaign_id, phone_number, next_attempt_at, updated_at) '
+                'VALUES (?, ?, ?, ?)',
+                [(campaign_id, number, start_at, now) for number in numbers]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return campaign_id
+
+    def get(self, campaign_id):
+        row = self._get_connection().execute(
+            'SELECT * FROM campaigns WHERE id = ?', (campaign_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def set_status(self, campaign_id, status):
+        self._get_connection().execute(
+            'UPDATE campaigns SET status = ? WHERE id = ?', (status, campaign_id)
+        )
+
+    def progress(self, campaign_id):
+        rows = self._get_connection().execute(
+            'SELECT status, COUNT(*) AS count FROM campaign_targets WHERE campaign_id = ? GROUP BY status',
+            (campaign_id,)
+        ).fetchall()
+        return {row['status']: row['count'] for row in rows}
+
+    def acquire(self, campaign_id, lease_timeout):
+        """Take the campaign's dialing lease, unless a dialer in any worker holds one it
+        renewed within lease_timeout; returns the lease token, or None"""
+        token = uuid.uuid4().hex
+        now = time.time()
+        acquired = self._get_connection().execute(
+            "UPDATE campaigns SET status = 'running', lease_owner = ?, lease_at = ? "
+            "WHERE id = ? AND (status NOT IN ('running', 'stopping') OR lease_at IS NULL OR lease_at < ?)",
+            (token, now, campaign_id, now - lease_timeout)
+        ).rowcount
+        return token if acquired else None
+
+    def renew(self, campaign_id, token):
+        """Keep the lease; False once a stop was requested or another dialer took it over"""
+        return self._get_connection().execute(
+            "UPDATE campaigns SET lease_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+            (time.time(), campaign_id, token)
+        ).rowcount == 1
+
+    def release(self, campaign_id, token, status):
+        """Give the lease up, leaving the campaign in status, if it is still ours"""
+        return self._get_connection().execute(
+            'UPDATE campaigns SET status = ?, lease_owner = NULL, lease_at = NULL '
+            'WHERE id = ? AND lease_owner = ?',
+            (status, campaign_id, token)
+        ).rowcount == 1
+
+    def request_stop(self, campaign_id, lease_timeout):
+        """Ask whichever worker dials the campaign to pause it; one whose dialer is gone
+        is paused at once. Returns False if the campaign is not running"""
+        return self._get_connection().execute(
+            "UPDATE campaigns SET status = CASE WHEN lease_at IS NULL OR lease_at < ? THEN 'paused' "
+            "ELSE 'stopping' END WHERE id = ? AND status IN ('running', 'stopping')",
+            (time.time() - lease_timeout, campaign_id)
+        ).rowcount == 1
+
+    def recover(self, campaign_id, older_than):
+        """Requeue targets a crashed dialer claimed but never got a call SID for, once they
+        have been 'dialing' for longer than older_than"""
+        return self._get_connection().execute(
+            "UPDATE campaign_targets SET status = 'queued', attempts = MAX(attempts - 1, 0) "
+            "WHERE campaign_id = ? AND status = 'dialing' AND call_sid IS NULL AND updated_at < ?",
+            (campaign_id, time.time() - older_than)
+        ).rowcount
+
+    def recover_kind(self, kind, older_than):
+        """Requeue targets of every campaign of a kind that have been 'dialing' for
+        longer than older_than; younger ones may be mid-dial in another worker"""
+        return self._get_connection().execute(
+            "UPDATE campaign_targets SET status = 'queued', attempts = MAX(attempts - 1, 0) "
+            "WHERE status = 'dialing' AND call_sid IS NULL AND updated_at < ? "
+            "AND campaign_id IN (SELECT id FROM campaigns WHERE kind = ?)",
+            (time.time() - older_than, kind)
+        ).rowcount
+
+    def claim_due(self, campaign_id, limit):
+        """Atomically move up to limit due targets to 'dialing' and return them"""
+        return self._claim('t.campaign_id = ?', campaign_id, limit)
+
+    def claim_due_kind(self, kind, limit):
+        """claim_due across every campaign of a kind"""
+        return self._claim('c.kind = ?', kind, limit)
+
+    def _claim(self, condition, value, limit):
+        conn = self._get_connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                "SELECT t.id, t.phone_number FROM campaign_targets t JOIN campaigns c ON c.id = t.campaign_id "
+                f"WHERE {condition} AND t.status IN ('queued', 'retry') AND t.next_attempt_at <= ? "
+                "ORDER BY t.next_attempt_at, t.id LIMIT ?",
+                (value, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE campaign_targets SET status = 'dialing', attempts = attempts + 1, "
+                "call_sid = NULL, updated_at = ? WHERE id = ?",
+                [(now, row['id']) for row in rows]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [dict(row) for row in rows]
+
+    def requeue(self, target_id):
+        """Hand back a claimed target that was never dialled"""
+        self._get_connection().execute(
+            "UPDATE campaign_targets SET status = 'queued', attempts = MAX(attempts - 1, 0), updated_at = ? "
+            "WHERE id = ? AND status = 'dialing'",
+            (time.time(), target_id)
+        )
+
+    def mark_initiated(self, target_id, call_sid):
+        self._get_connection().execute(
+            "UPDATE campaign_targets SET status = 'initiated', call_sid = ?, updated_at = ? WHERE id = ?",
+            (call_sid, time.time(), target_id)
+        )
+
+    def mark_attempt_failed(self, target_id, error):
+        """The call could not even be placed; retry it like a failed call"""
+        self._finish(
+            'SELECT t.id, t.attempts, c.max_attempts, c.retry_delay FROM campaign_targets t '
+            'JOIN campaigns c ON c.id = t.campaign_id WHERE t.id = ?',
+            (target_id,), 'failed', error
+        )
+
+    def record_status(self, call_sid, status):
+        """Apply a Twilio status callback; returns False if the call is not part of a campaign"""
+        return self._finish(
+            'SELECT t.id, t.attempts, c.max_attempts, c.retry_delay FROM campaign_targets t '
+            'JOIN campaigns c ON c.id = t.campaign_id WHERE t.call_sid = ?',
+            (call_sid,), status, None
+        )
+
+    def _finish(self, query, params, status, error):
+        conn = self._get_connection()
+        row = conn.execute(query, params).fetchone()
+        if not row:
+            return False
+        now = time.time()
+        if status in RETRY_STATUSES and row['attempts'] < row['max_attempts']:
+            conn.execute(
+                "UPDATE campaign_targets SET status = 'retry', next_attempt_at = ?, "
+                "last_error = ?, updated_at = ? WHERE id = ?",
+                (now + row['retry_delay'] * row['attempts'], error or status, now, row['id'])
+            )
+        else:
+            conn.execute(
+                'UPDATE campaign_targets SET status = ?, last_error = ?, updated_at = ? WHERE id = ?',
+                (status, error, now, row['id'])
+            )
+        return True
+
+    def expire_stale(self, campaign_id, older_than):
+        """Give up on calls whose status callback never arrived"""
+        return self._get_connection().execute(
+            "UPDATE campaign_targets SET status = 'no-result', updated_at = ? "
+            "WHERE campaign_id = ? AND status = 'initiated' AND updated_at < ?",
+            (time.time(), campaign_id, time.time() - older_than)
+        ).rowcount
+
+    def expire_stale_kind(self, kind, older_than):
+        """expire_stale across every campaign of a kind"""
+        return self._get_connection().execute(
+            "UPDATE campaign_targets SET status = 'no-result', updated_at = ? "
+            "WHERE status = 'initiated' AND updated_at < ? "
+            "AND campaign_id IN (SELECT id FROM campaigns WHERE kind = ?)",
+            (time.time(), time.time() - older_than, kind)
+        ).rowcount
+
+    def next_due(self, campaign_id, idle_wait):
+        """Seconds until a target may need dialing, or None once every target has an outcome"""
+        row = self._get_connection().execute(
+            "SELECT MIN(CASE WHEN status IN ('queued', 'retry') THEN next_attempt_at END) AS due, "
+            "SUM(status IN ('dialing', 'initiated')) AS in_flight FROM campaign_targets "
+            "WHERE campaign_id = ? AND status IN ('queued', 'retry', 'dialing', 'initiated')",
+            (campaign_id,)
+        ).fetchone()
+        if row['due'] is not None:
+            return max(0.0, row['due'] - time.time())
+        # Only calls waiting on their status callback, which may still schedule a retry
+        return idle_wait if row['in_flight'] else None
+
+class CampaignDialer:
+    """Dials every target of a campaign through a worker pool at a capped call rate.
+
+    Only the holder of the campaign's lease in the database dials it, so a
+    campaign started from two workers (or the CLI) is still dialled once.
+    """
+
+    def __init__(self, store, twilio_service, workers=4, result_timeout=1800, poll_interval=1.0,
+                 lease_timeout=300):
+        self.store = store
+        self.twilio_service = twilio_service
+        self.workers = workers
+        self.result_timeout = result_timeout
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+
+    def _dial(self, limiter, target, lease=None):
+        # Checked before and after waiting on the call rate, so a stopped (or taken over)
+        # campaign hands the rest of its batch back instead of dialing it
+        if lease and not self.store.renew(*lease):
+            return self.store.requeue(target['id'])
+        limiter.acquire()
+        if lease and not self.store.renew(*lease):
+            return self.store.requeue(target['id'])
+        result = self.twilio_service.initiate_call(target['phone_number'])
+        if result.get('status') == 'success':
+            self.store.mark_initiated(target['id'], result['call_sid'])
+        else:
+            self.store.mark_attempt_failed(target['id'], result.get('message'))
+
+    def acquire(self, campaign_id):
+        """The campaign's lease token to pass to run, or None if it is being dialled already"""
+        return self.store.acquire(campaign_id, self.lease_timeout)
+
+    def stop(self, campaign_id):
+        """Pause the campaign in whichever worker dials it; False if it is not running"""
+        return self.store.request_stop(campaign_id, self.lease_timeout)
+
+    def run(self, campaign_id, token, stop_event=None):
+        """Dial until every target has a final outcome, or until a stop is requested
+        (through stop or stop_event) or the lease is lost"""
+        campaign = self.store.get(campaign_id)
+        if not campaign:
+            raise ValueError(f"Unknown campaign {campaign_id}")
+
+        limiter = RateLimiter(campaign['calls_per_second'])
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='dialer') as pool:
+                while not (stop_event and stop_event.is_set()) and self.store.renew(campaign_id, token):
+                    # Every dial renews the lease, so targets younger than it may still be mid-dial
+                    recovered = self.store.recover(campaign_id, self.lease_timeout)
+                    if recovered:
+                        logging.info(f"Campaign {campaign_id}: requeued {recovered} interrupted targets")
+                    targets = self.store.claim_due(campaign_id, self.workers * 2)
+                    if targets:
+                        list(pool.map(lambda target: self._dial(limiter, target, (campaign_id, token)), targets))
+                        continue
+
+                    self.store.expire_stale(campaign_id, self.result_timeout)
+                    wait = self.store.next_due(campaign_id, self.poll_interval)
+                    if wait is None:
+                        self.store.release(campaign_id, token, 'completed')
+                        logging.info(f"Campaign {campaign_id} completed: {self.store.progress(campaign_id)}")
+                        return
+                    time.sleep(min(wait, self.poll_interval))
+        finally:
+            # A no-op if the campaign completed or another dialer took it over
+            self.store.release(campaign_id, token, 'paused')
+
+class CallbackDialer(CampaignDialer):
+    """Dials every due callback from a single background poller per process.
+
+    A callback is a one-number campaign of kind 'callback' in the campaign
+    database, due CALLBACK_DELAY after it was asked for. The poller starts
+    with the worker and picks up callbacks queued before a restart; every
+    worker polls, and claiming is atomic, so each callback is dialled once.
+    """
+
+    KIND = 'callback'
+
+    def __init__(self, store, twilio_service, calls_per_second=1, workers=1, result_timeout=1800,
+                 poll_interval=1.0, recover_after=300):
+        super().__init__(store, twilio_service, workers, result_timeout, poll_interval)
+        self.calls_per_second = calls_per_second
+        self.recover_after = recover_after
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the poller if it is not running yet; cheap enough to call on every request"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='callback-dialer', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        limiter = RateLimiter(self.calls_per_second)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='callback') as pool:
+            while not self._stop.is_set():
+                try:
+                    recovered = self.store.recover_kind(self.KIND, self.recover_after)
+                    if recovered:
+                        logging.info(f"Requeued {recovered} interrupted callbacks")
+                    targets = self.store.claim_due_kind(self.KIND, self.workers * 2)
+                    if targets:
+                        list(pool.map(lambda target: self._dial(limiter, target), targets))
+                        continue
+                    self.store.expire_stale_kind(self.KIND, self.result_timeout)
+                except Exception as e:
+                    logging.error(f"Callback dialer error: {str(e)}")
+                self._stop.wait(self.poll_interval)
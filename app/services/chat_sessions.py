@@ -0,0 +1,131 @@
+from collections import OrderedDict
+import threading
+import time
+
+from app.utils.history import Exchange, last_turn
+
+LANGUAGE_NAMES = {'hi-IN': 'Hindi', 'mr-IN': 'Marathi', 'en-IN': 'English'}
+
+PERSONA = """You are Diksha (दीक्षा), a female farming expert. Remember:
+1. You have complete memory of the conversation
+2. Use previous context to give better answers
+3. Speak naturally in simple {language_name} like local women
+4. Give practical farming advice based on previous answers
+5. Ask logical next questions based on conversation flow
+6. answer short and concise
+7. you can help regarding the questions like Milk , goats , cows , buffaloes , etc.
+8. you can also help regarding the questions like selling and
+ buying of crop, doing fish farming, poultry farming, etc.
+9. analyze the user question properly and answer accordingly.
+
+Example of good conversation flow:
+User: मैं टमाटर की खेती करना चाहता हूं
+Diksha: अच्छा, मैं टमाटर की खेती में मदद करूंगी। बताओ कितनी जमीन में लगाना है?
+
+User: दो एकड़ में
+Diksha: दो एकड़ के लिए करीब 8000-9000 पौधे लगेंगे। अभी मैं सिंचाई के बारे में पूछना चाहती हूं। बताओ पानी का क्या इंतजाम है?
+
+User: मेरे पास कुआं है
+Diksha: अच्छा, कुएं का पानी है। मैं आपको ड्रिप इरिगेशन का सुझाव दूंगी। पहले ये बताओ कुएं में पानी का लेवल कैसा है?
+
+User: पानी अच्छा है, 20 फीट पर मिल जाता है
+Diksha: बहुत बढ़िया! पानी अच्छा है तो टमाटर की खेती अच्छी होगी। अब मैं मिट्टी के बारे में पूछना चाहती हूं। पिछली बार कौन सी फसल लगाई थी?
+
+The conversation with the caller follows. Respond naturally as Diksha, using conversation history for context."""
+
+def build_persona(language):
+    """Static head of every request for one language, built once and sent as the first part of every turn.
+
+    The Gemini API keeps no state between requests, so the persona is still
+    part of every request's bytes; only building it is saved.
+    """
+    return PERSONA.format(language_name=LANGUAGE_NAMES.get(language, 'Hindi'))
+
+class ChatSession:
+    """Live conversation of one call: the summary, the recent exchanges and their rendered text"""
+
+    def __init__(self, language, summary, recent, transcript, turn):
+        self.language = language
+        self.summary = summary
+        self.recent = recent
+        self.transcript = transcript
+        self.turn = turn
+        self.last_used = time.monotonic()
+
+class ChatSessionPool:
+    """Per-call chat sessions in one worker, rebuilt from the stored history whenever they fall behind.
+
+    A session is only trusted while it has seen every exchange in the shared
+    history; turns answered by another worker, late answers and worker
+    restarts all show up as a turn number mismatch and trigger rehydration.
+    """
+
+    def __init__(self, context, max_sessions=2000, idle_timeout=600):
+        self.context = context
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._personas = {}
+        self._lock = threading.Lock()
+        self.rehydrations = 0
+
+    def persona(self, language):
+        persona = self._personas.get(language)
+        if persona is None:
+            persona = self._personas[language] = build_persona(language)
+        return persona
+
+    def _evict(self, now):
+        while self._sessions:
+            call_sid, session = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - session.last_used < self.idle_timeout:
+                break
+            del self._sessions[call_sid]
+
+    def session(self, call_sid, history, language):
+        """The call's session, rehydrated from history if this worker missed any exchange"""
+        history = history or []
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(call_sid)
+            if session and session.turn == last_turn(history) and session.language == language:
+                session.last_used = now
+                self._sessions.move_to_end(call_sid)
+                return session
+
+        summary, recent = self.context.turns(history, call_sid=call_sid)
+        session = ChatSession(language, summary, recent, self.context.render(summary, recent), last_turn(history))
+        with self._lock:
+            self.rehydrations += 1
+            self._sessions[call_sid] = session
+            self._sessions.move_to_end(call_sid)
+            self._evict(now)
+        return session
+
+    def contents(self, session, user_input, passages=(), weather=None):
+        """Request contents for one turn: the prebuilt persona, the session's transcript,
+        any knowledge passages or weather facts and the new message as parts of a single user turn"""
+        parts = [self.persona(session.language)]
+        if session.transcript:
+            parts.append(session.transcript)
+        if passages:
+            parts.append("Farming notes that may help, use them only if they fit the question:\n"
+                         + "\n".join(f"- {passage.text}" for passage in passages))
+        if weather:
+            parts.append(weather)
+        parts.append(f"Current user message: {user_input}")
+        # One turn rather than alternating ones: the REST body indents every nested object
+        return [{'role': 'user', 'parts': parts}]
+
+    def record(self, call_sid, turn, user_input, answer):
+        """Add the exchange after turn to the session if the session is still at that turn"""
+        with self._lock:
+            session = self._sessions.get(call_sid)
+            if not session or session.turn != turn:
+                return
+            session.summary, session.recent = self.context.trim(
+                session.summary, session.recent + [Exchange(user_input, answer, turn=turn + 1)]
+            )
+            session.transcript = self.context.render(session.summary, session.recent)
+            session.turn += 1
+            session.last_used = time.monotonic()
@@ -0,0 +1,98 @@
+import logging
+import threading
+
+from app.utils.metrics import PROMPT_CHARS
+
+
+class ConversationContext:
+    """Bounded prompt context: recent exchanges verbatim, older ones in a rolling summary"""
+
+    def __init__(self, store, recent_exchanges=4, max_chars=2000, summary_chars=600):
+        self.store = store
+        self.recent_exchanges = recent_exchanges
+        self.max_chars = max_chars
+        self.summary_chars = summary_chars
+        self._lock = threading.Lock()
+        self.prompt_stats = {
+            'turns': 0,
+            'total_chars': 0,
+            'max_chars': 0,
+            'last_chars': 0
+        }
+
+    def _first_sentence(self, text, limit):
+        for mark in ('।', '?', '.', '!'):
+            if mark in text:
+                text = text.split(mark)[0] + mark
+                break
+        return text[:limit].strip()
+
+    def _fold(self, summary, exchange):
+        """Fold one exchange into the summary and trim it to the summary budget"""
+        line = (
+            f"- User: {self._first_sentence(exchange.user, 80)}"
+            f" / Diksha: {self._first_sentence(exchange.ai, 100)}"
+        )
+        lines = (summary.split('\n') if summary else []) + [line]
+        while len(lines) > 1 and len('\n'.join(lines)) > self.summary_chars:
+            lines.pop(0)
+        return '\n'.join(lines)
+
+    def _load_summary(self, call_sid, history, cutoff):
+        """Return the summary of every turn before history[cutoff], folding only turns not yet folded.
+
+        Progress is kept as a turn number, so turns evicted from the stored
+        history stay in the summary.
+        """
+        key = f'summary_{call_sid}'
+        state = self.store.get(key) if call_sid else None
+        if not state or state['folded'] > history[-1].turn:
+            state = {'text': '', 'folded': 0}
+
+        pending = [exchange for exchange in history[:cutoff] if exchange.turn > state['folded']]
+        if pending:
+            for exchange in pending:
+                state['text'] = self._fold(state['text'], exchange)
+            state['folded'] = pending[-1].turn
+            if call_sid:
+                self.store.set(key, state)
+        return state['text']
+
+    def _size(self, exchange):
+        # Budgeted as the exchange plus its speaker labels
+        return len(exchange.user) + len(exchange.ai) + 16
+
+    def trim(self, summary, recent):
+        """Fold the oldest verbatim exchanges into the summary until both budgets hold"""
+        recent = list(recent)
+        # Long answers can still blow the budget, so summarize the oldest verbatim turns for this prompt only
+        while len(recent) > self.recent_exchanges or (
+                len(recent) > 1 and len(summary) + sum(map(self._size, recent)) > self.max_chars):
+            summary = self._fold(summary, recent.pop(0))
+        return summary, recent
+
+    def turns(self, history, call_sid=None):
+        """Summary of older exchanges plus the recent exchanges to send verbatim"""
+        if not history:
+            return "", []
+        cutoff = max(0, len(history) - self.recent_exchanges)
+        summary = self._load_summary(call_sid, history, cutoff)
+        return self.trim(summary, history[cutoff:])
+
+    def render(self, summary, recent):
+        """Conversation section of the prompt: the summary, then the recent exchanges verbatim"""
+        recent = "".join(f"User: {exchange.user}\nDiksha: {exchange.ai}\n" for exchange in recent)
+        if not summary:
+            return recent
+        return f"Earlier in this call:\n{summary}\n\nRecent exchanges:\n{recent}"
+
+    def record_prompt(self, call_sid, turn, contents):
+        """Track the size of the text sent per turn"""
+        size = sum(len(part) for content in contents for part in content['parts'])
+        with self._lock:
+            self.prompt_stats['turns'] += 1
+            self.prompt_stats['total_chars'] += size
+            self.prompt_stats['max_chars'] = max(self.prompt_stats['max_chars'], size)
+            self.prompt_stats['last_chars'] = size
+        PROMPT_CHARS.observe(size)
+        logging.info(f"Prompt size - Call SID: {call_sid}, turn: {turn}, chars: {size}")
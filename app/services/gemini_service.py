@@ -1,66 +1,339 @@
 import google.generativeai as genai
+from google.generativeai import client as genai_client
 from config import Config
-from app import cache
+from app import session_store
+from app.services.chat_sessions import LANGUAGE_NAMES, ChatSessionPool
+from app.services.context_manager import ConversationContext
+from app.services.knowledge_index import KnowledgeIndex
+from app.services.llm_stub import StubModel
+from app.services.weather_service import WeatherService, create_provider, is_weather_question
+from app.utils.cache import ResponseCache
+from app.utils.deadline import Deadline, DeadlineExceeded, LatencyTracker, hedged_call
+from app.utils.history import last_turn
+from app.utils.metrics import FALLBACKS, GEMINI_ERRORS, KNOWLEDGE, OVERLOAD, RESPONSE_CACHE, span
+from app.utils.overload import AdaptiveLimit, CircuitBreaker, Overloaded
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import importlib
 import logging
+import time
+
+GENERATION_CONFIG = {
+    'temperature': 0.7,
+    'top_p': 0.8,
+    'top_k': 40,
+    'max_output_tokens': 200
+}
+# Spoken when Gemini fails outright
+LLM_ERROR_ANSWER = "मैं समझ नहीं पाई। फिर से बताओ क्या पूछना है?"
+
+def estimate_tokens(contents, text):
+    """Rough token count of a request and its answer for budgets and metrics, four characters a token"""
+    chars = sum(len(part) for content in contents for part in content['parts']) + len(text or '')
+    return chars // 4 + 1
+
+def create_model(backend):
+    """The model behind GeminiService: 'gemini', 'stub', or 'package.module:factory'.
+
+    A factory returns any object with generate_content(contents,
+    generation_config=None, stream=False) answering like GenerativeModel.
+    """
+    if backend == 'stub':
+        return StubModel(
+            latency=Config.LLM_STUB_LATENCY,
+            distribution=Config.LLM_STUB_DISTRIBUTION,
+            jitter=Config.LLM_STUB_JITTER,
+            seed=Config.LLM_STUB_SEED
+        )
+    if ':' in backend:
+        module, factory = backend.split(':', 1)
+        return getattr(importlib.import_module(module), factory)()
+    if backend != 'gemini':
+        raise ValueError(f"Unknown LLM backend: {backend}")
+    # REST rather than gRPC so calls cooperate with gevent workers
+    genai.configure(api_key=Config.GEMINI_API_KEY, transport=Config.GEMINI_TRANSPORT)
+    return genai.GenerativeModel('gemini-2.0-flash')
 
 class GeminiService:
-    def __init__(self):
-        genai.configure(api_key=Config.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+    def __init__(self, backend=None):
+        self.backend = backend or Config.LLM_BACKEND
+        self.model = create_model(self.backend)
+        self.context = ConversationContext(
+            session_store,
+            recent_exchanges=Config.CONTEXT_RECENT_EXCHANGES,
+            max_chars=Config.CONTEXT_MAX_CHARS,
+            summary_chars=Config.CONTEXT_SUMMARY_CHARS
+        )
+        self.sessions = ChatSessionPool(
+            self.context,
+            max_sessions=Config.CHAT_SESSIONS_MAX,
+            idle_timeout=Config.CHAT_SESSION_IDLE_TIMEOUT
+        )
+        self.response_cache = ResponseCache(
+            max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+            ttl=Config.RESPONSE_CACHE_TTL
+        )
+        self.knowledge = KnowledgeIndex(Config.KNOWLEDGE_INDEX_DIR)
+        self.weather = WeatherService(
+            session_store,
+            create_provider(Config.WEATHER_PROVIDER, Config.WEATHER_API_KEY, Config.WEATHER_API_BASE_URL),
+            ttl=Config.WEATHER_TTL,
+            refresh_after=Config.WEATHER_REFRESH_AFTER,
+            precision=Config.WEATHER_GEOHASH_PRECISION,
+            warm_districts=Config.WEATHER_WARM_DISTRICTS
+        )
+        if Config.WEATHER_WARM_DISTRICTS:
+            self.weather.start()
+        self.executor = ThreadPoolExecutor(max_workers=Config.LLM_WORKERS, thread_name_prefix='gemini')
+        self.latency = LatencyTracker(default=Config.LLM_HEDGE_AFTER)
+        self.breaker = CircuitBreaker(
+            'gemini',
+            failure_rate=Config.LLM_CIRCUIT_FAILURE_RATE,
+            window=Config.LLM_CIRCUIT_WINDOW,
+            min_calls=Config.LLM_CIRCUIT_MIN_CALLS,
+            open_seconds=Config.LLM_CIRCUIT_OPEN_SECONDS,
+            probes=Config.LLM_CIRCUIT_PROBES
+        )
+        self.limit = AdaptiveLimit(
+            initial=Config.LLM_CONCURRENCY_INITIAL,
+            min_limit=Config.LLM_CONCURRENCY_MIN,
+            max_limit=Config.LLM_CONCURRENCY_MAX,
+            target_latency=Config.LLM_TARGET_LATENCY
+        )
     
-    def get_response(self, user_input, history=None, language='hi-IN', call_sid=None):
-        """Get AI response with full conversation context"""
+    def warm_up(self):
+        """Open the pooled connection to Gemini before the first caller needs it"""
+        if self.backend != 'gemini':
+            return
+        started = time.monotonic()
         try:
-            conversation_context = ""
-            if history:
-                for exchange in history:
-                    conversation_context += f"User: {exchange['user']}\nDiksha: {exchange['ai']}\n"
+            # The default client is the one generate_content uses, with its keep-alive session;
+            # GenerativeModel.count_tokens in google-generativeai 0.3.0 cannot be called before it
+            genai_client.get_default_generative_client().count_tokens(
+                model=self.model.model_name,
+                contents=[{'role': 'user', 'parts': [{'text': 'नमस्ते'}]}]
+            )
+            logging.info(f"Gemini connection warmed in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            logging.warning(f"Gemini warm-up failed: {str(e)}")
+    
+    def build_contents(self, user_input, history=None, language='hi-IN', call_sid=None, passages=(), weather=None):
+        """Request contents for one turn from the call's chat session"""
+        session = self.sessions.session(call_sid, history, language)
+        contents = self.sessions.contents(session, user_input, passages, weather)
+        self.context.record_prompt(call_sid, last_turn(history) + 1, contents)
+        return contents
+    
+    def speculate(self, user_input, history, language, call_sid):
+        """Answer an utterance the caller has not said yet; returns the answer and its estimated tokens.
+
+        Built from the call's session exactly as the real turn would be, but
+        nothing is recorded: the session only learns the exchange if the
+        answer is served.
+        """
+        session = self.sessions.session(call_sid, history, language)
+        contents = self.sessions.contents(session, user_input)
+        text = self._generate(contents)
+        return text, estimate_tokens(contents, text)
+    
+    def predict_replies(self, question, language, count):
+        """The caller's likeliest short replies to a question, one per line, and the estimated tokens spent"""
+        contents = [{'role': 'user', 'parts': [
+            f"A farmer on a phone call was just asked by a farming assistant: \"{question}\"\n"
+            f"Write the {count} short replies the farmer is most likely to give, in "
+            f"{LANGUAGE_NAMES.get(language, 'Hindi')}, one per line, with nothing else."
+        ]}]
+        text = self._generate(contents)
+        return [line for line in text.splitlines() if line.strip()][:count], estimate_tokens(contents, text)
+    
+    def admissible(self):
+        """Whether a Gemini call would get past the circuit breaker and concurrency limit right now"""
+        return self.breaker.available() and self.limit.available()
+    
+    @contextmanager
+    def _admitted(self):
+        """Hold a slot for one Gemini call, raising Overloaded if there is none"""
+        if not self.breaker.allow():
+            raise Overloaded('circuit_open')
+        if not self.limit.acquire():
+            self.breaker.cancel()
+            raise Overloaded('overloaded')
+        started = time.monotonic()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            latency = time.monotonic() - started
+            self.limit.release(latency, success)
+            # An answer later than the whole turn budget has failed the caller as well
+            self.breaker.record(success and latency <= Config.TURN_BUDGET)
+    
+    def _generate(self, contents):
+        """Blocking Gemini call that feeds the latency tracker"""
+        started = time.monotonic()
+        with self._admitted():
+            try:
+                with span('llm'):
+                    response = self.model.generate_content(
+                        contents,
+                        generation_config=GENERATION_CONFIG
+                    )
+                    text = response.text
+            except Exception:
+                GEMINI_ERRORS.inc()
+                raise
+        self.latency.record(time.monotonic() - started)
+        return text
+    
+    def _cached_answer(self, user_input, language, call_sid):
+        cached = self.response_cache.get(user_input, language)
+        RESPONSE_CACHE.labels('hit' if cached else 'miss').inc()
+        if cached:
+            logging.info(f"Response cache hit - Call SID: {call_sid}")
+        return cached
+    
+    def _weather(self, user_input, call_sid):
+        """Forecast facts for a weather question from the cache, None for any other question"""
+        if not is_weather_question(user_input):
+            return None
+        with span('weather'):
+            return self.weather.note(call_sid, user_input, default_district=Config.WEATHER_DEFAULT_DISTRICT)
+    
+    def _retrieve(self, user_input, language, call_sid, standalone):
+        """Passages to ground the prompt, and the curated answer when the question matches one outright"""
+        with span('retrieve'):
+            passages = self.knowledge.search(
+                user_input,
+                k=Config.KNOWLEDGE_TOP_K,
+                min_coverage=Config.KNOWLEDGE_MIN_COVERAGE
+            )
+        best = passages[0] if passages else None
+        # Only questions that stand on their own; a follow-up needs the conversation
+        if (standalone and best and best.answer and best.language == language
+                and best.confidence >= Config.KNOWLEDGE_ANSWER_CONFIDENCE):
+            KNOWLEDGE.labels('answered').inc()
+            logging.info(f"Answered from knowledge index - Call SID: {call_sid}, topic: {best.topic}")
+            return passages, best.answer
+        KNOWLEDGE.labels('grounded' if passages else 'miss').inc()
+        return passages, None
+    
+    def _degraded_answer(self, user_input, language, call_sid, passages, reason):
+        """An answer without Gemini: one cached for the question, else a close enough curated one"""
+        answer = self.response_cache.get(user_input, language)
+        served = 'cache'
+        if not answer:
+            best = passages[0] if passages else None
+            if (best and best.answer and best.language == language
+                    and best.confidence >= Config.KNOWLEDGE_DEGRADED_CONFIDENCE):
+                answer = best.answer
+                served = 'knowledge'
+        if answer:
+            OVERLOAD.labels(reason, served).inc()
+            logging.info(f"Gemini {reason}, answered from {served} - Call SID: {call_sid}")
+        return answer
+    
+    def get_response(self, user_input, history=None, language='hi-IN', call_sid=None, deadline=None):
+        """Get AI response within the turn deadline.
+
+        Raises DeadlineExceeded if the budget runs out; its pending future
+        still resolves to the answer so it can be served on a redirect.
+        Raises Overloaded if Gemini cannot be called and there is no cached
+        or curated answer to fall back on.
+        """
+        deadline = deadline or Deadline(Config.TURN_BUDGET)
+        passages = ()
+        try:
+            weather = self._weather(user_input, call_sid)
+            # Only first turns and standalone questions have context-free answers, and
+            # weather answers go stale
+            cacheable = not weather and (not history or self.response_cache.is_standalone(user_input))
+            if cacheable:
+                cached = self._cached_answer(user_input, language, call_sid)
+                if cached:
+                    return cached
             
-            prompt = f"""
-            You are Diksha (दीक्षा), a female farming expert. Remember:
-            1. You have complete memory of the conversation
-            2. Use previous context to give better answers
-            3. Speak naturally in simple Hindi like local women
-            4. Give practical farming advice based on previous answers
-            5. Ask logical next questions based on conversation flow
-            6. answer short and concise
-            7. you can help regarding the questions like Milk , goats , cows , buffaloes , etc.
-            8. you can also help regarding the questions like selling and
-             buying of crop, doing fish farming, poultry farming, etc.
-            9. analyze the user question properly and answer accordingly.
+            passages, answer = self._retrieve(user_input, language, call_sid, cacheable)
+            if answer:
+                self.sessions.record(call_sid, last_turn(history), user_input, answer)
+                return answer
             
-            Complete conversation so far:
-            {conversation_context}
+            if not self.breaker.available():
+                raise Overloaded('circuit_open')
+            if not self.limit.available():
+                raise Overloaded('overloaded')
             
-            Current user message: {user_input}
-
-            Example of good conversation flow:
-            User: मैं टमाटर की खेती करना चाहता हूं
-            Diksha: अच्छा, मैं टमाटर की खेती में मदद करूंगी। बताओ कितनी जमीन में लगाना है?
-
-            User: दो एकड़ में
-            Diksha: दो एकड़ के लिए करीब 8000-9000 पौधे लगेंगे। अभी मैं सिंचाई के बारे में पूछना चाहती हूं। बताओ पानी का क्या इंतजाम है?
-
-            User: मेरे पास कुआं है
-            Diksha: अच्छा, कुएं का पानी है। मैं आपको ड्रिप इरिगेशन का सुझाव दूंगी। पहले ये बताओ कुएं में पानी का लेवल कैसा है?
-
-            User: पानी अच्छा है, 20 फीट पर मिल जाता है
-            Diksha: बहुत बढ़िया! पानी अच्छा है तो टमाटर की खेती अच्छी होगी। अब मैं मिट्टी के बारे में पूछना चाहती हूं। पिछली बार कौन सी फसल लगाई थी?
-
-            Respond naturally as Diksha, using conversation history for context:"""
+            with span('prompt_build'):
+                contents = self.build_contents(user_input, history, language, call_sid, passages, weather)
+            try:
+                text = hedged_call(
+                    self.executor,
+                    lambda: self._generate(contents),
+                    deadline,
+                    hedge_after=self.latency.percentile(95),
+                    max_attempts=Config.LLM_MAX_ATTEMPTS
+                )
+            except DeadlineExceeded as e:
+                if cacheable:
+                    def cache_late_answer(future):
+                        if future.exception() is None:
+                            self.response_cache.set(user_input, language, future.result())
+                    e.pending.add_done_callback(cache_late_answer)
+                raise
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    'temperature': 0.7,
-                    'top_p': 0.8,
-                    'top_k': 40,
-                    'max_output_tokens': 200
-                }
-            )
+            if cacheable:
+                self.response_cache.set(user_input, language, text)
+            self.sessions.record(call_sid, last_turn(history), user_input, text)
             
-            return response.text
+            return text
 
+        except DeadlineExceeded:
+            raise
+        except Overloaded as e:
+            answer = self._degraded_answer(user_input, language, call_sid, passages, e.reason)
+            if not answer:
+                raise
+            self.sessions.record(call_sid, last_turn(history), user_input, answer)
+            return answer
         except Exception as e:
             logging.error(f"Gemini error: {str(e)}")
-            return "मैं समझ नहीं पाई। फिर से बताओ क्या पूछना है?"
\ No newline at end of file
+            FALLBACKS.labels('llm_error').inc()
+            return LLM_ERROR_ANSWER
+    
+    def stream_response(self, user_input, history=None, language='hi-IN', call_sid=None):
+        """Yield the answer in chunks as Gemini generates it; errors propagate to the caller"""
+        weather = self._weather(user_input, call_sid)
+        cacheable = not weather and (not history or self.response_cache.is_standalone(user_input))
+        if cacheable:
+            cached = self._cached_answer(user_input, language, call_sid)
+            if cached:
+                yield cached
+                return
+        
+        passages, answer = self._retrieve(user_input, language, call_sid, cacheable)
+        if answer:
+            self.sessions.record(call_sid, last_turn(history), user_input, answer)
+            yield answer
+            return
+        
+        with span('prompt_build'):
+            contents = self.build_contents(user_input, history, language, call_sid, passages, weather)
+        text = ""
+        with self._admitted():
+            try:
+                for chunk in self.model.generate_content(
+                    contents,
+                    generation_config=GENERATION_CONFIG,
+                    stream=True
+                ):
+                    text += chunk.text
+                    yield chunk.text
+            except Exception:
+                GEMINI_ERRORS.inc()
+                raise
+        
+        if cacheable and text:
+            self.response_cache.set(user_input, language, text)
+        if text:
+            self.sessions.record(call_sid, last_turn(history), user_input, text)
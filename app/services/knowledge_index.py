@@ -0,0 +1,291 @@
+from collections import namedtuple
+import glob
+import json
+import logging
+import math
+import os
+import re
+import time
+import unicodedata
+
+import numpy as np
+
+# Devanagari runs (without the danda), Latin words and numbers
+TOKEN = re.compile(r'[\u0900-\u0963\u0966-\u097F]+|[a-z]+|[0-9]+(?:\.[0-9]+)?')
+
+# Words that carry no topic; they would only add noise to scores and confidence
+STOPWORDS = frozenset([
+    'है', 'हैं', 'था', 'थी', 'के', 'का', 'की', 'को', 'में', 'से', 'पर', 'और', 'या', 'तो', 'भी',
+    'क्या', 'कब', 'कैसे', 'कौन', 'सा', 'सी', 'मैं', 'मेरे', 'मेरी', 'मेरा', 'मुझे', 'हम', 'हमारे',
+    'करें', 'करूं', 'करना', 'चाहिए', 'चाहता', 'हूं', 'हूँ', 'रहा', 'रही', 'रहे', 'गई', 'गए', 'लिए', 'बताओ',
+    'आहे', 'आहेत', 'आणि', 'मी', 'माझी', 'माझा', 'माझे', 'माझ्या', 'मला', 'काय', 'कसे', 'कशी', 'केव्हा',
+    'कधी', 'कोणता', 'कोणती', 'कोणते', 'पाहिजे', 'करू', 'सांगा', 'ला', 'चा', 'ची', 'चे',
+    'the', 'a', 'an', 'is', 'are', 'was', 'to', 'of', 'in', 'on', 'for', 'and', 'or', 'my', 'i', 'me',
+    'what', 'when', 'how', 'which', 'should', 'do', 'does', 'can', 'be', 'it', 'this', 'that', 'with',
+    'about', 'tell', 'want', 'much', 'many', 'has', 'have', 'there', 'please'
+])
+
+# Inflections that keep the same word from matching: 'भातासाठी' and 'भात', 'tomatoes' and 'tomato'
+SUFFIXES = sorted([
+    'साठी', 'मध्ये', 'ांच्या', 'ाच्या', 'च्या', 'ांना', 'ांची', 'ांचे', 'ांचा', 'ाची', 'ाचा', 'ाचे',
+    'ाला', 'ाने', 'ातील', 'तील', 'ावर', 'वर', 'ची', 'चा', 'चे', 'ला', 'ना', 'ात',
+    'ियों', 'ियां', 'ाओं', 'ों', 'ें'
+], key=len, reverse=True)
+
+Passage = namedtuple('Passage', ['text', 'language', 'topic', 'title', 'answer', 'score', 'coverage', 'confidence'])
+
+
+def stem(token):
+    if token.isascii():
+        if len(token) > 4 and token.endswith('oes'):
+            return token[:-2]
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            return token[:-1]
+        return token
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """Index terms of a passage or question"""
+    text = unicodedata.normalize('NFC', text).lower()
+    return [stem(token) for token in TOKEN.findall(text) if token not in STOPWORDS]
+
+
+def split_passages(text, max_chars=400):
+    """Split a document into passages of whole sentences, each at most max_chars where possible"""
+    sentences = [s.strip() for s in re.split(r'(?<=[।.?!])\s+', text) if s.strip()]
+    passages, current = [], ''
+    for sentence in sentences:
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        passages.append(current)
+    return passages
+
+
+def load_documents(directory):
+    """Curated documents from every JSONL file in directory; the file name is the topic"""
+    documents = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.jsonl'))):
+        topic = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    documents.append(dict(json.loads(line), topic=topic))
+    return documents
+
+
+def build_index(documents, directory, k1=1.2, b=0.75, max_chars=400):
+    """Write a BM25 index of the documents to directory and return its manifest.
+
+    Postings are stored term by term with the BM25 weight of every
+    (term, passage) pair precomputed, so a query only sums a few slices.
+    The arrays are written first under a new build id and the manifest is
+    replaced last, so workers never see a half-written index.
+    """
+    passages = []
+    for number, document in enumerate(documents):
+        # Sample questions are searchable but never shown to the model
+        extra = ' '.join([document.get('title', '')] + document.get('questions', []))
+        for text in split_passages(document['text'], max_chars):
+            passages.append((number, text, tokenize(f"{extra} {text}")))
+
+    vocabulary = {}
+    postings = {}
+    for position, (_, _, terms) in enumerate(passages):
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            postings.setdefault(vocabulary.setdefault(term, len(vocabulary)), []).append((position, count))
+
+    lengths = np.array([len(terms) for _, _, terms in passages], dtype=np.float32)
+    average = float(lengths.mean()) if len(passages) else 0.0
+    pointers = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    docs, weights = [], []
+    idf = np.zeros(len(vocabulary), dtype=np.float32)
+    for term in range(len(vocabulary)):
+        entries = postings[term]
+        idf[term] = math.log(1 + (len(passages) - len(entries) + 0.5) / (len(entries) + 0.5))
+        for position, count in entries:
+            norm = count + k1 * (1 - b + b * lengths[position] / average)
+            docs.append(position)
+            weights.append(idf[term] * count * (k1 + 1) / norm)
+        pointers[term + 1] = len(docs)
+
+    encoded = [text.encode('utf-8') for _, text, _ in passages]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(text) for text in encoded])
+
+    build = f"{int(time.time())}-{os.getpid()}"
+    arrays = {
+        'pointers': pointers,
+        'docs': np.array(docs, dtype=np.int32),
+        'weights': np.array(weights, dtype=np.float32),
+        'idf': idf,
+        'passage_document': np.array([number for number, _, _ in passages], dtype=np.int32),
+        'text_offsets': offsets,
+        'text': np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    }
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{build}.{name}.npy"), array)
+
+    manifest = {
+        'build': build,
+        'k1': k1,
+        'b': b,
+        'passages': len(passages),
+        'vocabulary': vocabulary,
+        'documents': [
+            {key: document.get(key) for key in ('id', 'language', 'topic', 'title', 'answer', 'questions')}
+            for document in documents
+        ]
+    }
+    path = os.path.join(directory, KnowledgeIndex.MANIFEST)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+    # Workers that mapped an older build keep reading it until they restart
+    for stale in glob.glob(os.path.join(directory, '*.npy')):
+        if not os.path.basename(stale).startswith(f"{build}."):
+            os.remove(stale)
+    return manifest
+
+
+class KnowledgeIndex:
+    """Read-only BM25 index of the curated farming documents, written by build_knowledge.py.
+
+    The arrays are memory-mapped, so every gunicorn worker on a machine
+    shares one copy in the page cache. Without a built index every search
+    comes back empty and answers come from Gemini alone.
+    """
+
+    MANIFEST = 'index.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.vocabulary = {}
+        self.documents = []
+        self.arrays = {}
+        self.load()
+
+    def load(self):
+        path = os.path.join(self.directory, self.MANIFEST)
+        if not os.path.exists(path):
+            logging.info(f"No knowledge index in {self.directory}, answering from Gemini only")
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            self.arrays = {
+                name: np.load(os.path.join(self.directory, f"{manifest['build']}.{name}.npy"), mmap_mode='r')
+                for name in ('pointers', 'docs', 'weights', 'idf', 'passage_document', 'text_offsets', 'text')
+            }
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Could not load knowledge index {path}: {str(e)}")
+            self.arrays = {}
+            return
+        self.vocabulary = manifest['vocabulary']
+        self.documents = manifest['documents']
+        # The maximum idf stands in for words the index has never seen
+        self._unknown_idf = float(np.max(self.arrays['idf'])) if len(self.vocabulary) else 0.0
+        self._questions = [
+            [self._terms(question) for question in document.get('questions') or []]
+            for document in self.documents
+        ]
+        logging.info(f"Loaded knowledge index {manifest['build']}: {manifest['passages']} passages, "
+                     f"{len(self.vocabulary)} terms")
+
+    @property
+    def ready(self):
+        return bool(self.arrays)
+
+    def _text(self, position):
+        start, end = self.arrays['text_offsets'][position:position + 2]
+        return self.arrays['text'][start:end].tobytes().decode('utf-8')
+
+    def _terms(self, text):
+        """Weight of every distinct term of text, unknown words at the maximum idf"""
+        weights = {}
+        for term in tokenize(text):
+            known = self.vocabulary.get(term)
+            weights[term] = float(self.arrays['idf'][known]) if known is not None else self._unknown_idf
+        return weights
+
+    def _question_match(self, terms, document):
+        """idf-weighted Dice overlap between the question and the closest curated question of document"""
+        best = 0.0
+        for question in self._questions[document]:
+            shared = sum(weight for term, weight in terms.items() if term in question)
+            total = sum(terms.values()) + sum(question.values())
+            if total:
+                best = max(best, 2 * shared / total)
+        return best
+
+    def _matched_idf(self, terms, position):
+        pointers, docs, idf = self.arrays['pointers'], self.arrays['docs'], self.arrays['idf']
+        matched = 0.0
+        for term in terms:
+            start, end = pointers[term], pointers[term + 1]
+            # Postings of a term are in passage order
+            found = start + np.searchsorted(docs[start:end], position)
+            if found < end and docs[found] == position:
+                matched += float(idf[term])
+        return matched
+
+    def search(self, query, k=3, min_coverage=0.0):
+        """Top k passages for a question, best first.
+
+        Coverage is the share of the question's idf weight that a passage
+        matches, for deciding what grounds the prompt. Confidence is how
+        closely the question matches one of the curated questions of the
+        passage's document, for deciding whether its answer can be spoken
+        as is. Words the index does not know count against both.
+        """
+        if not self.ready:
+            return []
+        terms = self._terms(query)
+        known = [self.vocabulary[term] for term in terms if term in self.vocabulary]
+        if not known:
+            return []
+
+        pointers, docs, weights = self.arrays['pointers'], self.arrays['docs'], self.arrays['weights']
+        scores = np.zeros(len(self.arrays['passage_document']), dtype=np.float32)
+        for term in known:
+            start, end = pointers[term], pointers[term + 1]
+            scores[docs[start:end]] += weights[start:end]
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        total = sum(terms.values())
+
+        passages = []
+        for position in top:
+            if scores[position] <= 0:
+                break
+            coverage = self._matched_idf(known, position) / total
+            if coverage < min_coverage:
+                continue
+            number = int(self.arrays['passage_document'][position])
+            document = self.documents[number]
+            passages.append(Passage(
+                self._text(position),
+                document['language'],
+                document['topic'],
+                document['title'],
+                document.get('answer'),
+                float(scores[position]),
+                coverage,
+                self._question_match(terms, number)
+            ))
+        return passages
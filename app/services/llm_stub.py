@@ -0,0 +1,60 @@
+import math
+import random
+import threading
+import time
+import zlib
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubModel:
+    """Stands in for genai.GenerativeModel in load tests: sleeps instead of calling Gemini.
+
+    Latencies come from a seeded generator, so a run with the same seed and
+    request order sees the same delays. Each answer is picked from the prompt,
+    so the same question always gets the same answer.
+    """
+
+    ANSWERS = [
+        "अच्छा, मैं इसमें मदद करूंगी। पहले ये बताओ कितनी जमीन है?",
+        "इस मौसम में गेहूं की बुवाई अच्छी रहेगी। बताओ पानी का क्या इंतजाम है?",
+        "ड्रिप सिंचाई से पानी की बचत होगी। पिछली बार कौन सी फसल लगाई थी?",
+        "गाय को हरा चारा और साफ पानी दो। दूध कितना देती है अभी?",
+    ]
+
+    def __init__(self, latency=1.0, distribution='fixed', jitter=0.5, seed=0):
+        self.latency = latency
+        self.distribution = distribution
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self):
+        """One delay: fixed, uniform within +-jitter of latency, or lognormal with median latency"""
+        if self.distribution == 'fixed':
+            return self.latency
+        with self._lock:
+            if self.distribution == 'uniform':
+                return self._random.uniform(self.latency * (1 - self.jitter), self.latency * (1 + self.jitter))
+            if self.distribution == 'lognormal':
+                return self.latency * math.exp(self._random.gauss(0, self.jitter))
+        raise ValueError(f"Unknown stub latency distribution: {self.distribution}")
+
+    def answer(self, contents):
+        # Keyed on the latest message, whether given a prompt string or turns ending with it
+        prompt = contents if isinstance(contents, str) else contents[-1]['parts'][-1]
+        return self.ANSWERS[zlib.crc32(prompt.encode('utf-8')) % len(self.ANSWERS)]
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        if stream:
+            return self._stream(contents)
+        time.sleep(self.sample_latency())
+        return StubResponse(self.answer(contents))
+
+    def _stream(self, contents):
+        sentences = self.answer(contents).split('।')
+        latency = self.sample_latency()
+        for i, sentence in enumerate(sentences):
+            time.sleep(latency / len(sentences))
+            yield StubResponse(sentence + ('।' if i < len(sentences) - 1 else ''))
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import re
+import threading
+import time
+
+from app.utils.metrics import FALLBACKS
+
+# Danda, ? and ! always end a sentence; a full stop only when followed by whitespace (not "2.5")
+SENTENCE = re.compile(r'.*?(?:[।?!]|\.(?=\s))', re.S)
+
+FALLBACK_SENTENCE = "मैं समझ नहीं पाई। फिर से बताओ क्या पूछना है?"
+
+def split_sentences(buffer):
+    """Split complete sentences off the front of a buffer, returning them and the remainder"""
+    sentences = []
+    end = 0
+    for match in SENTENCE.finditer(buffer):
+        sentence = match.group().strip()
+        if sentence:
+            sentences.append(sentence)
+        end = match.end()
+    return sentences, buffer[end:]
+
+class ResponseStreamer:
+    """Generates answers in the background and buffers finished sentences in the session store.
+
+    The buffer lives in the shared store, so the continuation webhook can be
+    served by any worker, not just the one running the generation.
+    """
+
+    def __init__(self, store, max_workers=8, poll_interval=0.1):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stream')
+
+    def _keys(self, call_sid, turn_id):
+        return f'stream_{call_sid}_{turn_id}', f'stream_done_{call_sid}_{turn_id}'
+
+    def _buffer(self, call_sid, turn_id, chunks, on_complete=None, first_sentence=None):
+        """Consume a chunk generator into the store, then hand the whole answer to on_complete"""
+        sentences_key, done_key = self._keys(call_sid, turn_id)
+        buffer = ""
+        text = ""
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                text += chunk
+                sentences, buffer = split_sentences(buffer)
+                for sentence in sentences:
+                    self.store.append(sentences_key, sentence)
+                    if first_sentence:
+                        first_sentence.set()
+            if buffer.strip():
+                self.store.append(sentences_key, buffer.strip())
+        except Exception as e:
+            logging.error(f"Streaming error for {call_sid}: {str(e)}")
+            if not text:
+                FALLBACKS.labels('stream_error').inc()
+                text = FALLBACK_SENTENCE
+                self.store.append(sentences_key, FALLBACK_SENTENCE)
+        finally:
+            self.store.set(done_key, True)
+            if first_sentence:
+                first_sentence.set()
+        if on_complete:
+            try:
+                on_complete(text)
+            except Exception as e:
+                logging.error(f"Stream completion error for {call_sid}: {str(e)}")
+
+    def start(self, call_sid, turn_id, chunks, on_complete=None, first_sentence_timeout=8):
+        """Start consuming a chunk generator and wait until its first sentence is buffered"""
+        first_sentence = threading.Event()
+        self.executor.submit(self._buffer, call_sid, turn_id, chunks, on_complete, first_sentence)
+        first_sentence.wait(first_sentence_timeout)
+
+    def attach(self, call_sid, turn_id, future, on_complete=None):
+        """Buffer the answer of a call that is still running once its future resolves.
+
+        The future's own thread buffers it on completion, so no stream pool
+        thread sits waiting on a slow answer.
+        """
+        def chunks(done):
+            yield done.result()
+
+        future.add_done_callback(lambda done: self._buffer(call_sid, turn_id, chunks(done), on_complete))
+
+    def read(self, call_sid, turn_id, position=0, wait=0):
+        """Return sentences buffered after position and whether generation has finished"""
+        sentences_key, done_key = self._keys(call_sid, turn_id)
+        deadline = time.time() + wait
+        while True:
+            # Read the done flag first so a stream reported done always comes with its last sentences
+            done = bool(self.store.get(done_key))
+            sentences = self.store.get_list(sentences_key)[position:]
+            if sentences or done or time.time() >= deadline:
+                return sentences, done
+            time.sleep(self.poll_interval)
@@ -0,0 +1,190 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import re
+
+from app.utils.history import last_turn, load_history
+from app.utils.intents import tokenize
+from app.utils.metrics import SPECULATION_LOOKUPS, SPECULATION_TOKENS, SPECULATIONS
+
+# A reply worth answering ahead of time: the utterance the answer is generated
+# for, and the ways of saying it that the answer also fits
+FollowUp = namedtuple('FollowUp', ['utterance', 'aliases'])
+
+# Replies to a yes/no question, the most predictable turn of a call
+YES_NO = {
+    'hi-IN': [
+        FollowUp('हां', ['हां', 'हाँ', 'हां है', 'हाँ है', 'जी हां', 'हां जी', 'हां हां']),
+        FollowUp('नहीं', ['नहीं', 'नहीं है', 'जी नहीं', 'ना', 'नहीं जी'])
+    ],
+    'mr-IN': [
+        FollowUp('हो', ['हो', 'हो आहे', 'होय']),
+        FollowUp('नाही', ['नाही', 'नाही आहे', 'नाय'])
+    ],
+    'en-IN': [
+        FollowUp('yes', ['yes', 'yes it is', 'yeah', 'yes there is']),
+        FollowUp('no', ['no', 'no it is not', 'not really', 'no there is not'])
+    ]
+}
+
+# Question words; a question with one of these needs a reply the rules cannot guess.
+# 'क्या' only asks "what" after the first word ("पानी का क्या इंतजाम है?")
+QUESTION_WORDS = frozenset([
+    'कितना', 'कितनी', 'कितने', 'कौन', 'कौनसा', 'कौनसी', 'कब', 'कैसे', 'कैसा', 'कैसी', 'क्यों', 'कहां', 'कहाँ', 'किस', 'किसे',
+    'किती', 'कोणता', 'कोणती', 'कोणते', 'कधी', 'कसे', 'कशी', 'कसा', 'काय', 'कुठे',
+    'what', 'how', 'which', 'when', 'where', 'why', 'who'
+])
+# Words that flip a reply: "कुआं नहीं है" must never be served the answer to "कुआं है"
+NEGATIONS = frozenset(['नहीं', 'ना', 'नाही', 'नाय', 'no', 'not'])
+LIST_MARKER = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s*')
+
+
+def last_question(answer):
+    """The question an answer ends with, or None if it does not end in one"""
+    answer = answer.strip()
+    if not answer.endswith('?'):
+        return None
+    return re.split(r'[।.!?]\s*', answer[:-1])[-1].strip() + '?'
+
+
+def is_yes_no(question):
+    tokens = tokenize(question)
+    if tokens and tokens[0] == 'क्या':
+        tokens = tokens[1:]
+    return bool(tokens) and not any(token in QUESTION_WORDS for token in tokens)
+
+
+def predict_by_rules(service, answer, language, limit):
+    """Yes and no for a yes/no question; nothing for any other"""
+    question = last_question(answer)
+    if not question or not is_yes_no(question):
+        return [], 0
+    return YES_NO.get(language, YES_NO['hi-IN'])[:limit], 0
+
+
+def predict_by_model(service, answer, language, limit):
+    """Ask the model for the caller's likeliest replies, falling back to the rules for yes/no questions"""
+    question = last_question(answer)
+    if not question:
+        return [], 0
+    if is_yes_no(question):
+        return predict_by_rules(service, answer, language, limit)
+    replies, tokens = service.predict_replies(question, language, limit)
+    followups = []
+    for reply in replies:
+        reply = LIST_MARKER.sub('', reply).strip().strip('"')
+        if reply:
+            followups.append(FollowUp(reply, [reply]))
+    return followups[:limit], tokens
+
+
+PREDICTORS = {'rules': predict_by_rules, 'model': predict_by_model}
+
+
+def similarity(spoken, expected):
+    """Share of words in common, zero when only one side is negated"""
+    if bool(NEGATIONS.intersection(spoken)) != bool(NEGATIONS.intersection(expected)):
+        return 0.0
+    union = set(spoken) | set(expected)
+    return len(set(spoken) & set(expected)) / len(union) if union else 0.0
+
+
+class Speculator:
+    """Answers the caller's likely next utterances while the current answer plays.
+
+    After an answer that ends in a question, up to max_followups replies are
+    predicted and their answers generated in the background, from the same
+    session and prompt a real turn would use. They are kept in the shared
+    store under the call and turn, so whichever worker takes the next
+    webhook can serve a match straight away. Speculation only runs while
+    Gemini has headroom (less than max_load of its concurrency limit in use)
+    and within the 'speculation' rate limit bucket, and every estimated
+    token it spends is counted as used or wasted.
+    """
+
+    def __init__(self, store, service, limiter, predictor='rules', max_followups=2, max_load=0.5,
+                 match_threshold=0.6, ttl=120, workers=2):
+        self.store = store
+        self.service = service
+        self.limiter = limiter
+        self.predict = PREDICTORS[predictor]
+        self.max_followups = max_followups
+        self.max_load = max_load
+        self.match_threshold = match_threshold
+        self.ttl = ttl
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='speculation')
+
+    def key(self, call_sid, turn):
+        return f'speculation_{call_sid}_{turn}'
+
+    def _has_headroom(self):
+        limit = self.service.limit
+        return self.service.admissible() and limit.in_flight < limit.limit * self.max_load
+
+    def after_turn(self, call_sid, answer, language, turn):
+        """Start speculating on the replies to an answer just given; never blocks the turn"""
+        if not answer.rstrip().endswith('?'):
+            return
+        if not self._has_headroom():
+            SPECULATIONS.labels('skipped_load').inc()
+            return
+        self.executor.submit(self._speculate, call_sid, answer, language, turn)
+
+    def _speculate(self, call_sid, answer, language, turn):
+        try:
+            followups, tokens = self.predict(self.service, answer, language, self.max_followups)
+            if tokens:
+                SPECULATION_TOKENS.labels('prediction').inc(tokens)
+            for followup in followups:
+                if self.limiter.check(('speculation', 'all')):
+                    SPECULATIONS.labels('skipped_budget').inc()
+                    continue
+                self.executor.submit(self._generate, call_sid, language, turn, followup)
+        except Exception as e:
+            logging.warning(f"Speculation failed for {call_sid}: {str(e)}")
+            SPECULATIONS.labels('failed').inc()
+
+    def _generate(self, call_sid, language, turn, followup):
+        try:
+            history = load_history(self.store, call_sid)
+            if last_turn(history) != turn or not self._has_headroom():
+                # The caller already moved on, or real turns need the capacity
+                SPECULATIONS.labels('skipped_load' if last_turn(history) == turn else 'stale').inc()
+                return
+            answer, tokens = self.service.speculate(followup.utterance, history, language, call_sid)
+            self.store.append(self.key(call_sid, turn), [followup.aliases, answer, tokens], ttl=self.ttl)
+            SPECULATIONS.labels('generated').inc()
+            if last_turn(load_history(self.store, call_sid)) != turn:
+                # Finished after the caller's reply was already answered
+                self.discard(call_sid, turn)
+        except Exception as e:
+            logging.warning(f"Speculative answer failed for {call_sid}: {str(e)}")
+            SPECULATIONS.labels('failed').inc()
+
+    def match(self, call_sid, utterance, turn):
+        """The answer generated ahead for this utterance, or None; the call's other guesses are discarded"""
+        key = self.key(call_sid, turn)
+        entries = self.store.get_list(key)
+        if not entries:
+            return None
+        self.store.delete(key)
+        spoken = tokenize(utterance)
+        best, best_score = None, 0.0
+        for index, (aliases, answer, tokens) in enumerate(entries):
+            score = max(similarity(spoken, tokenize(alias)) for alias in aliases)
+            if score > best_score:
+                best, best_score = index, score
+        if best_score < self.match_threshold:
+            best = None
+        for index, (aliases, answer, tokens) in enumerate(entries):
+            SPECULATION_TOKENS.labels('used' if index == best else 'wasted').inc(tokens)
+        SPECULATION_LOOKUPS.labels('hit' if best is not None else 'miss').inc()
+        return entries[best][1] if best is not None else None
+
+    def discard(self, call_sid, turn):
+        """Count the guesses left when a call ends as wasted"""
+        key = self.key(call_sid, turn)
+        entries = self.store.get_list(key)
+        if entries:
+            self.store.delete(key)
+            SPECULATION_TOKENS.labels('wasted').inc(sum(tokens for _, _, tokens in entries))
@@ -0,0 +1,137 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from app.utils.metrics import SINK_DROPPED
+
+class TranscriptSink:
+    """Call events queued in memory and written to gzip JSONL segments by a background thread.
+
+    Each process writes its own segments (transcripts-<pid>-<start>.jsonl.gz),
+    so gunicorn workers never share a file. A segment is named *.open while
+    it is being written and is flushed after every batch, so readers can
+    follow it before it is rotated.
+    """
+
+    def __init__(self, directory, max_queue=10000, policy='drop', block_timeout=0.05,
+                 segment_bytes=8 * 1024 * 1024, segment_seconds=300, flush_interval=1.0, batch_size=500):
+        self.directory = directory
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._pid = None
+        self._lock = threading.Lock()
+        self._segment = None
+
+    def _ensure_started(self):
+        # Started lazily so a sink created before gunicorn forks gets a flusher in every worker
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+                self._segment = None
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='transcript-sink', daemon=True).start()
+
+    def emit(self, event, call_sid, **fields):
+        """Queue one event; returns False if it was dropped because the queue is full"""
+        self._ensure_started()
+        record = {'ts': time.time(), 'event': event, 'call_sid': call_sid, **fields}
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            SINK_DROPPED.inc()
+            return False
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logging.error(f"Transcript sink write error: {str(e)}")
+
+    def _write(self, batch):
+        with self._lock:
+            segment = self._segment
+            if segment and (segment['bytes'] >= self.segment_bytes
+                            or time.time() - segment['opened'] >= self.segment_seconds):
+                self._rotate()
+                segment = None
+            if not batch:
+                return
+            if segment is None:
+                segment = self._segment = self._open()
+            data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch).encode('utf-8')
+            segment['file'].write(data)
+            segment['file'].flush()
+            segment['bytes'] += len(data)
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        opened = time.time()
+        path = os.path.join(self.directory, f"transcripts-{os.getpid()}-{int(opened * 1000)}.jsonl.gz")
+        return {'path': path, 'file': gzip.open(path + '.open', 'wb'), 'opened': opened, 'bytes': 0}
+
+    def _rotate(self):
+        segment, self._segment = self._segment, None
+        if segment:
+            segment['file'].close()
+            os.replace(segment['path'] + '.open', segment['path'])
+
+    def close(self):
+        """Write whatever is queued and close the current segment"""
+        if self._pid != os.getpid():
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(batch)
+        with self._lock:
+            self._rotate()
+
+def read_events(directory):
+    """Every event in the sink's segments, oldest segment first, including ones still open"""
+    paths = glob.glob(os.path.join(directory, 'transcripts-*.jsonl.gz*'))
+    for path in sorted(paths, key=lambda path: int(os.path.basename(path).split('-')[2].split('.')[0])):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+        except (EOFError, OSError):
+            # An open segment ends mid-stream; everything up to the last flush was read
+            continue
+
+def load_transcript(directory, call_sid):
+    """The conversation of one call, assembled from every worker's segments"""
+    events = [event for event in read_events(directory) if event['call_sid'] == call_sid]
+    events.sort(key=lambda event: event['ts'])
+    return events
@@ -2,25 +2,43 @@ from twilio.twiml.voice_response import VoiceResponse, Gather
 from twilio.rest import Client
 from config import Config
 import logging
+import time
 
 class TwilioService:
-    def __init__(self):
+    def __init__(self, audio=None):
+        self.audio = audio
         self.client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+        if Config.TWILIO_API_BASE_URL:
+            # Point the REST client at a local fake Twilio for testing
+            self.client.api.base_url = Config.TWILIO_API_BASE_URL
         self.phone_number = Config.TWILIO_PHONE_NUMBER
         self.language_prompts = {
             'hi-IN': {
                 'welcome': 'नमस्ते, मैं दीक्षा हूं, आपकी कृषि सहायक। मैं आपकी कैसे मदद कर सकती हूं?',
-                'initial_prompt': 'नमस्ते, मैं दीक्षा हूं, आपकी कृषि सहायक।'
+                'initial_prompt': 'नमस्ते, मैं दीक्षा हूं, आपकी कृषि सहायक।',
+                'goodbye': 'कॉल करने के लिए धन्यवाद। आपकी फसल अच्छी हो। नमस्ते।'
             },
             'mr-IN': {
                 'welcome': 'नमस्कार, मी दीक्षा आहे, तुमची कृषी सहाय्यक. मी तुमची कशी मदत करू शकते?',
-                'initial_prompt': 'नमस्कार, मी दीक्षा आहे, तुमची कृषी सहाय्यक.'
+                'initial_prompt': 'नमस्कार, मी दीक्षा आहे, तुमची कृषी सहाय्यक.',
+                'goodbye': 'कॉल केल्याबद्दल धन्यवाद. तुमचे पीक चांगले येवो. नमस्कार.'
             },
             'en-IN': {
                 'welcome': 'Hello, I am Diksha, your agriculture assistant. How may I help you today?',
-                'initial_prompt': 'Hello, I am Diksha, your agriculture assistant.'
+                'initial_prompt': 'Hello, I am Diksha, your agriculture assistant.',
+                'goodbye': 'Thank you for calling. Wishing you a good harvest. Goodbye.'
             }
         }
+        # These responses never change, so build them once instead of on every call
+        self._language_selection_response = self._build_language_selection_response()
+        self._initial_responses = {
+            language: self._build_initial_response(language)
+            for language in self.language_prompts
+        }
+        self._goodbye_responses = {
+            language: self._build_goodbye(language)
+            for language in self.language_prompts
+        }
         
     def get_gather_options(self, language='hi-IN'):
         """Get common gather options with enhanced noise suppression"""
@@ -43,13 +61,24 @@ class TwilioService:
             speech_start_threshold=40 
         )
 
+    def say_prompt(self, parent, text, language):
+        """Play the pre-synthesized prompt if there is one, otherwise fall back to <Say>"""
+        audio_url = self.audio.url_for(text, language) if self.audio else None
+        if audio_url:
+            parent.play(audio_url)
+        else:
+            parent.say(text, language=language)
+
     def get_language_selection_response(self):
         """Initial response to detect language"""
+        return self._language_selection_response
+    
+    def _build_language_selection_response(self):
         response = VoiceResponse()
         gather = self.get_gather_options('en-IN')
         
         for language in ['hi-IN', 'mr-IN', 'en-IN']:
-            gather.say(self.language_prompts[language]['initial_prompt'], language=language)
+            self.say_prompt(gather, self.language_prompts[language]['initial_prompt'], language)
             gather.pause(length=1)
         
         response.append(gather)
@@ -58,9 +87,12 @@ class TwilioService:
     
     def get_initial_response(self, language='hi-IN'):
         """Get initial response in selected language"""
+        return self._initial_responses[language]
+    
+    def _build_initial_response(self, language):
         response = VoiceResponse()
         gather = self.get_gather_options(language)
-        gather.say(self.language_prompts[language]['welcome'], language=language)
+        self.say_prompt(gather, self.language_prompts[language]['welcome'], language)
         response.append(gather)
         return str(response)
     
@@ -88,15 +120,35 @@ class TwilioService:
             
         return str(response)
 
+    def warm_up(self):
+        """Open the pooled connection to the Twilio REST API before the first outbound call"""
+        if not Config.TWILIO_ACCOUNT_SID:
+            return
+        started = time.monotonic()
+        try:
+            self.client.api.accounts(Config.TWILIO_ACCOUNT_SID).fetch()
+            logging.info(f"Twilio connection warmed in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            # Even a refused fetch leaves the connection open in the client's pool
+            logging.warning(f"Twilio warm-up failed: {str(e)}")
+
     def say_goodbye(self, language='hi-IN'):
         """Say goodbye in the selected language"""
+        return self._goodbye_responses.get(language) or self._goodbye_responses['hi-IN']
+    
+    def _build_goodbye(self, language):
         response = VoiceResponse()
-        response.say(self.language_prompts[language]['goodbye'], language=language)
+        self.say_prompt(response, self.language_prompts[language]['goodbye'], language)
         response.hangup()
         return str(response)
 
     def initiate_call(self, to_number):
         """Initiate call with better timeout settings"""
+        if not Config.WEBHOOK_BASE_URL:
+            return {
+                'status': 'error',
+                'message': 'BASE_URL must be set for Twilio to reach the call webhooks'
+            }
         try:
             call = self.client.calls.create(
                 to=to_number,
@@ -0,0 +1,324 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import threading
+import time
+import unicodedata
+
+import requests
+
+from app.utils.geo import geohash
+from app.utils.language import TOKEN
+from app.utils.metrics import WEATHER_LOOKUPS, WEATHER_REFRESHES
+
+# District headquarters our callers come from, with the names they say them by
+DISTRICTS = {
+    'pune': (18.52, 73.86, ['pune', 'पुणे']),
+    'mumbai': (19.08, 72.88, ['mumbai', 'मुंबई']),
+    'nashik': (20.00, 73.79, ['nashik', 'नासिक', 'नाशिक']),
+    'nagpur': (21.15, 79.09, ['nagpur', 'नागपुर', 'नागपूर']),
+    'aurangabad': (19.88, 75.34, ['aurangabad', 'sambhajinagar', 'औरंगाबाद', 'संभाजीनगर']),
+    'solapur': (17.66, 75.91, ['solapur', 'सोलापुर', 'सोलापूर']),
+    'kolhapur': (16.70, 74.24, ['kolhapur', 'कोल्हापुर', 'कोल्हापूर']),
+    'ahmednagar': (19.09, 74.74, ['ahmednagar', 'अहमदनगर', 'अहिल्यानगर']),
+    'jalgaon': (21.00, 75.56, ['jalgaon', 'जलगांव', 'जळगाव']),
+    'latur': (18.40, 76.56, ['latur', 'लातूर']),
+    'amravati': (20.93, 77.75, ['amravati', 'अमरावती']),
+    'satara': (17.68, 74.00, ['satara', 'सतारा', 'सातारा']),
+    'indore': (22.72, 75.86, ['indore', 'इंदौर', 'इंदूर']),
+    'bhopal': (23.26, 77.41, ['bhopal', 'भोपाल', 'भोपाळ']),
+    'raipur': (21.25, 81.63, ['raipur', 'रायपुर', 'रायपूर']),
+    'jaipur': (26.91, 75.79, ['jaipur', 'जयपुर', 'जयपूर']),
+    'ahmedabad': (23.02, 72.57, ['ahmedabad', 'अहमदाबाद']),
+    'delhi': (28.61, 77.21, ['delhi', 'दिल्ली']),
+    'karnal': (29.69, 76.99, ['karnal', 'करनाल']),
+    'ludhiana': (30.90, 75.86, ['ludhiana', 'लुधियाना']),
+    'agra': (27.18, 78.01, ['agra', 'आगरा']),
+    'lucknow': (26.85, 80.95, ['lucknow', 'लखनऊ']),
+    'kanpur': (26.45, 80.33, ['kanpur', 'कानपुर']),
+    'varanasi': (25.32, 82.97, ['varanasi', 'वाराणसी', 'बनारस']),
+    'patna': (25.59, 85.14, ['patna', 'पटना']),
+}
+
+DISTRICT_NAMES = {name: district for district, (_, _, names) in DISTRICTS.items() for name in names}
+
+# Devanagari weather words are matched inside tokens so inflected forms like
+# 'पावसाचा' count too; English ones at the start of a word ('raining', not 'train')
+WEATHER_STEMS = (
+    'बारिश', 'बरसात', 'वर्षा', 'बादल', 'तापमान', 'आंधी', 'तूफान', 'ओले', 'पाला',
+    'हवामान', 'पाऊस', 'पावस', 'ढग', 'गारपीट', 'वादळ', 'थंडी'
+)
+WEATHER_WORDS = ('weather', 'rain', 'forecast', 'temperature', 'storm', 'monsoon', 'hail')
+# 'मौसम' is also the season ("इस मौसम में कौन सी फसल"), so it only counts
+# next to a word that asks about the weather: 'मौसम कैसा', 'आज का मौसम'
+SEASON_WORD = 'मौसम'
+SEASON_WORD_CUES = frozenset([
+    'कैसा', 'कैसी', 'कैसे', 'रहेगा', 'रहेगी', 'खराब', 'साफ', 'बदलेगा', 'बदल', 'हाल',
+    'आज', 'कल', 'परसों', 'जानकारी', 'पूर्वानुमान'
+])
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def is_weather_question(text):
+    """Whether an utterance asks about rain, temperature or the forecast"""
+    tokens = TOKEN.findall(unicodedata.normalize('NFC', text).lower())
+    for index, token in enumerate(tokens):
+        if token.isascii():
+            if token.startswith(WEATHER_WORDS):
+                return True
+        elif any(stem in token for stem in WEATHER_STEMS):
+            return True
+        elif token.startswith(SEASON_WORD) and SEASON_WORD_CUES.intersection(tokens[max(0, index - 2):index + 3]):
+            return True
+    return False
+
+
+def find_district(text):
+    """District named in an utterance or a Twilio city/state field, if any"""
+    for token in TOKEN.findall(unicodedata.normalize('NFC', text or '').lower()):
+        district = DISTRICT_NAMES.get(token)
+        if district:
+            return district
+        if token.isascii():
+            continue
+        # Inflected forms like 'नाशिकमध्ये' or 'पुण्यात' start with the name less its last sign
+        for name, district in DISTRICT_NAMES.items():
+            if not name.isascii() and len(name) >= 4 and token.startswith(name[:-1]):
+                return district
+    return None
+
+
+class WeatherProvider:
+    """Upstream forecast API; returns days of {date, rain_mm, rain_chance, temp_min, temp_max}"""
+
+    def __init__(self, base_url, api_key=None, timeout=5):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def forecast(self, latitude, longitude):
+        raise NotImplementedError
+
+    def _get(self, path, params):
+        response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """Open-Meteo daily forecast; needs no API key"""
+
+    DEFAULT_URL = 'https://api.open-meteo.com'
+
+    def forecast(self, latitude, longitude):
+        data = self._get('/v1/forecast', {
+            'latitude': latitude,
+            'longitude': longitude,
+            'daily': 'precipitation_sum,precipitation_probability_max,temperature_2m_min,temperature_2m_max',
+            'timezone': 'Asia/Kolkata',
+            'forecast_days': 5
+        })['daily']
+        return [
+            {
+                'date': date,
+                'rain_mm': data['precipitation_sum'][i] or 0.0,
+                'rain_chance': (data['precipitation_probability_max'][i] or 0) / 100,
+                'temp_min': data['temperature_2m_min'][i],
+                'temp_max': data['temperature_2m_max'][i]
+            }
+            for i, date in enumerate(data['time'])
+        ]
+
+
+class OpenWeatherMapProvider(WeatherProvider):
+    """OpenWeatherMap 5 day / 3 hour forecast folded into days; needs WEATHER_API_KEY"""
+
+    DEFAULT_URL = 'https://api.openweathermap.org'
+
+    def forecast(self, latitude, longitude):
+        data = self._get('/data/2.5/forecast', {
+            'lat': latitude,
+            'lon': longitude,
+            'appid': self.api_key,
+            'units': 'metric'
+        })
+        offset = timedelta(seconds=data.get('city', {}).get('timezone', 19800))
+        days = {}
+        for slot in data['list']:
+            date = (datetime.fromtimestamp(slot['dt'], timezone.utc) + offset).strftime('%Y-%m-%d')
+            day = days.setdefault(date, {
+                'date': date, 'rain_mm': 0.0, 'rain_chance': 0.0,
+                'temp_min': slot['main']['temp_min'], 'temp_max': slot['main']['temp_max']
+            })
+            day['rain_mm'] += slot.get('rain', {}).get('3h', 0.0)
+            day['rain_chance'] = max(day['rain_chance'], slot.get('pop', 0.0))
+            day['temp_min'] = min(day['temp_min'], slot['main']['temp_min'])
+            day['temp_max'] = max(day['temp_max'], slot['main']['temp_max'])
+        return [days[date] for date in sorted(days)]
+
+
+PROVIDERS = {
+    'open-meteo': OpenMeteoProvider,
+    'openweathermap': OpenWeatherMapProvider
+}
+
+
+def create_provider(name, api_key=None, base_url=None):
+    provider = PROVIDERS[name]
+    return provider(base_url or provider.DEFAULT_URL, api_key=api_key)
+
+
+class WeatherService:
+    """Forecasts per geohash cell, cached in the shared session store and kept warm in the background.
+
+    A turn only ever reads the cache. Looking a district up marks its cell
+    as wanted, and a refresher thread in every worker fetches wanted cells
+    that are missing or older than refresh_after. A short claim in the
+    store keeps workers from fetching the same cell at once.
+    """
+
+    def __init__(self, store, provider, ttl=3 * 3600, refresh_after=1800, precision=4,
+                 warm_districts=(), interval=30, wanted_for=6 * 3600, claim_ttl=60, fetchers=4):
+        self.store = store
+        self.provider = provider
+        self.ttl = ttl
+        self.refresh_after = refresh_after
+        self.precision = precision
+        self.interval = interval
+        self.wanted_for = wanted_for
+        self.claim_ttl = claim_ttl
+        self.fetchers = fetchers
+        self._centres = {}
+        for latitude, longitude, _ in DISTRICTS.values():
+            self._centres.setdefault(geohash(latitude, longitude, precision), (latitude, longitude))
+        self.permanent = {self.cell(d) for d in warm_districts if d in DISTRICTS}
+        self._wanted = {}
+        self._pid = None
+        self._closed = False
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def cell(self, district):
+        latitude, longitude, _ = DISTRICTS[district]
+        return geohash(latitude, longitude, self.precision)
+
+    def start(self):
+        """Start warming the configured districts before the first caller asks"""
+        self._ensure_started()
+        self._wake.set()
+
+    def _ensure_started(self):
+        # Started lazily so a service created before gunicorn forks gets a refresher in every worker
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._wake = threading.Event()
+                self._executor = ThreadPoolExecutor(max_workers=self.fetchers, thread_name_prefix='weather')
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='weather-refresh', daemon=True).start()
+
+    def want(self, district):
+        """Keep a district's cell warm for a while; fetched in the background if it is cold"""
+        self._ensure_started()
+        cell = self.cell(district)
+        with self._lock:
+            cold = cell not in self._wanted
+            self._wanted[cell] = time.monotonic()
+        if cold and self.store.get(f'weather_{cell}') is None:
+            self._wake.set()
+        return cell
+
+    def lookup(self, district):
+        """Cached forecast for a district or None; never waits on the upstream API"""
+        entry = self.store.get(f'weather_{self.want(district)}')
+        WEATHER_LOOKUPS.labels('hit' if entry else 'miss').inc()
+        return entry
+
+    def refresh(self, cell):
+        """Fetch one cell unless another worker is already doing it; returns True if it was fetched"""
+        if not self.store.add(f'weather_claim_{cell}', os.getpid(), ttl=self.claim_ttl):
+            return False
+        latitude, longitude = self._centres[cell]
+        try:
+            days = self.provider.forecast(latitude, longitude)
+        except Exception as e:
+            logging.error(f"Weather refresh failed for {cell}: {str(e)}")
+            WEATHER_REFRESHES.labels('error').inc()
+            # Leave the claim in place so a failing API is retried after claim_ttl, not hammered
+            return False
+        self.store.set(f'weather_{cell}', {'fetched_at': time.time(), 'days': days}, ttl=self.ttl)
+        self.store.delete(f'weather_claim_{cell}')
+        WEATHER_REFRESHES.labels('ok').inc()
+        return True
+
+    def due(self):
+        """Wanted cells whose forecast is missing or older than refresh_after, missing ones first"""
+        now = time.monotonic()
+        with self._lock:
+            for cell, wanted_at in list(self._wanted.items()):
+                if now - wanted_at > self.wanted_for and cell not in self.permanent:
+                    del self._wanted[cell]
+            cells = set(self._wanted) | self.permanent
+        missing, stale = [], []
+        for cell in cells:
+            entry = self.store.get(f'weather_{cell}')
+            if entry is None:
+                missing.append(cell)
+            elif time.time() - entry['fetched_at'] > self.refresh_after:
+                stale.append(cell)
+        return missing + stale
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                # A few fetches at once so one slow cell does not hold up the rest
+                list(self._executor.map(self.refresh, self.due()))
+            except Exception as e:
+                logging.error(f"Weather refresher error: {str(e)}")
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+
+    def remember_caller(self, call_sid, values):
+        """Work out the caller's district from Twilio's geo fields and start warming it"""
+        prefix = 'To' if values.get('Direction', 'inbound').startswith('outbound') else 'From'
+        district = find_district(f"{values.get(prefix + 'City', '')} {values.get(prefix + 'State', '')}")
+        if district:
+            self.store.set(f'district_{call_sid}', district)
+            self.want(district)
+        return district
+
+    def note(self, call_sid, text, default_district=None):
+        """Weather facts for the prompt of a weather question"""
+        district = find_district(text)
+        if district:
+            self.store.set(f'district_{call_sid}', district)
+        else:
+            district = self.store.get(f'district_{call_sid}') or default_district
+        if not district:
+            WEATHER_LOOKUPS.labels('no_district').inc()
+            return "The caller's district is not known. Ask which district their farm is in."
+        forecast = self.lookup(district)
+        if not forecast:
+            return (f"The forecast for {district.title()} is being fetched. "
+                    "Ask the caller to ask about the weather again in a minute.")
+        return describe(district, forecast)
+
+
+def describe(district, forecast, days=3):
+    """Forecast as short English facts; the model answers in the caller's language"""
+    updated = datetime.fromtimestamp(forecast['fetched_at'], IST).strftime('%d %b %H:%M')
+    lines = [f"Weather forecast for {district.title()} district (updated {updated} IST):"]
+    for day in forecast['days'][:days]:
+        lines.append(
+            f"- {day['date']}: rain {day['rain_mm']:.0f} mm ({day['rain_chance']:.0%} chance), "
+            f"{day['temp_min']:.0f} to {day['temp_max']:.0f} °C"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,21 @@
+import hmac
+import logging
+
+from flask import jsonify, request
+
+from config import Config
+
+
+def check_admin_key():
+    """None if the request carries ADMIN_API_KEY in X-API-Key, otherwise the error response to return.
+
+    Admin APIs place calls and expose callers' numbers, so they stay closed
+    while no ADMIN_API_KEY is configured.
+    """
+    if not Config.ADMIN_API_KEY:
+        logging.warning(f"Refused {request.path}: ADMIN_API_KEY is not set")
+        return jsonify({'status': 'error', 'message': 'Admin API is disabled'}), 403
+    supplied = request.headers.get('X-API-Key', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), Config.ADMIN_API_KEY.encode('utf-8')):
+        return jsonify({'status': 'error', 'message': 'Invalid or missing API key'}), 401
+    return None
@@ -1,16 +1,93 @@
-from functools import lru_cache
+from collections import OrderedDict
 import hashlib
+import re
+import threading
+import time
+import unicodedata
+
+PUNCTUATION = re.compile(r'[।॥?!.,;:"\'()\-]+')
+WHITESPACE = re.compile(r'\s+')
+
+# Words that point back at something said earlier, so the answer depends on context
+CONTEXT_WORDS = frozenset([
+    'यह', 'वह', 'ये', 'वो', 'इसे', 'उसे', 'इसमें', 'उसमें', 'इसका', 'उसका',
+    'इसके', 'उसके', 'इसकी', 'उसकी', 'फिर', 'वहां', 'वहाँ', 'उतना', 'इतना',
+    'हे', 'ते', 'त्याचे', 'त्यात', 'याचे', 'यात', 'त्याला', 'तिथे',
+    'it', 'its', 'this', 'that', 'these', 'those', 'they', 'them', 'there', 'same'
+])
 
 def generate_cache_key(*args, **kwargs):
     """Generate a unique cache key based on function arguments"""
     key = str(args) + str(sorted(kwargs.items()))
     return hashlib.md5(key.encode()).hexdigest()
 
-def cache_response(timeout=300):
-    """Custom caching decorator for responses"""
-    def decorator(func):
-        @lru_cache(maxsize=100)
-        def wrapper(*args, **kwargs):
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator 
\ No newline at end of file
+def normalize_question(text):
+    """Normalize a spoken question so trivial variations share a cache entry"""
+    text = unicodedata.normalize('NFC', text).lower()
+    text = PUNCTUATION.sub(' ', text)
+    return WHITESPACE.sub(' ', text).strip()
+
+class ResponseCache:
+    """LRU answer cache with TTLs and a memory cap, keyed by normalized question and language"""
+
+    def __init__(self, max_entries=1000, max_bytes=2 * 1024 * 1024, ttl=86400):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def is_standalone(self, question):
+        """Whether a question can be answered without the earlier conversation"""
+        words = normalize_question(question).split()
+        return len(words) >= 3 and not CONTEXT_WORDS.intersection(words)
+
+    def _key(self, question, language):
+        return generate_cache_key(normalize_question(question), language)
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, question, language):
+        key = self._key(question, language)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, question, language, answer, ttl=None):
+        key = self._key(question, language)
+        size = len(key) + len(answer.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (answer, time.time() + (ttl or self.ttl), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,99 @@
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import logging
+import threading
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a turn runs out of budget; pending resolves to the eventual result"""
+
+    def __init__(self, pending):
+        super().__init__("Turn deadline exceeded")
+        self.pending = pending
+
+
+class Deadline:
+    """Time budget for one webhook, measured from when the request arrived"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.started = time.monotonic()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        return max(0.0, self.budget - self.elapsed())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies"""
+
+    def __init__(self, window=200, min_samples=20, default=4.0):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.default = default
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct):
+        """Latency percentile, or the default until enough samples are collected"""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return self.default
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def first_success(futures):
+    """Combine futures into one that takes the first result, failing only if all of them fail"""
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(future):
+        with lock:
+            remaining[0] -= 1
+            if combined.done():
+                return
+            if future.exception() is None:
+                combined.set_result(future.result())
+            elif remaining[0] == 0:
+                combined.set_exception(future.exception())
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+def hedged_call(executor, fn, deadline, hedge_after, max_attempts=2):
+    """Run fn on the executor, starting another attempt if it fails or is slower than hedge_after.
+
+    Returns the first successful result. If the deadline expires first,
+    raises DeadlineExceeded with a future that still resolves to that result.
+    """
+    attempts = [executor.submit(fn)]
+    combined = first_success(attempts)
+
+    while True:
+        last_attempt = len(attempts) >= max_attempts
+        timeout = deadline.remaining() if last_attempt else min(hedge_after, deadline.remaining())
+        try:
+            return combined.result(timeout=timeout)
+        except FutureTimeoutError:
+            if last_attempt or deadline.expired():
+                raise DeadlineExceeded(combined)
+            logging.info(f"Hedging slow call after {hedge_after:.2f}s (attempt {len(attempts) + 1})")
+        except Exception as e:
+            if last_attempt or deadline.expired():
+                raise
+            logging.warning(f"Retrying failed call (attempt {len(attempts) + 1}): {str(e)}")
+        attempts.append(executor.submit(fn))
+        combined = first_success(attempts)
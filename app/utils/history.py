@@ -0,0 +1,50 @@
+import time
+
+
+class Exchange:
+    """One user/assistant exchange of a call.
+
+    Stored as a [user, ai, ts, turn] array rather than a dict of strings;
+    ts is epoch seconds and turn numbers the call's exchanges from 1, so
+    they stay meaningful after the oldest turns are evicted.
+    """
+
+    __slots__ = ('user', 'ai', 'ts', 'turn')
+
+    def __init__(self, user, ai, ts=None, turn=0):
+        self.user = user
+        self.ai = ai
+        self.ts = int(time.time()) if ts is None else ts
+        self.turn = turn
+
+    def to_item(self):
+        return (self.user, self.ai, self.ts, self.turn)
+
+    @classmethod
+    def from_item(cls, item, position=0):
+        if isinstance(item, dict):
+            # Written before compact records; its place in the list is its turn
+            return cls(item['user'], item['ai'], 0, position + 1)
+        return cls(*item)
+
+
+def last_turn(history):
+    """Turn number of the latest exchange, 0 for a new call"""
+    return history[-1].turn if history else 0
+
+
+def turn_before(history, user_text):
+    """Turn number the utterance was said after: the latest one, or the one before it
+    when the latest exchange is this very utterance, already answered"""
+    if history and history[-1].user == user_text:
+        return history[-1].turn - 1
+    return last_turn(history)
+
+
+def load_history(store, call_sid):
+    return [Exchange.from_item(item, i) for i, item in enumerate(store.get_list(f'history_{call_sid}'))]
+
+
+def append_exchange(store, call_sid, exchange, max_bytes=None):
+    """Append only the new exchange; the store drops the call's oldest turns past max_bytes"""
+    return store.append(f'history_{call_sid}', exchange.to_item(), max_bytes=max_bytes)
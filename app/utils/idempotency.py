@@ -0,0 +1,47 @@
+import hashlib
+import time
+
+
+class TurnDeduplicator:
+    """Single-flight for retried webhooks: the first copy of a turn answers it and
+    every duplicate, in any worker, gets the TwiML it produced.
+
+    A turn is claimed in the shared store before any work starts. Duplicates
+    that arrive while it is in flight poll for the result, and late ones read
+    it straight from the store until the TTL runs out.
+    """
+
+    PENDING = 'pending'
+
+    def __init__(self, store, ttl=120, poll_interval=0.05):
+        self.store = store
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+
+    def digest(self, token):
+        """Short id of a turn from Twilio's idempotency token, or the call, turn and utterance when there is none"""
+        return hashlib.sha1(token.encode('utf-8')).hexdigest()[:16]
+
+    def key(self, call_sid, digest):
+        return f'turn_{call_sid}_{digest}'
+
+    def claim(self, key):
+        """True if this request is the first copy of the turn and must answer it"""
+        return self.store.add(key, self.PENDING, ttl=self.ttl)
+
+    def complete(self, key, twiml):
+        self.store.set(key, twiml, ttl=self.ttl)
+
+    def release(self, key):
+        """Forget a turn that failed so a retry generates it again"""
+        self.store.delete(key)
+
+    def wait(self, key, timeout):
+        """The memoized TwiML of a turn, PENDING if it is still in flight after
+        timeout, or None if the first copy failed and released it"""
+        deadline = time.monotonic() + timeout
+        while True:
+            value = self.store.get(key)
+            if value != self.PENDING or time.monotonic() >= deadline:
+                return value
+            time.sleep(self.poll_interval)
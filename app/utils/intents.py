@@ -0,0 +1,116 @@
+from app.utils.language import TOKEN
+
+# Conversational turns that need no model. Phrases are tokenized like
+# utterances and matched as whole token runs, so an utterance is only an
+# intent when every word of it belongs to one of these phrases.
+PHRASES = {
+    'greeting': {
+        'hi-IN': ['नमस्ते', 'नमस्कार', 'प्रणाम', 'राम राम', 'जय किसान', 'हेलो', 'हैलो'],
+        'mr-IN': ['नमस्कार', 'राम राम', 'जय किसान', 'हॅलो'],
+        'en-IN': ['hello', 'hi', 'hey', 'namaste', 'namaskar', 'good morning', 'good afternoon', 'good evening']
+    },
+    'thanks': {
+        'hi-IN': ['धन्यवाद', 'शुक्रिया', 'बहुत धन्यवाद', 'बहुत बहुत धन्यवाद', 'बहुत शुक्रिया', 'थैंक यू', 'थैंक्यू'],
+        'mr-IN': ['धन्यवाद', 'खूप धन्यवाद', 'आभार', 'आभारी आहे'],
+        'en-IN': ['thank you', 'thanks', 'thank you so much', 'thanks a lot']
+    },
+    'repeat': {
+        'hi-IN': ['फिर से बताओ', 'फिर से बताइए', 'फिर से बोलो', 'फिर से बोलिए', 'फिर से', 'दोबारा बताओ',
+                  'दोबारा बताइए', 'दोबारा बोलो', 'दोबारा', 'एक बार और बताओ', 'क्या कहा', 'समझ नहीं आया',
+                  'सुनाई नहीं दिया'],
+        'mr-IN': ['पुन्हा सांगा', 'परत सांगा', 'परत एकदा सांगा', 'पुन्हा एकदा सांगा', 'पुन्हा', 'काय म्हणालात'],
+        'en-IN': ['repeat', 'repeat that', 'please repeat', 'say that again', 'say again', 'come again', 'pardon']
+    },
+    'goodbye': {
+        # A lone 'बस' often starts a question ("बस इतना बताइए…"), so it only closes with a closing word
+        'hi-IN': ['अलविदा', 'बाय', 'बस इतना ही', 'बस धन्यवाद', 'बस शुक्रिया', 'बस बाय', 'बस अलविदा',
+                  'फोन रखता हूं', 'फोन रखती हूं', 'फिर मिलेंगे', 'चलो बाय'],
+        'mr-IN': ['बाय', 'बस एवढेच', 'फोन ठेवतो', 'फोन ठेवते', 'भेटू'],
+        'en-IN': ['bye', 'goodbye', 'good bye', "that's all", 'thats all', 'nothing else']
+    },
+    'ack': {
+        'hi-IN': ['ठीक है', 'ठीक', 'अच्छा', 'अच्छा ठीक है', 'चलो ठीक है', 'हां', 'हाँ', 'ओके', 'समझ गया', 'समझ गई'],
+        'mr-IN': ['ठीक आहे', 'बरं', 'बर', 'हो', 'ओके', 'समजलं', 'कळलं'],
+        'en-IN': ['ok', 'okay', 'alright', 'fine', 'got it', 'i see']
+    }
+}
+
+# Polite words that do not change what the caller means
+FILLERS = frozenset(['जी', 'ji', 'please', 'sir', 'madam', 'मैडम', 'दीदी', 'ताई'])
+
+# When one utterance holds several ("ठीक है, धन्यवाद, बाय") the first of these wins
+PRIORITY = ['goodbye', 'repeat', 'thanks', 'greeting', 'ack']
+
+# Longer utterances are questions even if they start with a greeting
+MAX_TOKENS = 8
+
+RESPONSES = {
+    'greeting': {
+        'hi-IN': ['नमस्ते।', 'बताइए, खेती से जुड़ा आपका क्या सवाल है?'],
+        'mr-IN': ['नमस्कार.', 'सांगा, शेतीबद्दल तुमचा काय प्रश्न आहे?'],
+        'en-IN': ['Hello.', 'What would you like to ask about your farm?']
+    },
+    'thanks': {
+        'hi-IN': ['आपका स्वागत है।', 'और कुछ पूछना हो तो बताइए।'],
+        'mr-IN': ['तुमचे स्वागत आहे.', 'अजून काही विचारायचे असेल तर सांगा.'],
+        'en-IN': ["You're welcome.", 'Is there anything else you would like to ask?']
+    },
+    'ack': {
+        'hi-IN': ['और कुछ पूछना है?'],
+        'mr-IN': ['अजून काही विचारायचे आहे का?'],
+        'en-IN': ['Is there anything else you would like to ask?']
+    },
+    # Repeat asked before anything was answered
+    'repeat': {
+        'hi-IN': ['अभी तक मैंने कुछ नहीं बताया।', 'अपना सवाल पूछिए।'],
+        'mr-IN': ['मी अजून काही सांगितले नाही.', 'तुमचा प्रश्न विचारा.'],
+        'en-IN': ["I haven't answered anything yet.", 'Please ask your question.']
+    }
+}
+
+def tokenize(text):
+    """Lowercased tokens without fillers, a word said twice in a row counted once"""
+    tokens = []
+    for token in TOKEN.findall(text):
+        token = token.lower()
+        if token not in FILLERS and (not tokens or tokens[-1] != token):
+            tokens.append(token)
+    return tokens
+
+def compile_phrases(phrases):
+    """Map every phrase's token tuple to its intent, across all languages"""
+    table = {}
+    for intent, languages in phrases.items():
+        for texts in languages.values():
+            for text in texts:
+                key = tuple(tokenize(text))
+                if table.get(key, intent) != intent:
+                    raise ValueError(f"Phrase {text!r} is listed for both {table[key]} and {intent}")
+                table[key] = intent
+    return table
+
+PHRASE_INTENTS = compile_phrases(PHRASES)
+LONGEST_PHRASE = max(len(key) for key in PHRASE_INTENTS)
+
+def classify(text):
+    """The intent of a purely conversational utterance, or None if it needs an answer"""
+    tokens = tokenize(text)
+    if not tokens or len(tokens) > MAX_TOKENS:
+        return None
+    found = set()
+    start = 0
+    # Cover the utterance with phrases, longest first; any word left over makes it a question
+    while start < len(tokens):
+        for size in range(min(LONGEST_PHRASE, len(tokens) - start), 0, -1):
+            intent = PHRASE_INTENTS.get(tuple(tokens[start:start + size]))
+            if intent:
+                found.add(intent)
+                start += size
+                break
+        else:
+            return None
+    return min(found, key=PRIORITY.index)
+
+def template(intent, language):
+    """Sentences answering an intent in the call's language"""
+    return RESPONSES[intent].get(language) or RESPONSES[intent]['hi-IN']
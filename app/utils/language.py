@@ -0,0 +1,51 @@
+from collections import namedtuple
+import re
+
+# One pass over the utterance: Devanagari runs (without the danda) or Latin words
+TOKEN = re.compile(r'[\u0900-\u0963\u0966-\u097F]+|[A-Za-z]+')
+
+# Common farming and conversational words; matched as whole tokens, so 'मी' no longer hits 'मीठा'
+HINDI_WORDS = frozenset([
+    'खेती', 'फसल', 'पानी', 'बीज', 'मौसम', 'किसान',
+    'मैं', 'हमारे', 'कैसे', 'क्या', 'कब', 'कहाँ',
+    'बताओ', 'समस्या', 'मदद', 'धन्यवाद', 'नमस्ते',
+    'है', 'हैं', 'नहीं', 'और', 'मेरे', 'मेरा', 'मुझे', 'कितना', 'कितनी',
+    'करना', 'चाहिए', 'में', 'का', 'की', 'के', 'लिए', 'हूं', 'हूँ'
+])
+
+MARATHI_WORDS = frozenset([
+    'शेती', 'पीक', 'पाणी', 'बी', 'हवामान', 'शेतकरी',
+    'मी', 'आमचे', 'कसे', 'काय', 'केव्हा', 'कुठे',
+    'सांगा', 'समस्या', 'मदत', 'धन्यवाद', 'नमस्कार',
+    'आहे', 'आहेत', 'नाही', 'आणि', 'माझे', 'माझी', 'माझा', 'मला', 'किती',
+    'करायचे', 'पाहिजे', 'मध्ये', 'साठी', 'आम्ही', 'तुम्ही', 'कशी',
+    'कधी', 'कोणता', 'कोणती', 'कोणते'
+])
+
+LanguageGuess = namedtuple('LanguageGuess', ['language', 'confident', 'hindi', 'marathi', 'latin', 'devanagari'])
+
+def detect(text):
+    """Detect the language of an utterance along with how sure we are"""
+    hindi = marathi = latin = devanagari = 0
+    for token in TOKEN.findall(text):
+        if token.isascii():
+            latin += 1
+            continue
+        devanagari += 1
+        if token in HINDI_WORDS:
+            hindi += 1
+        if token in MARATHI_WORDS:
+            marathi += 1
+
+    if hindi > marathi and hindi > latin:
+        return LanguageGuess('hi-IN', hindi - marathi >= 2, hindi, marathi, latin, devanagari)
+    if marathi > hindi and marathi > latin:
+        return LanguageGuess('mr-IN', marathi - hindi >= 2, hindi, marathi, latin, devanagari)
+    if latin > 2 or (latin and latin > devanagari):
+        return LanguageGuess('en-IN', latin > 2 and latin > 2 * devanagari, hindi, marathi, latin, devanagari)
+    # Default to Hindi if unclear
+    return LanguageGuess('hi-IN', False, hindi, marathi, latin, devanagari)
+
+def detect_language(text):
+    """Detect whether an utterance is Hindi, Marathi or English"""
+    return detect(text).language
@@ -0,0 +1,39 @@
+import os
+import threading
+
+
+class ProcessLocal:
+    """A service built on first use, once per process.
+
+    Stands in for the service itself: attribute access builds it, so module
+    level singletons can be imported anywhere without doing any work at
+    import time. A forked child forgets the parent's instance and builds its
+    own, so executors, threads, sockets and locks never cross a fork; with
+    gunicorn --preload the master imports the code and each worker builds
+    its services in post_worker_init.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._value = None
+        self._lock = threading.Lock()
+
+    def instance(self):
+        """The process's instance, built now if it does not exist yet"""
+        value = self._value
+        if value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory()
+                value = self._value
+        return value
+
+    def is_built(self):
+        return self._value is not None
+
+    def __getattr__(self, name):
+        return getattr(self.instance(), name)
@@ -0,0 +1,140 @@
+"""Prometheus metrics for the voice hot path.
+
+Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(set up by gunicorn.conf.py) and /metrics sums them across workers. The
+development server uses the in-process default registry.
+"""
+from contextlib import contextmanager
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TURN_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 1.5, 2, 3, 5, 8, 10, 15)
+
+TURN_SECONDS = Histogram(
+    'kisan_turn_seconds', 'Wall time of a voice webhook', ['outcome'], buckets=TURN_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    'kisan_turn_stage_seconds', 'Time spent in each stage of a turn', ['stage'], buckets=STAGE_BUCKETS
+)
+TURNS = Counter('kisan_turns', 'Voice webhooks served, by outcome', ['outcome'])
+FALLBACKS = Counter('kisan_fallbacks', 'Turns answered without a model answer', ['reason'])
+GEMINI_ERRORS = Counter('kisan_gemini_errors', 'Failed Gemini calls, including retried attempts')
+RESPONSE_CACHE = Counter('kisan_response_cache', 'Response cache lookups', ['result'])
+INTENTS = Counter('kisan_intents', 'Turns by local intent; none went on to Gemini', ['intent'])
+KNOWLEDGE = Counter('kisan_knowledge_lookups', 'Knowledge index lookups: answered, grounded or miss', ['result'])
+PROMPT_CHARS = Histogram(
+    'kisan_prompt_chars', 'Size of the prompt sent to Gemini',
+    buckets=(500, 1000, 1500, 2000, 2500, 3000, 4000, 6000, 8000)
+)
+CALLS_STARTED = Counter('kisan_calls_started', 'Calls that reached the welcome prompt')
+CALLS_ENDED = Counter('kisan_calls_ended', 'Calls reported completed by the status callback')
+WEATHER_LOOKUPS = Counter('kisan_weather_lookups', 'Weather cache lookups of weather questions', ['result'])
+WEATHER_REFRESHES = Counter('kisan_weather_refreshes', 'Background forecast fetches from the weather API', ['result'])
+SINK_DROPPED = Counter('kisan_transcript_events_dropped', 'Transcript events dropped on a full sink queue')
+LEDGER_DROPPED = Counter('kisan_call_ledger_dropped', 'Finished calls left out of the ledger on a full queue')
+# Overload protection in front of Gemini. The gauges are per worker: the
+# state and limit are reported for each live worker, in-flight calls summed
+CIRCUIT_TRANSITIONS = Counter(
+    'kisan_circuit_transitions', 'Circuit breaker state changes', ['circuit', 'from_state', 'to_state']
+)
+CIRCUIT_STATE = Gauge(
+    'kisan_circuit_state', 'Circuit breaker state: 0 closed, 1 half-open, 2 open', ['circuit'],
+    multiprocess_mode='liveall'
+)
+CONCURRENCY_LIMIT = Gauge(
+    'kisan_llm_concurrency_limit', 'Adaptive limit on concurrent Gemini calls', multiprocess_mode='liveall'
+)
+IN_FLIGHT = Gauge('kisan_llm_in_flight', 'Gemini calls in flight', multiprocess_mode='livesum')
+OVERLOAD = Counter(
+    'kisan_llm_rejected', 'Turns that could not call Gemini, by reason and how they were served', ['reason', 'served']
+)
+# Speculative answers generated while the previous answer plays
+SPECULATIONS = Counter(
+    'kisan_speculations', 'Speculative answers: generated, failed, stale or skipped for load or budget', ['result']
+)
+SPECULATION_LOOKUPS = Counter('kisan_speculation_lookups', 'Turns that had speculative answers waiting', ['result'])
+SPECULATION_TOKENS = Counter(
+    'kisan_speculation_tokens', 'Estimated tokens spent speculating: prediction, used or wasted', ['use']
+)
+# Rate limits, checked before a turn or API call does any work
+RATE_LIMITED = Counter('kisan_rate_limited', 'Requests refused by a token bucket, by bucket', ['bucket'])
+RATE_LIMIT_LOCAL = Counter(
+    'kisan_rate_limit_local_checks', 'Rate limit checks made in the worker because the shared store failed'
+)
+
+@contextmanager
+def span(stage):
+    """Time a block of the turn into kisan_turn_stage_seconds"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+class ActiveCallsCollector:
+    """Passes metrics through and adds gauges derived from summed counters.
+
+    Active calls are started minus ended: a gauge moved up in one worker and
+    down in another cannot be summed reliably once a worker restarts, while
+    the two counters can. The local turn share is the part of classified
+    turns answered without Gemini, the speculation hit rate the part of
+    turns with speculative answers waiting that were served one.
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        totals = {'kisan_calls_started': 0.0, 'kisan_calls_ended': 0.0}
+        intents = {}
+        lookups = {}
+        for family in self.source.collect():
+            if family.name in totals:
+                totals[family.name] += sum(
+                    sample.value for sample in family.samples if sample.name.endswith('_total')
+                )
+            elif family.name == 'kisan_intents':
+                for sample in family.samples:
+                    if sample.name.endswith('_total'):
+                        intent = sample.labels['intent']
+                        intents[intent] = intents.get(intent, 0.0) + sample.value
+            elif family.name == 'kisan_speculation_lookups':
+                for sample in family.samples:
+                    if sample.name.endswith('_total'):
+                        result = sample.labels['result']
+                        lookups[result] = lookups.get(result, 0.0) + sample.value
+            yield family
+        yield GaugeMetricFamily(
+            'kisan_active_calls',
+            'Calls started and not yet reported completed',
+            value=max(0.0, totals['kisan_calls_started'] - totals['kisan_calls_ended'])
+        )
+        classified = sum(intents.values())
+        yield GaugeMetricFamily(
+            'kisan_local_turn_share',
+            'Share of turns answered by the local intent fast path since the metrics were reset',
+            value=(classified - intents.get('none', 0.0)) / classified if classified else 0.0
+        )
+        looked_up = sum(lookups.values())
+        yield GaugeMetricFamily(
+            'kisan_speculation_hit_rate',
+            'Share of turns with speculative answers waiting that were served one',
+            value=lookups.get('hit', 0.0) / looked_up if looked_up else 0.0
+        )
+
+def render_metrics():
+    """Prometheus text exposition of every worker's metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        source = MultiProcessCollector(None)
+    else:
+        source = REGISTRY
+    registry = CollectorRegistry()
+    registry.register(ActiveCallsCollector(source))
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,155 @@
+from collections import deque
+import logging
+import threading
+import time
+
+from app.utils.metrics import CIRCUIT_STATE, CIRCUIT_TRANSITIONS, CONCURRENCY_LIMIT, IN_FLIGHT
+
+
+class Overloaded(Exception):
+    """Raised instead of calling a dependency that is failing or already at its concurrency limit"""
+
+    def __init__(self, reason):
+        super().__init__(f"Dependency unavailable: {reason}")
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency and probes it again after a cool-off.
+
+    Closed: calls go through and their outcomes fill a rolling window; once
+    it holds min_calls outcomes and the failed share reaches failure_rate the
+    circuit opens. Open: every call is refused for open_seconds. Half-open:
+    up to probes calls go through; the circuit closes once they all succeed
+    and opens again on the first failure, or if they have not come back
+    within open_seconds.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name, failure_rate=0.5, window=20, min_calls=10, open_seconds=10, probes=2,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.clock = clock
+        self.state = self.CLOSED
+        self.changed_at = clock()
+        self._outcomes = deque(maxlen=window)
+        self._probes_started = 0
+        self._probes_passed = 0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(name).set(self.STATE_VALUES[self.state])
+
+    def _transition(self, state):
+        previous, self.state = self.state, state
+        self.changed_at = self.clock()
+        self._outcomes.clear()
+        self._probes_started = 0
+        self._probes_passed = 0
+        CIRCUIT_TRANSITIONS.labels(self.name, previous, state).inc()
+        CIRCUIT_STATE.labels(self.name).set(self.STATE_VALUES[state])
+        logging.warning(f"Circuit {self.name}: {previous} -> {state}")
+
+    def _cool_off(self):
+        # Called with the lock held: move on from open, or give up on probes that never returned
+        waited = self.clock() - self.changed_at
+        if self.state == self.OPEN and waited >= self.open_seconds:
+            self._transition(self.HALF_OPEN)
+        elif self.state == self.HALF_OPEN and waited >= self.open_seconds:
+            self._transition(self.OPEN)
+
+    def available(self):
+        """Whether allow() would let a call through, without taking a probe slot"""
+        with self._lock:
+            self._cool_off()
+            if self.state == self.OPEN:
+                return False
+            return self.state == self.CLOSED or self._probes_started < self.probes
+
+    def allow(self):
+        """Let one call through, counting it as a probe while half-open"""
+        with self._lock:
+            self._cool_off()
+            if self.state == self.OPEN:
+                return False
+            if self.state == self.HALF_OPEN:
+                if self._probes_started >= self.probes:
+                    return False
+                self._probes_started += 1
+            return True
+
+    def cancel(self):
+        """Hand back the probe slot of an allowed call that was never made"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes_started:
+                self._probes_started -= 1
+
+    def record(self, success):
+        """Feed in the outcome of an allowed call"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if not success:
+                    self._transition(self.OPEN)
+                    return
+                self._probes_passed += 1
+                if self._probes_passed >= self.probes:
+                    self._transition(self.CLOSED)
+                return
+            if self.state == self.OPEN:
+                # A call started before the circuit opened
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures >= self.failure_rate * len(self._outcomes):
+                self._transition(self.OPEN)
+
+
+class AdaptiveLimit:
+    """Cap on concurrent calls to a dependency that follows how well it is coping (AIMD).
+
+    A call that succeeds within target_latency while the limit is at least
+    half used raises the limit by 1/limit, about one step per limit's worth
+    of good calls. A failed or slower call multiplies it by backoff. The
+    limit stays between min_limit and max_limit.
+    """
+
+    def __init__(self, initial=8, min_limit=1, max_limit=64, target_latency=5.0, backoff=0.9):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        CONCURRENCY_LIMIT.set(self.limit)
+        IN_FLIGHT.set(0)
+
+    def available(self):
+        """Whether acquire() would get a slot right now"""
+        with self._lock:
+            return self.in_flight < int(self.limit)
+
+    def acquire(self):
+        """Take a slot if the limit allows one more call"""
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            IN_FLIGHT.set(self.in_flight)
+            return True
+
+    def release(self, latency, success):
+        """Give back a slot and adjust the limit by how the call went"""
+        with self._lock:
+            busy = self.in_flight * 2 >= self.limit
+            self.in_flight -= 1
+            IN_FLIGHT.set(self.in_flight)
+            if not success or latency > self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            elif busy:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            CONCURRENCY_LIMIT.set(self.limit)
@@ -0,0 +1,57 @@
+import hashlib
+import logging
+
+from app.utils.metrics import RATE_LIMIT_LOCAL, RATE_LIMITED
+from app.utils.session_store import MemoryBackend
+
+
+class RateLimiter:
+    """Token buckets kept in the shared store, so a limit holds across workers and nodes.
+
+    limits maps a bucket name to (requests per minute, burst); a rate of 0
+    turns the bucket off. Each check is one atomic read-modify-write of one
+    key. If the store fails, buckets fall back to this worker's memory: the
+    limits then hold per worker rather than in total, but a caller is never
+    refused or let through unchecked because the store is down.
+    """
+
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = limits
+        self.local = MemoryBackend()
+        self._store_failing = False
+
+    def key(self, bucket, identity):
+        # Phone numbers and API keys are not kept in the store as they are
+        return f"rate_{bucket}_{hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]}"
+
+    def _take(self, key, rate, burst):
+        try:
+            retry_after = self.store.take(key, rate, burst)
+        except Exception as e:
+            if not self._store_failing:
+                logging.warning(f"Rate limits falling back to worker memory: {str(e)}")
+                self._store_failing = True
+            RATE_LIMIT_LOCAL.inc()
+            return self.local.take(key, rate, burst)
+        if self._store_failing:
+            logging.info("Rate limits back on the shared store")
+            self._store_failing = False
+        return retry_after
+
+    def check(self, *buckets):
+        """Take a token from each (bucket, identity) in turn.
+
+        Returns (bucket, seconds to wait) for the first one that is empty, or
+        None if all allowed the request. Put the narrowest bucket first, so a
+        caller over their own limit does not use up the global one.
+        """
+        for bucket, identity in buckets:
+            per_minute, burst = self.limits[bucket]
+            if not per_minute:
+                continue
+            retry_after = self._take(self.key(bucket, identity or 'unknown'), per_minute / 60.0, burst)
+            if retry_after:
+                RATE_LIMITED.labels(bucket).inc()
+                return bucket, retry_after
+        return None
@@ -0,0 +1,513 @@
+from array import array
+from collections import deque
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import redis
+
+
+# Token buckets as GCRA: a key holds the time its bucket is next full (the
+# theoretical arrival time), advanced by 1/rate per request, and a request is
+# allowed while that time is no more than burst/rate ahead of now. One value
+# and one read-modify-write per check, whatever the rate.
+def gcra(tat, now, rate, burst):
+    """(new arrival time or None if refused, seconds to wait before the next request is allowed)"""
+    interval = 1.0 / rate
+    tat = max(tat or now, now)
+    allow_at = tat + interval - burst * interval
+    if allow_at > now:
+        return None, allow_at - now
+    return tat + interval, 0.0
+
+
+def encode(value):
+    # Raw UTF-8 rather than \u escapes: Devanagari takes half the bytes
+    return json.dumps(value, ensure_ascii=False)
+
+
+class MemoryBackend:
+    """Per-process store, only safe with a single worker.
+
+    Lists are kept as [items, item sizes, total bytes, expiry]. With
+    max_list_bytes set, the oldest items across all lists are evicted once
+    the lists together grow past it.
+    """
+
+    def __init__(self, max_list_bytes=None):
+        self._values = {}
+        self._lists = {}
+        self.max_list_bytes = max_list_bytes
+        self._list_bytes = 0
+        # Key of every list item in append order, and per key how many of
+        # those entries point at items already removed some other way
+        self._appends = deque()
+        self._stale = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, entry):
+        return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def _list_alive(self, entry):
+        return entry is not None and (entry[3] is None or entry[3] > time.time())
+
+    def _forget(self, key, count):
+        if self.max_list_bytes and count:
+            self._stale[key] = self._stale.get(key, 0) + count
+
+    def _drop_list(self, key):
+        entry = self._lists.pop(key, None)
+        if entry:
+            self._list_bytes -= entry[2]
+            self._forget(key, len(entry[0]))
+
+    def _pop_oldest(self, entry):
+        entry[0].pop(0)
+        size = entry[1].pop(0)
+        entry[2] -= size
+        self._list_bytes -= size
+
+    def _evict(self):
+        while self._list_bytes > self.max_list_bytes and self._appends:
+            key = self._appends.popleft()
+            if self._stale.get(key):
+                self._stale[key] -= 1
+                if not self._stale[key]:
+                    del self._stale[key]
+                continue
+            entry = self._lists[key]
+            self._pop_oldest(entry)
+            if not entry[0]:
+                del self._lists[key]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._values.get(key)
+            return entry[0] if self._alive(entry) else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._values[key] = (value, time.time() + ttl if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        with self._lock:
+            if self._alive(self._values.get(key)):
+                return False
+            self._values[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def take(self, key, rate, burst):
+        with self._lock:
+            now = time.time()
+            entry = self._values.get(key)
+            tat, retry_after = gcra(entry[0] if self._alive(entry) else None, now, rate, burst)
+            if tat is not None:
+                self._values[key] = (tat, tat)
+            return retry_after
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+            self._drop_list(key)
+
+    def append(self, key, value, ttl=None, max_bytes=None):
+        size = len(encode(value).encode('utf-8'))
+        with self._lock:
+            entry = self._lists.get(key)
+            if entry is not None and not self._list_alive(entry):
+                self._drop_list(key)
+                entry = None
+            if entry is None:
+                entry = self._lists[key] = [[], array('I'), 0, None]
+            entry[0].append(value)
+            entry[1].append(size)
+            entry[2] += size
+            entry[3] = time.time() + ttl if ttl else None
+            self._list_bytes += size
+            if self.max_list_bytes:
+                self._appends.append(key)
+            if max_bytes:
+                while entry[2] > max_bytes and len(entry[0]) > 1:
+                    self._pop_oldest(entry)
+                    self._forget(key, 1)
+            if self.max_list_bytes:
+                self._evict()
+            return len(entry[0])
+
+    def get_list(self, key):
+        with self._lock:
+            entry = self._lists.get(key)
+            return list(entry[0]) if self._list_alive(entry) else []
+
+    def list_bytes(self):
+        return self._list_bytes
+
+
+class SQLiteBackend:
+    """File-backed store shared by every worker on one machine.
+
+    The bytes held in lists are kept as a running total in a one-row table,
+    updated in the same transaction as every list write. Expired keys and
+    lists, and the oldest items past max_list_bytes, are deleted by a
+    background thread in each worker rather than on the request path.
+    """
+
+    PURGE_INTERVAL = 30
+
+    def __init__(self, path, mmap_size=64 * 1024 * 1024, max_list_bytes=None):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.max_list_bytes = max_list_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._get_connection()
+
+    def _get_connection(self):
+        # Connections must not cross a fork, so they are keyed by pid as well as thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS kv ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS list_items ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, value TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS list_items_key ON list_items (key, id)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS list_expiry ('
+                'key TEXT PRIMARY KEY, expires_at REAL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS list_totals ('
+                'id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)'
+            )
+            if not conn.execute('SELECT 1 FROM list_totals').fetchone():
+                # New database, or one from before the running total: count it once
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(
+                    'INSERT OR IGNORE INTO list_totals (id, bytes) '
+                    'SELECT 0, COALESCE(SUM(length(CAST(value AS BLOB))), 0) FROM list_items'
+                )
+                conn.execute('COMMIT')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_started(self):
+        # Started lazily so every gunicorn worker gets its own purge thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='session-purge', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.PURGE_INTERVAL)
+            try:
+                self.purge()
+            except Exception as e:
+                logging.error(f"Session store purge error: {str(e)}")
+
+    def purge(self):
+        """Delete expired keys and lists, then the oldest list items past max_list_bytes"""
+        conn = self._get_connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+            self._delete_items(
+                conn,
+                'key IN (SELECT key FROM list_expiry WHERE expires_at IS NOT NULL AND expires_at <= ?)',
+                (now,)
+            )
+            conn.execute('DELETE FROM list_expiry WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+            if self.max_list_bytes:
+                self._evict(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _delete_items(self, conn, condition, params):
+        """Delete the list items matching condition and take their bytes off the total"""
+        freed = conn.execute(
+            f'SELECT COALESCE(SUM(length(CAST(value AS BLOB))), 0) FROM list_items WHERE {condition}', params
+        ).fetchone()[0]
+        if freed:
+            conn.execute(f'DELETE FROM list_items WHERE {condition}', params)
+            conn.execute('UPDATE list_totals SET bytes = bytes - ?', (freed,))
+
+    def _evict(self, conn, batch=256):
+        """Delete the oldest list items across all keys until the lists fit max_list_bytes"""
+        excess = self.list_bytes() - self.max_list_bytes
+        last_id = 0
+        while excess > 0:
+            rows = conn.execute(
+                'SELECT id, length(CAST(value AS BLOB)) FROM list_items WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, batch)
+            ).fetchall()
+            if not rows:
+                break
+            for last_id, size in rows:
+                excess -= size
+                if excess <= 0:
+                    break
+        if last_id:
+            self._delete_items(conn, 'id <= ?', (last_id,))
+
+    def list_bytes(self):
+        return self._get_connection().execute('SELECT bytes FROM list_totals').fetchone()[0]
+
+    def get(self, key):
+        row = self._get_connection().execute(
+            'SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        conn = self._get_connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, encode(value), time.time() + ttl if ttl else None)
+        )
+        self._ensure_started()
+
+    def add(self, key, value, ttl=None):
+        conn = self._get_connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM kv WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?', (key, now))
+            added = conn.execute(
+                'INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, encode(value), now + ttl if ttl else None)
+            ).rowcount == 1
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return added
+
+    def take(self, key, rate, burst):
+        conn = self._get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute(
+                'SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)', (key, now)
+            ).fetchone()
+            tat, retry_after = gcra(json.loads(row[0]) if row else None, now, rate, burst)
+            if tat is not None:
+                conn.execute(
+                    'INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)', (key, encode(tat), tat)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return retry_after
+
+    def delete(self, key):
+        conn = self._get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM kv WHERE key = ?', (key,))
+            self._delete_items(conn, 'key = ?', (key,))
+            conn.execute('DELETE FROM list_expiry WHERE key = ?', (key,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def append(self, key, value, ttl=None, max_bytes=None):
+        conn = self._get_connection()
+        item = encode(value)
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            expired = conn.execute(
+                'SELECT 1 FROM list_expiry WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?',
+                (key, now)
+            ).fetchone()
+            if expired:
+                self._delete_items(conn, 'key = ?', (key,))
+            conn.execute('INSERT INTO list_items (key, value) VALUES (?, ?)', (key, item))
+            conn.execute('UPDATE list_totals SET bytes = bytes + ?', (len(item.encode('utf-8')),))
+            conn.execute(
+                'INSERT OR REPLACE INTO list_expiry (key, expires_at) VALUES (?, ?)',
+                (key, now + ttl if ttl else None)
+            )
+            if max_bytes:
+                length = self._trim(conn, key, max_bytes)
+            else:
+                length = conn.execute(
+                    'SELECT COUNT(*) FROM list_items WHERE key = ?', (key,)
+                ).fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._ensure_started()
+        return length
+
+    def _trim(self, conn, key, max_bytes):
+        """Drop the key's oldest items past max_bytes, keeping at least one; returns the new length"""
+        rows = conn.execute(
+            'SELECT id, length(CAST(value AS BLOB)) FROM list_items WHERE key = ? ORDER BY id', (key,)
+        ).fetchall()
+        total = sum(size for _, size in rows)
+        dropped = 0
+        while total > max_bytes and len(rows) - dropped > 1:
+            total -= rows[dropped][1]
+            dropped += 1
+        if dropped:
+            conn.execute('DELETE FROM list_items WHERE key = ? AND id <= ?', (key, rows[dropped - 1][0]))
+            conn.execute('UPDATE list_totals SET bytes = bytes - ?', (sum(size for _, size in rows[:dropped]),))
+        return len(rows) - dropped
+
+    def get_list(self, key):
+        conn = self._get_connection()
+        expired = conn.execute(
+            'SELECT 1 FROM list_expiry WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?',
+            (key, time.time())
+        ).fetchone()
+        if expired:
+            return []
+        rows = conn.execute(
+            'SELECT value FROM list_items WHERE key = ? ORDER BY id', (key,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class RedisBackend:
+    """Store shared by every worker and node that can reach one Redis server.
+
+    There is no global list budget here; bound Redis itself with maxmemory
+    and an eviction policy.
+    """
+
+    # GCRA on Redis' own clock, so nodes with skewed clocks share one bucket
+    TAKE_SCRIPT = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local interval = 1 / tonumber(ARGV[1])
+    local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+    local allow_at = tat + interval - tonumber(ARGV[2]) * interval
+    if allow_at > now then
+        return tostring(allow_at - now)
+    end
+    redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', math.ceil((tat + interval - now) * 1000))
+    return '0'
+    """
+
+    def __init__(self, url, prefix='kisan:'):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(self.TAKE_SCRIPT)
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, encode(value), ex=ttl)
+
+    def add(self, key, value, ttl=None):
+        return bool(self.client.set(self.prefix + key, encode(value), ex=ttl, nx=True))
+
+    def take(self, key, rate, burst):
+        return float(self._take(keys=[self.prefix + key], args=[rate, burst]))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key, self.prefix + key + ':bytes')
+
+    def append(self, key, value, ttl=None, max_bytes=None):
+        name = self.prefix + key
+        item = encode(value)
+        # MULTI/EXEC keeps the push, the byte count and the expiry refresh atomic
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(name, item)
+        pipe.incrby(name + ':bytes', len(item.encode('utf-8')))
+        if ttl:
+            pipe.expire(name, ttl)
+            pipe.expire(name + ':bytes', ttl)
+        length, total = pipe.execute()[:2]
+        # A call's turns arrive one at a time, so trimming needs no transaction
+        while max_bytes and total > max_bytes and length > 1:
+            oldest = self.client.lpop(name)
+            total = self.client.decrby(name + ':bytes', len(oldest))
+            length -= 1
+        return length
+
+    def get_list(self, key):
+        return [json.loads(item) for item in self.client.lrange(self.prefix + key, 0, -1)]
+
+
+def create_backend(url, max_list_bytes=None):
+    """Create a backend from a URL such as redis://host:6379/0 or sqlite:///sessions.db"""
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):], max_list_bytes=max_list_bytes)
+    if url.startswith('memory://'):
+        return MemoryBackend(max_list_bytes=max_list_bytes)
+    raise ValueError(f"Unsupported session store URL: {url}")
+
+
+class SessionStore:
+    """Conversation state shared across gunicorn workers"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.default_ttl = 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        url = app.config.get('SESSION_STORE_URL', 'memory://')
+        self.default_ttl = app.config.get('SESSION_TTL', 3600)
+        self.backend = create_backend(url, max_list_bytes=app.config.get('HISTORY_MAX_BYTES'))
+        logging.info(f"Session store backend: {type(self.backend).__name__}")
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl or self.default_ttl)
+
+    def add(self, key, value, ttl=None):
+        """Set key only if it is absent or expired; returns whether this caller set it"""
+        return self.backend.add(key, value, ttl or self.default_ttl)
+
+    def take(self, key, rate, burst):
+        """Take a token from the key's bucket of burst tokens refilled at rate per second.
+
+        Returns 0 if one was taken, otherwise the seconds until one will be there.
+        """
+        return self.backend.take(key, rate, burst)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def append(self, key, value, ttl=None, max_bytes=None):
+        """Atomically append to a list and refresh its TTL, returning the new length.
+
+        With max_bytes, the list's oldest items are dropped until it fits.
+        """
+        return self.backend.append(key, value, ttl or self.default_ttl, max_bytes=max_bytes)
+
+    def get_list(self, key):
+        return self.backend.get_list(key)
@@ -0,0 +1,245 @@
+from twilio.twiml.voice_response import VoiceResponse
+
+VOICE = 'Polly.Aditi'
+PROSODY = {'rate': '90%', 'volume': 'loud'}
+
+WELCOME_MESSAGE = 'नमस्ते, मैं दीक्षा हूं, आपकी कृषि सहायक। मैं आपकी कैसे मदद कर सकती हूं?'
+TIMEOUT_MESSAGE = "आप काफी देर से चुप हैं। मैं कॉल काट रही हूं। जरूरत हो तो फिर से कॉल करना।"
+ERROR_MESSAGE = "मैं समझ नहीं पाई। फिर से बताओ।"
+HOLD_MESSAGE = "एक पल रुकिए, मैं जानकारी देख रही हूं।"
+BUSY_MESSAGE = "अभी बहुत लोग सवाल पूछ रहे हैं। एक पल रुकिए।"
+CALLBACK_OFFER = "माफ़ कीजिए, अभी जवाब देने में देर हो रही है। आपको वापस कॉल चाहिए तो एक दबाइए।"
+CALLBACK_MESSAGE = "ठीक है, हम थोड़ी देर में आपको वापस कॉल करेंगे। धन्यवाद।"
+GOODBYE_MESSAGE = "थोड़ी देर बाद फिर से कॉल करना। धन्यवाद।"
+SLOW_DOWN_MESSAGE = "आप बहुत जल्दी-जल्दी सवाल पूछ रहे हैं। थोड़ा रुककर फिर से पूछिए।"
+
+# Plain ASCII slot markers survive the builder unescaped, so templates can be split on them.
+# Markers starting with PLAY stand for sentences that have pre-synthesized audio.
+SAY_A = 'TWIMLSAYA'
+SAY_B = 'TWIMLSAYB'
+PLAY_A = 'TWIMLPLAYA'
+PLAY_B = 'TWIMLPLAYB'
+SLOT_URL = 'TWIMLSLOTURL'
+
+def escape_text(text):
+    """Escape element text exactly as the twilio builder does (ElementTree, us-ascii)"""
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text.encode('ascii', 'xmlcharrefreplace').decode('ascii')
+
+def split_answer(text):
+    """Break an answer into sentences on the danda, the way it is spoken"""
+    return [
+        sentence.strip() + '।'
+        for sentence in text.split('।')
+        if sentence.strip()
+    ]
+
+def say_sentence(parent, sentence, audio=None):
+    """Speak one sentence of an answer, playing pre-synthesized audio when there is some"""
+    audio_url = audio(sentence) if audio else None
+    if audio_url:
+        parent.play(audio_url)
+        return
+    parent.say(
+        sentence,
+        language='hi-IN',
+        voice=VOICE,
+        prosody=PROSODY
+    )
+
+def say_message(parent, text, audio=None):
+    """Speak a fixed prompt, playing pre-synthesized audio when there is some"""
+    audio_url = audio(text) if audio else None
+    if audio_url:
+        parent.play(audio_url)
+        return
+    parent.say(
+        text,
+        language='hi-IN',
+        voice=VOICE
+    )
+
+def add_timeout_hangup(response, audio=None):
+    """Say goodbye and hang up once the caller has been silent for the whole gather"""
+    say_message(response, TIMEOUT_MESSAGE, audio)
+    response.hangup()
+
+def build_welcome(language, audio=None):
+    """Reference builder for the greeting played when a call starts"""
+    response = VoiceResponse()
+    # Set 30 second timeout
+    gather = response.gather(
+        input='speech',
+        timeout=30,  # Changed from 5 to 30 seconds
+        speech_timeout='auto',
+        language=language
+    )
+    say_message(gather, WELCOME_MESSAGE, audio)
+
+    # Add message after timeout
+    add_timeout_hangup(response, audio)
+    return str(response)
+
+def build_answer(sentences, language, audio=None):
+    """Reference builder: speak the answer and listen for the next question"""
+    response = VoiceResponse()
+    gather = response.gather(
+        input='speech',
+        timeout=30,  # Changed from 5 to 30 seconds
+        speech_timeout='auto',
+        language=language
+    )
+
+    for sentence in sentences:
+        say_sentence(gather, sentence, audio)
+        gather.pause(length=0.5)
+
+    # Add timeout message and hangup
+    add_timeout_hangup(response, audio)
+    return str(response)
+
+def build_partial(sentences, redirect_url, audio=None):
+    """Reference builder: speak part of an answer and come back for the rest"""
+    response = VoiceResponse()
+    for sentence in sentences:
+        say_sentence(response, sentence, audio)
+    response.redirect(redirect_url)
+    return str(response)
+
+def build_callback_offer(audio=None):
+    """Reference builder: offer a callback on keypad 1, saying goodbye if no key is pressed"""
+    response = VoiceResponse()
+    gather = response.gather(
+        input='dtmf',
+        num_digits=1,
+        timeout=10,
+        action='/voice/callback'
+    )
+    say_message(gather, CALLBACK_OFFER, audio)
+    say_message(response, GOODBYE_MESSAGE, audio)
+    response.hangup()
+    return str(response)
+
+def build_message(text, audio=None):
+    """Reference builder: say a single message"""
+    response = VoiceResponse()
+    say_message(response, text, audio)
+    return str(response)
+
+class SentenceTemplate:
+    """A response with a run of spoken sentences, each either <Say> text or <Play> audio.
+
+    Built from four renders of the reference builder with two slots each, one
+    per combination of say/play neighbours, which gives the head before the
+    first sentence, the separator between any two and the tail after the last.
+    """
+
+    def __init__(self, build):
+        self.heads = {}
+        self.separators = {}
+        self.tails = {}
+        for first, first_kind in ((SAY_A, 'say'), (PLAY_A, 'play')):
+            for second, second_kind in ((SAY_B, 'say'), (PLAY_B, 'play')):
+                head, rest = build([first, second]).split(first)
+                separator, tail = rest.split(second)
+                self.heads[first_kind] = head
+                self.separators[(first_kind, second_kind)] = separator
+                self.tails[second_kind] = tail
+
+    def render(self, items, url=None):
+        """Render a non-empty list of (kind, escaped content) pairs, filling SLOT_URL with url"""
+        parts = [self.heads[items[0][0]]]
+        previous = None
+        for kind, content in items:
+            if previous:
+                parts.append(self.separators[(previous, kind)])
+            parts.append(content)
+            previous = kind
+        tail = self.tails[previous]
+        parts.append(tail.replace(SLOT_URL, url) if url is not None else tail)
+        return ''.join(parts)
+
+class TwimlRenderer:
+    """Fills dynamic sentences into TwiML templates prebuilt with the twilio builder.
+
+    Output is byte-identical to the build_* functions, which stay as the
+    reference implementation. Sentences must be non-empty, as the builder
+    would render an empty one as a self-closing <Say />.
+    """
+
+    def __init__(self, languages=(), audio=None):
+        self.audio = audio
+        self._welcome = {}
+        self._answer = {}
+        self._empty_answer = {}
+        self._partial = {}
+        self._messages = {}
+        self._callback_offer = None
+        self._empty_partial = build_partial([], SLOT_URL).split(SLOT_URL)
+        for language in languages:
+            self._prepare(language)
+        self.message(ERROR_MESSAGE)
+
+    def _audio_url(self, text, language='hi-IN'):
+        """Asset for text in the call's language, else the Hindi one, which is what <Say> would speak"""
+        if not self.audio:
+            return None
+        return (language != 'hi-IN' and self.audio.url_for(text, language)) or self.audio.url_for(text, 'hi-IN')
+
+    def _prepare(self, language):
+        if language not in self._answer:
+            audio = lambda text: self._audio_url(text, language)
+            template_audio = lambda text: self._template_audio(text, language)
+            self._welcome[language] = build_welcome(language, audio)
+            self._answer[language] = SentenceTemplate(
+                lambda slots: build_answer(slots, language, template_audio)
+            )
+            self._empty_answer[language] = build_answer([], language, audio)
+            self._partial[language] = SentenceTemplate(
+                lambda slots: build_partial(slots, SLOT_URL, template_audio)
+            )
+
+    def _template_audio(self, text, language):
+        # PLAY slots "have" audio at their own name; fixed prompts use the real assets
+        if text.startswith('TWIMLPLAY'):
+            return text
+        if text.startswith('TWIMLSAY'):
+            return None
+        return self._audio_url(text, language)
+
+    def _items(self, sentences, language):
+        items = []
+        for sentence in sentences:
+            audio_url = self._audio_url(sentence, language)
+            if audio_url:
+                items.append(('play', escape_text(audio_url)))
+            else:
+                items.append(('say', escape_text(sentence)))
+        return items
+
+    def welcome(self, language):
+        self._prepare(language)
+        return self._welcome[language]
+
+    def answer(self, sentences, language):
+        self._prepare(language)
+        if not sentences:
+            return self._empty_answer[language]
+        return self._answer[language].render(self._items(sentences, language))
+
+    def partial(self, sentences, redirect_url, language='hi-IN'):
+        if not sentences:
+            head, tail = self._empty_partial
+            return head + escape_text(redirect_url) + tail
+        self._prepare(language)
+        return self._partial[language].render(self._items(sentences, language), url=escape_text(redirect_url))
+
+    def callback_offer(self):
+        if self._callback_offer is None:
+            self._callback_offer = build_callback_offer(self._audio_url)
+        return self._callback_offer
+
+    def message(self, text):
+        if text not in self._messages:
+            self._messages[text] = build_message(text, self._audio_url)
+        return self._messages[text]
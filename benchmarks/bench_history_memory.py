@@ -0,0 +1,90 @@
+"""Memory held by call histories at 1k and 10k concurrent calls: the old dict
+records with a formatted datetime string against compact Exchange records,
+plus the bytes each record takes in SQLite/Redis and the byte budgets.
+
+Run from the repository root:
+    python -m benchmarks.bench_history_memory
+"""
+from datetime import datetime
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from app.utils.history import Exchange, load_history
+from app.utils.session_store import MemoryBackend, SessionStore, encode
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'language_samples.jsonl')
+ANSWER = "अच्छा, इसके लिए पहले मिट्टी की जांच करवा लो। बताओ पिछली बार कौन सी फसल लगाई थी?"
+
+
+def fresh(text):
+    # A new string object per turn, as every webhook parses its own
+    return (text + ' ')[:-1]
+
+
+def legacy_record(user, ai):
+    return {'user': fresh(user), 'ai': fresh(ai), 'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def compact_record(user, ai, turn):
+    return Exchange(fresh(user), fresh(ai), turn=turn).to_item()
+
+
+def measured(build):
+    """Bytes still allocated after build() runs, and the value it returned"""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return current, value
+
+
+def fill(backend, calls, turns, record, samples, seed=3):
+    rng = random.Random(seed)
+    for call in range(calls):
+        for turn in range(1, turns + 1):
+            backend.append(f'history_CA{call}', record(rng.choice(samples), ANSWER, turn))
+    return backend
+
+
+def main(turns=8):
+    with open(FIXTURES, encoding='utf-8') as f:
+        samples = [json.loads(line)['text'] for line in f if line.strip()]
+
+    print(f"{'calls':>6} {'dict records':>14} {'compact':>14} {'saved':>7}   ({turns} turns per call, in-process store)")
+    for calls in (1000, 10000):
+        before, _ = measured(lambda: fill(MemoryBackend(), calls, turns, lambda u, a, t: legacy_record(u, a), samples))
+        after, _ = measured(lambda: fill(MemoryBackend(), calls, turns, compact_record, samples))
+        print(f"{calls:>6} {before / 2**20:>11.1f} MB {after / 2**20:>11.1f} MB {1 - after / before:>7.1%}")
+
+    rng = random.Random(5)
+    pairs = [(rng.choice(samples), ANSWER) for _ in range(1000)]
+    old = sum(len(json.dumps(legacy_record(u, a))) for u, a in pairs) / len(pairs)
+    new = sum(len(encode(compact_record(u, a, 1)).encode('utf-8')) for u, a in pairs) / len(pairs)
+    print(f"Serialized record (SQLite/Redis): {old:.0f} bytes before, {new:.0f} bytes after ({1 - new / old:.1%} less)")
+
+    # Per-call budget: a very long call keeps only its newest turns
+    store = SessionStore()
+    store.backend = MemoryBackend()
+    for turn in range(1, 201):
+        store.append('history_CALONG', compact_record(rng.choice(samples), ANSWER, turn), max_bytes=16384)
+    history = load_history(store, 'CALONG')
+    print(f"Per-call budget:  200 turns under 16 KB keeps turns {history[0].turn}-{history[-1].turn}")
+
+    # Global budget: 10k calls into a store capped at 8 MB of list data
+    budget = 8 * 2**20
+    started = time.perf_counter()
+    bounded = fill(MemoryBackend(max_list_bytes=budget), 10000, turns, compact_record, samples)
+    elapsed = time.perf_counter() - started
+    left = sum(1 for call in range(10000) if bounded.get_list(f'history_CA{call}'))
+    print(f"Global budget:    {bounded.list_bytes() / 2**20:.1f} MB of lists kept under {budget / 2**20:.0f} MB, "
+          f"{left} of 10000 calls left, {elapsed / (10000 * turns) * 1e6:.1f} us per append")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Intent fast path: how many conversational turns it answers and what it costs.
+
+Classifies the labelled conversational utterances in
+fixtures/intent_samples.jsonl and the farming questions in
+fixtures/language_samples.jsonl, which should all go on to Gemini. Then
+plays calls through the app with the Gemini stub, mixing questions with
+greetings, thanks, repeats and goodbyes, and reports the share of turns
+answered locally and the turn time with and without the model.
+
+Run from the repository root:
+    python -m benchmarks.bench_intents
+"""
+import json
+import os
+import random
+import time
+
+# Every question reaches the stub: no cached or curated answers, no rate limits
+os.environ.update(
+    LLM_BACKEND='stub', LLM_STUB_LATENCY='0.5', SESSION_STORE_URL='memory://',
+    RESPONSE_CACHE_MAX_ENTRIES='0', KNOWLEDGE_INDEX_DIR=os.path.join(os.sep, 'nonexistent'),
+    RATE_LIMIT_CALLER_PER_MINUTE='0', RATE_LIMIT_TURNS_PER_MINUTE='0'
+)
+
+from prometheus_client import REGISTRY
+
+from app.utils.intents import PRIORITY, classify
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def accuracy(samples, questions, rounds=200):
+    correct = sum(classify(sample['text']) == sample['intent'] for sample in samples)
+    misses = [sample['text'] for sample in samples if classify(sample['text']) != sample['intent']]
+    passed = sum(classify(question['text']) is None for question in questions)
+    print(f"Intents:   {correct} of {len(samples)} conversational utterances classified correctly"
+          + (f" (missed: {', '.join(misses)})" if misses else ""))
+    print(f"Questions: {passed} of {len(questions)} farming questions left for Gemini")
+
+    texts = [sample['text'] for sample in samples] + [question['text'] for question in questions]
+    timings = []
+    for _ in range(rounds):
+        for text in texts:
+            started = time.perf_counter()
+            classify(text)
+            timings.append(time.perf_counter() - started)
+    print(f"Classify:  p50 {percentile(timings, 50) * 1e6:.1f} us, p99 {percentile(timings, 99) * 1e6:.1f} us "
+          f"over {len(timings)} utterances")
+
+
+def calls(samples, questions, count=40, seed=3):
+    """Each call: a greeting, two or three questions with a thanks, repeat or okay between them, goodbye.
+
+    An okay right after the assistant asked something goes on to Gemini, so
+    turns are counted as local from the intent metric rather than classify().
+    """
+    from run import app
+    client = app.test_client()
+    client.environ_base['wsgi.url_scheme'] = 'https'
+    rng = random.Random(seed)
+    by_intent = {}
+    for sample in samples:
+        by_intent.setdefault(sample['intent'], []).append(sample['text'])
+
+    def answered_locally():
+        return sum(REGISTRY.get_sample_value('kisan_intents_total', {'intent': intent}) or 0 for intent in PRIORITY)
+
+    local, model = [], []
+    for index in range(count):
+        call_sid = f'CAINTENT{index}'
+        hindi = [q['text'] for q in questions if q['language'] == 'hi-IN']
+        script = [rng.choice(by_intent['greeting'])]
+        for _ in range(rng.randint(2, 3)):
+            script.append(rng.choice(hindi))
+            script.append(rng.choice(by_intent[rng.choice(['thanks', 'repeat', 'ack'])]))
+        script.append(rng.choice(by_intent['goodbye']))
+        client.post('/voice', data={'CallSid': call_sid})
+        for utterance in script:
+            before = answered_locally()
+            started = time.perf_counter()
+            client.post('/voice', data={'CallSid': call_sid, 'SpeechResult': utterance})
+            elapsed = time.perf_counter() - started
+            (local if answered_locally() > before else model).append(elapsed)
+    total = len(local) + len(model)
+    print(f"Calls:     {count} calls, {total} turns, {len(local)} answered locally ({len(local) / total:.0%})")
+    print(f"Turn time: local p50 {percentile(local, 50) * 1000:.1f} ms, "
+          f"Gemini stub p50 {percentile(model, 50) * 1000:.0f} ms")
+
+
+def main():
+    samples = load('intent_samples.jsonl')
+    questions = load('language_samples.jsonl')
+    accuracy(samples, questions)
+    calls(samples, questions)
+
+
+if __name__ == '__main__':
+    main()
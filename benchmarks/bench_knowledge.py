@@ -0,0 +1,66 @@
+"""Build the knowledge index from knowledge/ and time retrieval on the caller
+questions in the language fixtures: how long a top-k search takes and how
+many questions would be answered from the index, grounded or left to Gemini.
+
+The curated documents carry sample questions written from the same kinds
+of questions as the fixtures, so the answered share here is an upper bound.
+
+Run from the repository root:
+    python -m benchmarks.bench_knowledge
+"""
+import json
+import os
+import tempfile
+import time
+
+from app.services.knowledge_index import KnowledgeIndex, build_index, load_documents
+from config import Config
+
+DOCUMENTS = os.path.join(os.path.dirname(__file__), os.pardir, 'knowledge')
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'language_samples.jsonl')
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main(rounds=200):
+    with open(FIXTURES, encoding='utf-8') as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+    directory = tempfile.mkdtemp(prefix='kisan-knowledge-')
+
+    documents = load_documents(DOCUMENTS)
+    started = time.perf_counter()
+    manifest = build_index(documents, directory)
+    built = time.perf_counter() - started
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"Index:     {len(documents)} documents, {manifest['passages']} passages, "
+          f"{len(manifest['vocabulary'])} terms, {size / 1024:.0f} KB on disk, built in {built * 1000:.0f} ms")
+
+    index = KnowledgeIndex(directory)
+    timings = []
+    for _ in range(rounds):
+        for question in questions:
+            started = time.perf_counter()
+            index.search(question['text'], k=Config.KNOWLEDGE_TOP_K, min_coverage=Config.KNOWLEDGE_MIN_COVERAGE)
+            timings.append(time.perf_counter() - started)
+    print(f"Search:    p50 {percentile(timings, 50) * 1e6:.0f} us, p99 {percentile(timings, 99) * 1e6:.0f} us, "
+          f"max {max(timings) * 1e6:.0f} us over {len(timings)} searches (k={Config.KNOWLEDGE_TOP_K})")
+
+    outcomes = {'answered': 0, 'grounded': 0, 'miss': 0}
+    for question in questions:
+        passages = index.search(question['text'], k=Config.KNOWLEDGE_TOP_K, min_coverage=Config.KNOWLEDGE_MIN_COVERAGE)
+        best = passages[0] if passages else None
+        if (best and best.answer and best.language == question['language']
+                and best.confidence >= Config.KNOWLEDGE_ANSWER_CONFIDENCE):
+            outcomes['answered'] += 1
+        else:
+            outcomes['grounded' if passages else 'miss'] += 1
+    print("Outcomes:  " + ", ".join(
+        f"{name} {count} ({count / len(questions):.0%})" for name, count in outcomes.items()
+    ) + f" of {len(questions)} fixture questions")
+
+
+if __name__ == '__main__':
+    main()
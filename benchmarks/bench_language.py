@@ -0,0 +1,72 @@
+"""Accuracy and speed of language detection against the hi/mr/en fixture set.
+
+Run from the repository root:
+    python -m benchmarks.bench_language
+"""
+import json
+import os
+import re
+import timeit
+
+from app.utils.language import detect_language
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'language_samples.jsonl')
+
+
+def legacy_detect_language(text):
+    """The regex-per-word detector this module replaced, kept for comparison"""
+    hindi_words = [
+        r'खेती', r'फसल', r'पानी', r'बीज', r'मौसम', r'किसान',
+        r'मैं', r'हमारे', r'कैसे', r'क्या', r'कब', r'कहाँ',
+        r'बताओ', r'समस्या', r'मदद', r'धन्यवाद', r'नमस्ते'
+    ]
+    marathi_words = [
+        r'शेती', r'पीक', r'पाणी', r'बी', r'हवामान', r'शेतकरी',
+        r'मी', r'आमचे', r'कसे', r'काय', r'केव्हा', r'कुठे',
+        r'सांगा', r'समस्या', r'मदत', r'धन्यवाद', r'नमस्कार'
+    ]
+    hindi_matches = sum(1 for word in hindi_words if re.search(word, text))
+    marathi_matches = sum(1 for word in marathi_words if re.search(word, text))
+    english_words = len(re.findall(r'\b[a-zA-Z]+\b', text))
+    if hindi_matches > marathi_matches and hindi_matches > english_words:
+        return 'hi-IN'
+    elif marathi_matches > hindi_matches and marathi_matches > english_words:
+        return 'mr-IN'
+    elif english_words > 2:
+        return 'en-IN'
+    else:
+        return 'hi-IN'
+
+
+def load_samples():
+    with open(FIXTURES, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def accuracy(detector, samples):
+    correct = {}
+    total = {}
+    for sample in samples:
+        language = sample['language']
+        total[language] = total.get(language, 0) + 1
+        if detector(sample['text']) == language:
+            correct[language] = correct.get(language, 0) + 1
+    overall = sum(correct.values()) / len(samples)
+    return overall, {language: correct.get(language, 0) / count for language, count in total.items()}
+
+
+def main():
+    samples = load_samples()
+    texts = [sample['text'] for sample in samples]
+
+    for name, detector in [('legacy', legacy_detect_language), ('current', detect_language)]:
+        overall, per_language = accuracy(detector, samples)
+        runs = 200
+        seconds = timeit.timeit(lambda: [detector(text) for text in texts], number=runs)
+        per_call_us = seconds / (runs * len(texts)) * 1e6
+        breakdown = ', '.join(f"{language} {score:.0%}" for language, score in sorted(per_language.items()))
+        print(f"{name:8} accuracy {overall:.1%} ({breakdown}), {per_call_us:.1f} us/utterance")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Call ledger: cost of recording a call on the request path, and query latency at millions of rows.
+
+Fills a fresh ledger with synthetic finished calls spread over a year
+(status, language and direction mixes roughly like production, numbers
+from a pool of callers), then times the queries behind /calls and
+/calls/stats: the first page, a page deep into the ledger reached by
+cursor, pages filtered by status and by phone number, and the stats by
+status and by day from the daily rollup, a day by hour from the hourly
+one, against the same aggregate computed from the calls table.
+
+Run from the repository root:
+    python -m benchmarks.bench_ledger
+    python -m benchmarks.bench_ledger --rows 3000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.services.call_ledger import CallLedger
+
+STATUSES = [('completed', 0.8), ('no-answer', 0.1), ('busy', 0.06), ('failed', 0.04)]
+LANGUAGES = [('hi-IN', 0.7), ('mr-IN', 0.25), ('en-IN', 0.05)]
+YEAR = 365 * 86400
+
+
+def timed(query, repeat=20):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def fill(ledger, rows, batch=5000):
+    rng = random.Random(1)
+    statuses, status_weights = zip(*STATUSES)
+    languages, language_weights = zip(*LANGUAGES)
+    start = time.time() - YEAR
+    written = 0
+    while written < rows:
+        size = min(batch, rows - written)
+        ended = sorted(start + rng.random() * YEAR for _ in range(size))
+        ledger._write([
+            (
+                f'CA{written + index:032x}', f'+9198{rng.randrange(200000):08d}',
+                'outbound' if rng.random() < 0.3 else 'inbound',
+                rng.choices(languages, language_weights)[0],
+                rng.choices(statuses, status_weights)[0],
+                ended_at - 120, ended_at, 120.0, rng.randrange(8)
+            )
+            for index, ended_at in enumerate(ended)
+        ])
+        written += size
+
+
+def main(rows=1000000):
+    path = os.path.join(tempfile.mkdtemp(), 'calls.db')
+    ledger = CallLedger(path, max_queue=100000, utc_offset_minutes=330)
+
+    timings = []
+    for index in range(10000):
+        started = time.perf_counter()
+        ledger.record(f'CArecord{index}', 'completed', ended_at=time.time(), duration=60, phone_number='+919800000001')
+        timings.append(time.perf_counter() - started)
+    print(f"record() on the request path: p50 {statistics.median(timings) * 1e6:.1f} us")
+    time.sleep(2)
+
+    started = time.perf_counter()
+    fill(ledger, rows)
+    print(f"Filled {rows} calls in {time.perf_counter() - started:.0f} s, "
+          f"{os.path.getsize(path) / 2 ** 20:.0f} MB")
+
+    first, _ = ledger.calls(limit=50)
+    # The cursor a long walk through the pages would reach halfway
+    conn = ledger._get_connection()
+    middle = conn.execute('SELECT started_at, id FROM calls ORDER BY started_at LIMIT 1 OFFSET ?', (rows // 2,)).fetchone()
+    deep = f"{middle['started_at']!r}:{middle['id']}"
+    number = first[0]['phone_number']
+    day = ledger.stats('day')[-2]['day']
+    results = [
+        ('first page', timed(lambda: ledger.calls(limit=50))),
+        ('page in the middle by cursor', timed(lambda: ledger.calls(limit=50, cursor=deep))),
+        ('same page by OFFSET', timed(lambda: conn.execute(
+            'SELECT * FROM calls ORDER BY started_at DESC, id DESC LIMIT 50 OFFSET ?', (rows // 2,)
+        ).fetchall(), repeat=5)),
+        ('failed calls, first page', timed(lambda: ledger.calls(limit=50, status='failed'))),
+        ('one caller, all pages', timed(lambda: ledger.calls(limit=500, phone_number=number))),
+        ('stats by status, rollup', timed(lambda: ledger.stats('status'))),
+        ('stats by day, rollup', timed(lambda: ledger.stats('day'))),
+        ('one day by hour, rollup', timed(lambda: ledger.stats('hour', since=day, until=day + 86400))),
+        ('stats by status, calls table', timed(lambda: conn.execute(
+            'SELECT status, COUNT(*), SUM(duration), SUM(turns) FROM calls GROUP BY status'
+        ).fetchall(), repeat=5)),
+    ]
+    for name, milliseconds in results:
+        print(f"  {name:>30}: {milliseconds:8.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    main(parser.parse_args().rows)
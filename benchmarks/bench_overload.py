@@ -0,0 +1,138 @@
+"""Callers keep asking while Gemini degrades and recovers, with and without overload protection.
+
+A stand-in model answers quickly, then turns slow and mostly failing, then
+recovers. Caller threads ask at a steady rate through GeminiService, once
+with the circuit breaker and adaptive concurrency limit as configured and
+once with both disabled. Reports how many model calls were in flight at
+worst, how long turns held their webhook, how turns ended (held means
+Overloaded reached the route, which holds and offers a callback) and the
+circuit's state changes.
+
+Run from the repository root:
+    python -m benchmarks.bench_overload
+"""
+import os
+
+os.environ.update(
+    LLM_BACKEND='stub', SESSION_STORE_URL='memory://', LLM_WORKERS='400',
+    TURN_BUDGET='4', LLM_HEDGE_AFTER='2', LLM_TARGET_LATENCY='1', LLM_CIRCUIT_OPEN_SECONDS='2'
+)
+
+import random
+import threading
+import time
+
+from app.services.gemini_service import GeminiService
+from app.services.llm_stub import StubResponse
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.overload import AdaptiveLimit, CircuitBreaker, Overloaded
+from config import Config
+
+POPULAR = ['गेहूं की बुवाई कब करें', 'धान में कौन सी खाद डालें', 'गाय का दूध कैसे बढ़ाएं', 'टमाटर में कीड़े लगे हैं']
+# (until second, latency, share of calls failing)
+PHASES = [(4, 0.3, 0.0), (12, 3.0, 0.6), (20, 0.3, 0.0)]
+
+
+class DegradingModel:
+    """Healthy, then slow and mostly failing, then healthy again; counts calls in flight"""
+
+    def __init__(self, started):
+        self.started = started
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self._random = random.Random(1)
+        self._lock = threading.Lock()
+
+    def phase(self):
+        elapsed = time.monotonic() - self.started
+        for until, latency, failures in PHASES:
+            if elapsed < until:
+                return latency, failures
+        return PHASES[-1][1:]
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        latency, failures = self.phase()
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.in_flight)
+            failed = self._random.random() < failures
+        try:
+            time.sleep(latency)
+            if failed:
+                raise RuntimeError('503 model overloaded')
+            return StubResponse("अच्छा सवाल है। पहले ये बताओ कितनी जमीन है?")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def run(name, guarded, rate=25):
+    service = GeminiService()
+    if not guarded:
+        service.breaker = CircuitBreaker(f'{name}', failure_rate=2.0)
+        service.limit = AdaptiveLimit(initial=10 ** 6, min_limit=10 ** 6, max_limit=10 ** 6)
+    transitions = []
+    breaker_transition = service.breaker._transition
+
+    def record_transition(state):
+        transitions.append((time.monotonic() - model.started, service.breaker.state, state))
+        breaker_transition(state)
+
+    service.breaker._transition = record_transition
+
+    rng = random.Random(2)
+    outcomes = {'answered': 0, 'apology': 0, 'deadline': 0, 'held': 0}
+    held_for = []
+    lock = threading.Lock()
+    # Warm the cache with the popular questions, as a day of calls would
+    service.model = DegradingModel(time.monotonic())
+    for question in POPULAR:
+        service.get_response(question, language='hi-IN')
+    model = service.model = DegradingModel(time.monotonic())
+
+    def caller(index):
+        question = rng.choice(POPULAR) if rng.random() < 0.3 else f'मेरे खेत का सवाल नंबर {index}'
+        started = time.monotonic()
+        try:
+            text = service.get_response(question, language='hi-IN', call_sid=f'CA{index}', deadline=Deadline(Config.TURN_BUDGET))
+            outcome = 'apology' if text.startswith('मैं समझ नहीं पाई') else 'answered'
+        except DeadlineExceeded:
+            outcome = 'deadline'
+        except Overloaded:
+            outcome = 'held'
+        with lock:
+            outcomes[outcome] += 1
+            held_for.append(time.monotonic() - started)
+
+    threads = []
+    total = int(PHASES[-1][0] * rate)
+    for index in range(total):
+        thread = threading.Thread(target=caller, args=(index,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(1 / rate)
+    for thread in threads:
+        thread.join()
+    service.executor.shutdown(wait=True)
+
+    held_for.sort()
+    print(f"{name}: {total} turns at {rate}/s over {PHASES[-1][0]} s, {model.calls} model calls, "
+          f"peak {model.peak} in flight")
+    print(f"  webhook held p50 {held_for[len(held_for) // 2]:.2f} s, p99 {held_for[int(len(held_for) * 0.99)]:.2f} s, "
+          f"{sum(held_for):.0f} worker-seconds in total")
+    print("  " + ", ".join(f"{key} {value}" for key, value in outcomes.items()))
+    for at, previous, state in transitions:
+        print(f"  {at:5.1f} s  {previous} -> {state}")
+
+
+def main():
+    print(f"Gemini healthy for {PHASES[0][0]} s, then {PHASES[1][1]:.0f} s calls with "
+          f"{PHASES[1][2]:.0%} failing until {PHASES[1][0]} s, then healthy again")
+    run('unguarded', guarded=False)
+    run('guarded', guarded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Bytes sent to Gemini per turn and time to build the request: the old single
+f-string prompt against per-call chat sessions with a prebuilt persona.
+
+The persona is still sent with every turn, so bytes per turn only drop by
+the whitespace trimmed from it; the saving is mostly in build time.
+
+Sizes are the contents of a generateContent request (the generation config
+is the same for both): compact UTF-8 JSON, and the body the SDK's REST
+transport actually sends, which json_format writes indented with every
+Devanagari character escaped.
+
+Run from the repository root:
+    python -m benchmarks.bench_prompt_bytes
+"""
+import json
+import os
+import random
+import timeit
+
+from google.generativeai.types import content_types
+from google.protobuf import json_format
+import google.ai.generativelanguage as glm
+
+from app.services.chat_sessions import ChatSessionPool, build_persona
+from app.services.context_manager import ConversationContext
+from app.utils.history import Exchange
+from app.utils.session_store import MemoryBackend
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'language_samples.jsonl')
+
+# The prompt GeminiService rebuilt on every turn before chat sessions, verbatim
+LEGACY_PROMPT = """
+        You are Diksha (दीक्षा), a female farming expert. Remember:
+        1. You have complete memory of the conversation
+        2. Use previous context to give better answers
+        3. Speak naturally in simple Hindi like local women
+        4. Give practical farming advice based on previous answers
+        5. Ask logical next questions based on conversation flow
+        6. answer short and concise
+        7. you can help regarding the questions like Milk , goats , cows , buffaloes , etc.
+        8. you can also help regarding the questions like selling and
+         buying of crop, doing fish farming, poultry farming, etc.
+        9. analyze the user question properly and answer accordingly.
+        
+        Complete conversation so far:
+        {conversation_context}
+        
+        Current user message: {user_input}
+
+        Example of good conversation flow:
+        User: मैं टमाटर की खेती करना चाहता हूं
+        Diksha: अच्छा, मैं टमाटर की खेती में मदद करूंगी। बताओ कितनी जमीन में लगाना है?
+
+        User: दो एकड़ में
+        Diksha: दो एकड़ के लिए करीब 8000-9000 पौधे लगेंगे। अभी मैं सिंचाई के बारे में पूछना चाहती हूं। बताओ पानी का क्या इंतजाम है?
+
+        User: मेरे पास कुआं है
+        Diksha: अच्छा, कुएं का पानी है। मैं आपको ड्रिप इरिगेशन का सुझाव दूंगी। पहले ये बताओ कुएं में पानी का लेवल कैसा है?
+
+        User: पानी अच्छा है, 20 फीट पर मिल जाता है
+        Diksha: बहुत बढ़िया! पानी अच्छा है तो टमाटर की खेती अच्छी होगी। अब मैं मिट्टी के बारे में पूछना चाहती हूं। पिछली बार कौन सी फसल लगाई थी?
+
+        Respond naturally as Diksha, using conversation history for context:"""
+
+ANSWER = "अच्छा, इसके लिए पहले मिट्टी की जांच करवा लो। बताओ पिछली बार कौन सी फसल लगाई थी?"
+
+
+class LegacyPrompt:
+    """Rebuilds the whole prompt from the stored history on every turn"""
+
+    def __init__(self, context):
+        self.context = context
+
+    def contents(self, user_input, history, call_sid):
+        summary, recent = self.context.turns(history, call_sid=call_sid)
+        conversation = self.context.render(summary, recent)
+        prompt = LEGACY_PROMPT.format(conversation_context=conversation, user_input=user_input)
+        return [{'role': 'user', 'parts': [prompt]}]
+
+
+def request_bytes(contents):
+    body = {'contents': [{'role': c['role'], 'parts': [{'text': p} for p in c['parts']]} for c in contents]}
+    return len(json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def wire_bytes(contents):
+    request = glm.GenerateContentRequest(model='models/gemini-2.0-flash', contents=content_types.to_contents(contents))
+    return len(json_format.MessageToJson(type(request).pb(request)).encode('utf-8'))
+
+
+def conversation(turns, seed):
+    with open(FIXTURES, encoding='utf-8') as f:
+        samples = [json.loads(line)['text'] for line in f if line.strip()]
+    rng = random.Random(seed)
+    return [rng.choice(samples) for _ in range(turns)]
+
+
+def main(turns=12, calls=20):
+    legacy = LegacyPrompt(ConversationContext(MemoryBackend()))
+    pool = ChatSessionPool(ConversationContext(MemoryBackend()))
+
+    before, after, wire_before, wire_after = [], [], [], []
+    for call in range(calls):
+        call_sid = f'CA{call}'
+        history = []
+        for utterance in conversation(turns, call):
+            old = legacy.contents(utterance, history, call_sid)
+            session = pool.session(call_sid, history, 'hi-IN')
+            new = pool.contents(session, utterance)
+            before.append(request_bytes(old))
+            after.append(request_bytes(new))
+            wire_before.append(wire_bytes(old))
+            wire_after.append(wire_bytes(new))
+            pool.record(call_sid, len(history), utterance, ANSWER)
+            history.append(Exchange(utterance, ANSWER, turn=len(history) + 1))
+
+    static_before = request_bytes([{'role': 'user', 'parts': [
+        LEGACY_PROMPT.format(conversation_context='', user_input='')
+    ]}])
+    static_after = request_bytes([{'role': 'user', 'parts': [build_persona('hi-IN')]}])
+    print(f"Static prefix:  {static_before} bytes before, {static_after} bytes after, sent on every turn")
+    print(f"Bytes per turn: {sum(before) / len(before):.0f} before, {sum(after) / len(after):.0f} after "
+          f"({1 - sum(after) / sum(before):.1%} less) over {len(before)} turns")
+    print(f"REST body:      {sum(wire_before) / len(wire_before):.0f} before, "
+          f"{sum(wire_after) / len(wire_after):.0f} after ({1 - sum(wire_after) / sum(wire_before):.1%} less)")
+
+    history = [Exchange(u, ANSWER, turn=i + 1) for i, u in enumerate(conversation(turns, 0))]
+    legacy_time = timeit.timeit(lambda: legacy.contents('नया सवाल', history, 'CAT'), number=2000) / 2000
+    session = pool.session('CAT', history, 'hi-IN')
+    session_time = timeit.timeit(lambda: pool.contents(session, 'नया सवाल'), number=2000) / 2000
+    print(f"Request build:  {legacy_time * 1e6:.1f} us before, {session_time * 1e6:.1f} us after")
+    print(f"Rehydrations:   {pool.rehydrations} for {calls} calls of {turns} turns")
+
+
+if __name__ == '__main__':
+    main()
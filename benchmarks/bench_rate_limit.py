@@ -0,0 +1,124 @@
+"""Rate limits: cost of a check per store, and whether a limit holds across processes.
+
+Times one token bucket check on each session store backend (Redis is
+fakeredis in this process, so the number leaves out the network round
+trip; skipped unless fakeredis and lupa are installed). Then several processes hammer one caller's bucket through a shared
+SQLite store, and again with each process keeping its buckets in memory
+as the fallback does, and counts how many requests got through against
+what the limit allows. Last, times a /voice turn refused by the caller's
+limit against one that reaches the stub model.
+
+Run from the repository root:
+    python -m benchmarks.bench_rate_limit
+"""
+import os
+
+CALLER_BURST = 6
+os.environ.update(
+    LLM_BACKEND='stub', LLM_STUB_LATENCY='0.5', SESSION_STORE_URL='memory://',
+    RESPONSE_CACHE_MAX_ENTRIES='0', KNOWLEDGE_INDEX_DIR=os.path.join(os.sep, 'nonexistent'),
+    RATE_LIMIT_CALLER_PER_MINUTE='12', RATE_LIMIT_CALLER_BURST=str(CALLER_BURST)
+)
+
+import multiprocessing
+import statistics
+import tempfile
+import time
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+from app.utils.rate_limit import RateLimiter
+from app.utils.session_store import MemoryBackend, RedisBackend, SQLiteBackend
+
+PER_MINUTE, BURST = 120, 10
+
+
+def fake_redis():
+    backend = RedisBackend.__new__(RedisBackend)
+    backend.client = fakeredis.FakeRedis()
+    backend.prefix = 'kisan:'
+    backend._take = backend.client.register_script(RedisBackend.TAKE_SCRIPT)
+    return backend
+
+
+def check_latency(backend, checks=5000):
+    limiter = RateLimiter(backend, {'caller': (PER_MINUTE, BURST)})
+    timings = []
+    for index in range(checks):
+        started = time.perf_counter()
+        limiter.check(('caller', f'+9198{index % 500:08d}'))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+def hammer(path, seconds, results):
+    backend = SQLiteBackend(path) if path else MemoryBackend()
+    limiter = RateLimiter(backend, {'caller': (PER_MINUTE, BURST)})
+    allowed = 0
+    until = time.time() + seconds
+    while time.time() < until:
+        if limiter.check(('caller', '+919800000001')) is None:
+            allowed += 1
+        time.sleep(0.001)
+    results.put(allowed)
+
+
+def enforcement(processes, seconds, path):
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=hammer, args=(path, seconds, results)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(results.get() for _ in workers)
+
+
+def turn_cost(turns=20):
+    from app import create_app
+    app = create_app()
+    client = app.test_client()
+    client.environ_base['wsgi.url_scheme'] = 'https'
+    timings = {'answered': [], 'refused': []}
+    for index in range(turns):
+        started = time.perf_counter()
+        client.post(
+            '/voice',
+            data={'CallSid': 'CA1', 'From': '+919800000001', 'SpeechResult': f'गेहूं में खाद कब डालें {index}'},
+            headers={'I-Twilio-Idempotency-Token': f'turn-{index}'}
+        )
+        timings['answered' if index < CALLER_BURST else 'refused'].append(time.perf_counter() - started)
+    return {key: statistics.median(values) for key, values in timings.items()}
+
+
+def main(processes=4, seconds=5):
+    print(f"Bucket of {BURST}, refilled at {PER_MINUTE}/min")
+    backends = [
+        ('memory', MemoryBackend()),
+        ('sqlite', SQLiteBackend(os.path.join(tempfile.mkdtemp(), 'limits.db')))
+    ]
+    if fakeredis:
+        backends.append(('fakeredis + Lua', fake_redis()))
+    else:
+        print("  fakeredis is not installed (pip install fakeredis lupa); skipping Redis")
+    for name, backend in backends:
+        p50, p99 = check_latency(backend)
+        print(f"  {name:>16} check p50 {p50 * 1e6:.0f} us, p99 {p99 * 1e6:.0f} us")
+
+    limit = BURST + PER_MINUTE / 60 * seconds
+    print(f"{processes} processes hammering one caller for {seconds} s, the limit allows {limit:.0f}")
+    shared = enforcement(processes, seconds, os.path.join(tempfile.mkdtemp(), 'limits.db'))
+    print(f"  shared sqlite store: {shared} allowed")
+    local = enforcement(processes, seconds, None)
+    print(f"  per-process memory:  {local} allowed")
+
+    cost = turn_cost()
+    print(f"/voice turn with the stub at 0.5 s: answered p50 {cost['answered'] * 1000:.0f} ms, "
+          f"refused by the caller limit p50 {cost['refused'] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Speculative answers: simulated calls with speculation off and on.
+
+A scripted model stands in for Gemini: each answer takes MODEL_LATENCY and
+ends in a yes/no question or an open one. Simulated callers listen for
+PLAYBACK seconds, then reply. To a yes/no question they say yes or no in
+one of a few ways most of the time. Otherwise, and to open questions, they
+say something free-form. Reports turn latency for turns served
+speculatively against those that waited on the model, the hit rate, and
+model calls and estimated tokens spent, used and wasted.
+
+Run from the repository root:
+    python -m benchmarks.bench_speculation
+    python -m benchmarks.bench_speculation --calls 30
+"""
+import os
+
+MODEL_LATENCY, PLAYBACK = 0.8, 1.5
+os.environ.update(
+    LLM_BACKEND='benchmarks.bench_speculation:ScriptedModel', SESSION_STORE_URL='memory://',
+    RESPONSE_CACHE_MAX_ENTRIES='0', KNOWLEDGE_INDEX_DIR=os.path.join(os.sep, 'nonexistent'),
+    RATE_LIMIT_CALLER_PER_MINUTE='0', RATE_LIMIT_TURNS_PER_MINUTE='0', STREAMING_ENABLED='0',
+    SPECULATION_WORKERS=os.getenv('SPECULATION_WORKERS', '16')
+)
+
+import argparse
+import importlib
+import random
+import statistics
+import threading
+import time
+import uuid
+import zlib
+
+from prometheus_client import REGISTRY
+
+from app.services.llm_stub import StubResponse
+
+ANSWERS = [
+    "टमाटर के लिए ड्रिप सिंचाई अच्छी रहेगी। क्या आपके पास ड्रिप लगी है?",
+    "पीले पत्तों के लिए जिंक सल्फेट डालो। पानी खेत में भरा रहता है क्या?",
+    "गाय को खनिज मिश्रण रोज दो। गाय को हरा चारा मिलता है?",
+    "दो एकड़ के लिए आठ हजार पौधे लगेंगे। बताओ पानी का क्या इंतजाम है?",
+    "गेहूं नवंबर में बोना ठीक रहेगा। कौन सी किस्म लगाना चाहते हो?",
+    "मुर्गियों का टीकाकरण समय पर कराओ। कितनी मुर्गियां हैं अभी?",
+]
+YES_NO_REPLIES = ['हां', 'जी हां', 'हां है', 'नहीं', 'नहीं है', 'जी नहीं']
+
+
+class ScriptedModel:
+    """Answers after MODEL_LATENCY, picked from ANSWERS by the latest message; counts its calls"""
+
+    calls = 0
+    lock = threading.Lock()
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        with ScriptedModel.lock:
+            ScriptedModel.calls += 1
+        time.sleep(MODEL_LATENCY)
+        message = contents[-1]['parts'][-1]
+        return StubResponse(ANSWERS[zlib.crc32(message.encode('utf-8')) % len(ANSWERS)])
+
+
+def metric(name, label):
+    values = {}
+    for family in REGISTRY.collect():
+        if family.name == name:
+            for sample in family.samples:
+                if sample.name.endswith('_total'):
+                    values[sample.labels[label]] = sample.value
+    return values
+
+
+def caller(client, rng, turns, timings):
+    call_sid = 'CA' + uuid.uuid4().hex
+    answer = "नमस्ते?"
+    for turn in range(turns):
+        yes_no = not any(word in answer for word in ('क्या इंतजाम', 'कौन', 'कितनी'))
+        if yes_no and rng.random() < 0.8:
+            speech = rng.choice(YES_NO_REPLIES)
+        else:
+            speech = f"मेरे खेत में {rng.choice(['गेहूं', 'धान', 'टमाटर', 'सरसों'])} है, सवाल {turn}"
+        time.sleep(PLAYBACK)
+        started = time.perf_counter()
+        response = client.post(
+            '/voice',
+            data={'CallSid': call_sid, 'From': f'+9198{rng.randrange(10 ** 8):08d}', 'SpeechResult': speech},
+            headers={'I-Twilio-Idempotency-Token': uuid.uuid4().hex}
+        )
+        timings.append((time.perf_counter() - started, speech))
+        answer = next(
+            (candidate for candidate in ANSWERS
+             if candidate.encode('ascii', 'xmlcharrefreplace').decode('ascii').split('।')[-1] in response.get_data(as_text=True)),
+            answer
+        )
+
+
+def run(app, model, enabled, calls, turns):
+    from config import Config
+    Config.SPECULATION_ENABLED = enabled
+    before_calls = model.calls
+    before_turns = metric('kisan_turns', 'outcome')
+    before_tokens = metric('kisan_speculation_tokens', 'use')
+    before_speculations = metric('kisan_speculations', 'result')
+    timings = []
+    threads = []
+    for index in range(calls):
+        client = app.test_client()
+        client.environ_base['wsgi.url_scheme'] = 'https'
+        thread = threading.Thread(target=caller, args=(client, random.Random(index), turns, timings))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    time.sleep(MODEL_LATENCY * 2)
+
+    outcomes = {key: value - before_turns.get(key, 0) for key, value in metric('kisan_turns', 'outcome').items()}
+    tokens = {key: value - before_tokens.get(key, 0) for key, value in metric('kisan_speculation_tokens', 'use').items()}
+    speculations = {key: value - before_speculations.get(key, 0) for key, value in metric('kisan_speculations', 'result').items()}
+    latencies = sorted(latency for latency, _ in timings)
+    fast = [latency for latency in latencies if latency < MODEL_LATENCY / 2]
+    slow = [latency for latency in latencies if latency >= MODEL_LATENCY / 2]
+    print(f"speculation {'on' if enabled else 'off'}: {len(timings)} turns, {model.calls - before_calls} model calls")
+    print("  turns: " + ", ".join(f"{key} {value:.0f}" for key, value in sorted(outcomes.items()) if value))
+    print(f"  turn latency p50 {statistics.median(latencies) * 1000:.0f} ms, mean {statistics.mean(latencies) * 1000:.0f} ms; "
+          f"served without waiting {len(fast)}"
+          + (f" (p50 {statistics.median(fast) * 1000:.1f} ms)" if fast else "")
+          + (f", waited on the model {len(slow)} (p50 {statistics.median(slow) * 1000:.0f} ms)" if slow else ""))
+    if enabled:
+        print("  speculative answers: " + ", ".join(f"{key} {value:.0f}" for key, value in sorted(speculations.items()) if value))
+        used, wasted = tokens.get('used', 0), tokens.get('wasted', 0)
+        print(f"  estimated speculative tokens: used {used:.0f}, wasted {wasted:.0f} "
+              f"({wasted / (used + wasted):.0%} of those spent)" if used + wasted else "  no speculative tokens spent")
+
+
+def main(calls=10, turns=5):
+    from app import create_app
+    app = create_app()
+    # Run with -m this file is __main__; the service built its model from the module imported by name
+    model = importlib.import_module('benchmarks.bench_speculation').ScriptedModel
+    lookups = metric('kisan_speculation_lookups', 'result')
+    print(f"{calls} calls x {turns} turns, model {MODEL_LATENCY * 1000:.0f} ms, playback {PLAYBACK} s")
+    run(app, model, False, calls, turns)
+    run(app, model, True, calls, turns)
+    lookups = {key: value - lookups.get(key, 0) for key, value in metric('kisan_speculation_lookups', 'result').items()}
+    looked_up = sum(lookups.values())
+    if looked_up:
+        print(f"  hit rate {lookups.get('hit', 0) / looked_up:.0%} of {looked_up:.0f} turns with answers waiting")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=10, help="Simulated calls at once")
+    parser.add_argument('--turns', type=int, default=5)
+    args = parser.parse_args()
+    main(args.calls, args.turns)
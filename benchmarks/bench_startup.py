@@ -0,0 +1,129 @@
+"""Startup: from starting gunicorn to the first served turn, with and without preload and warm-up.
+
+Starts gunicorn with gunicorn.conf.py and the stub LLM backend, polls
+/voice with a caller's utterance until one is answered, waits for every
+worker to boot, then sends a batch of concurrent turns so every worker
+serves its first turns. Reports time to the first answered turn, how long
+those first turns took against turns once the workers are warm, and the
+proportional memory (PSS) of the master and workers together.
+
+The stub opens no connections, so the Gemini and Twilio connection warm-up
+is not in these numbers: it saves the TCP and TLS handshakes on each
+worker's first real call, which only shows against the real APIs.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+"""
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import requests
+
+SPEECH = "मुझे गेहूं की खेती के बारे में जानकारी चाहिए"
+MODES = {
+    'cold': {'GUNICORN_PRELOAD': '0', 'GUNICORN_WARM_UP': '0'},
+    'preload + warm-up': {'GUNICORN_PRELOAD': '1', 'GUNICORN_WARM_UP': '1'},
+}
+
+
+def turn(url, call_sid=None):
+    response = requests.post(
+        url + '/voice',
+        data={'CallSid': call_sid or 'CA' + uuid.uuid4().hex, 'SpeechResult': f"{SPEECH} {uuid.uuid4().hex[:8]}"},
+        headers={'X-Forwarded-Proto': 'https'},
+        timeout=30
+    )
+    return response.status_code == 200 and b'<Say' in response.content
+
+
+def pss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        found.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return found
+
+
+def run(name, overrides, workers, port, callers):
+    env = dict(os.environ)
+    env.update(
+        GUNICORN_WORKER_CLASS='gevent', GUNICORN_WORKERS=str(workers), GUNICORN_BIND=f'127.0.0.1:{port}',
+        LLM_BACKEND='stub', LLM_STUB_LATENCY='0.05', STREAMING_ENABLED='0', SESSION_STORE_URL='memory://',
+        **overrides
+    )
+    url = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {server.returncode}; is port {port} free?")
+            try:
+                if turn(url):
+                    break
+            except requests.RequestException:
+                time.sleep(0.02)
+        first = time.perf_counter() - started
+        # Let every worker finish booting, so the next turns measure first use rather than a queue
+        while len(children(server.pid)) < workers:
+            time.sleep(0.05)
+        time.sleep(2.0)
+
+        def timed(results):
+            began = time.perf_counter()
+            ok = turn(url)
+            results.append((time.perf_counter() - began, ok))
+
+        batches = []
+        for _ in range(2):
+            results = []
+            threads = [threading.Thread(target=timed, args=(results,)) for _ in range(callers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            batches.append(results)
+        memory = sum(pss_kb(pid) for pid in [server.pid] + children(server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+    early, warm = ([latency for latency, ok in batch if ok] for batch in batches)
+    print(f"{name:>18}: first turn served {first:.2f} s after start, PSS {memory / 1024:.0f} MB")
+    print(f"{'':>18}  first {callers} turns p50 {statistics.median(early) * 1000:.0f} ms, "
+          f"max {max(early) * 1000:.0f} ms; warm p50 {statistics.median(warm) * 1000:.0f} ms, "
+          f"max {max(warm) * 1000:.0f} ms")
+
+
+def main(workers=4, callers=16):
+    print(f"gevent x{workers}, stub latency 50 ms")
+    for index, (name, overrides) in enumerate(MODES.items()):
+        run(name, overrides, workers, 5070 + index, callers)
+
+
+if __name__ == '__main__':
+    main()
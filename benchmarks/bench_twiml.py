@@ -0,0 +1,72 @@
+"""Golden check and render time of the prebuilt TwiML templates against the twilio builder.
+
+Run from the repository root:
+    python -m benchmarks.bench_twiml
+"""
+import random
+import sys
+import timeit
+
+from app.utils.twiml import (
+    ERROR_MESSAGE, TwimlRenderer, build_answer, build_message, build_partial, build_welcome
+)
+
+LANGUAGES = ['hi-IN', 'mr-IN', 'en-IN']
+
+SENTENCES = [
+    'दो एकड़ के लिए करीब 8000-9000 पौधे लगेंगे।',
+    'बताओ पानी का क्या इंतजाम है?',
+    'मी तुम्हाला ठिबक सिंचनाचा सल्ला देईन.',
+    'Use 2.5 kg urea & 1 kg DAP per acre.',
+    'pH < 6 or > 8 needs "treatment" first।',
+    'बहुत बढ़िया!',
+]
+
+
+def golden_cases(count=500, seed=7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        language = rng.choice(LANGUAGES)
+        sentences = rng.sample(SENTENCES, rng.randint(0, len(SENTENCES)))
+        url = f"/voice/continue?turn={rng.getrandbits(48):012x}&pos={rng.randint(0, 9)}&lang={language}&hops=1"
+        yield language, sentences, url
+
+
+def check_golden(renderer):
+    """Return the number of cases where the renderer differs from the builder"""
+    mismatches = 0
+    for language, sentences, url in golden_cases():
+        pairs = [
+            (renderer.welcome(language), build_welcome(language)),
+            (renderer.answer(sentences, language), build_answer(sentences, language)),
+            (renderer.partial(sentences, url), build_partial(sentences, url)),
+            (renderer.message(ERROR_MESSAGE), build_message(ERROR_MESSAGE)),
+        ]
+        for rendered, built in pairs:
+            if rendered.encode('utf-8') != built.encode('utf-8'):
+                mismatches += 1
+                print(f"MISMATCH\n  rendered: {rendered}\n  built:    {built}")
+    return mismatches
+
+
+def main():
+    renderer = TwimlRenderer(LANGUAGES)
+    mismatches = check_golden(renderer)
+    print(f"golden: {mismatches} mismatches")
+
+    sentences = SENTENCES[:4]
+    runs = 2000
+    for name, fn in [
+        ('builder answer', lambda: build_answer(sentences, 'hi-IN')),
+        ('renderer answer', lambda: renderer.answer(sentences, 'hi-IN')),
+        ('builder welcome', lambda: build_welcome('hi-IN')),
+        ('renderer welcome', lambda: renderer.welcome('hi-IN')),
+    ]:
+        seconds = timeit.timeit(fn, number=runs)
+        print(f"{name:17} {seconds / runs * 1e6:8.1f} us/turn")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
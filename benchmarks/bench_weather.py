@@ -0,0 +1,93 @@
+"""Weather questions from callers in many districts against the fake weather API.
+
+Several WeatherService instances share one SQLite store, like gunicorn
+workers, and the API answers slowly. Reports how long the turns took to get
+their weather facts, how many found a cached forecast, and how many requests
+reached the API for each provider.
+
+Run from the repository root:
+    python -m benchmarks.bench_weather
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+
+from app.services.weather_service import DISTRICTS, WeatherService, create_provider
+from app.utils.session_store import SessionStore, create_backend
+from benchmarks.fake_weather import FakeWeather, serve
+
+QUESTIONS = ['बारिश कब होगी', 'इस हफ्ते मौसम कैसा रहेगा', 'पाऊस कधी येईल', 'Will it rain this week']
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run(provider, port, workers=4, callers=400, duration=8.0, latency=0.5, seed=1):
+    fake = FakeWeather(latency=latency)
+    server = serve(fake, port=port)
+    store = SessionStore()
+    store.backend = create_backend(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='kisan-weather-'), 's.db')}")
+    services = [
+        WeatherService(
+            store,
+            create_provider(provider, api_key='test-key', base_url=f'http://127.0.0.1:{port}'),
+            refresh_after=duration / 2,
+            interval=0.25,
+            warm_districts=['pune', 'nashik']
+        )
+        for _ in range(workers)
+    ]
+    for service in services:
+        service.start()
+
+    rng = random.Random(seed)
+    districts = sorted(DISTRICTS)
+    timings, cold = [], 0
+    lock = threading.Lock()
+
+    def caller(index):
+        nonlocal cold
+        time.sleep(index * duration / callers)
+        service = services[index % workers]
+        call_sid = f'CA{index}'
+        service.remember_caller(call_sid, {'FromCity': rng.choice(districts).title()})
+        time.sleep(1.0)
+        for _ in range(2):
+            started = time.perf_counter()
+            note = service.note(call_sid, rng.choice(QUESTIONS))
+            elapsed = time.perf_counter() - started
+            with lock:
+                timings.append(elapsed)
+                cold += 'being fetched' in note
+            time.sleep(0.5)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for service in services:
+        service.close()
+    # Let fetches already in flight finish before the API goes away
+    time.sleep(latency * 2)
+    server.shutdown()
+
+    print(f"{provider:>15}: {len(timings)} weather turns from {len(districts)} districts, {workers} workers, "
+          f"API latency {latency * 1000:.0f} ms")
+    print(f"{'':>15}  turn lookup p50 {percentile(timings, 50) * 1000:.2f} ms, "
+          f"p99 {percentile(timings, 99) * 1000:.2f} ms, max {max(timings) * 1000:.2f} ms")
+    print(f"{'':>15}  {1 - cold / len(timings):.1%} answered from a cached forecast, "
+          f"{len(fake.requests)} API requests (one per turn would be {len(timings)})")
+
+
+def main():
+    run('open-meteo', 8093)
+    run('openweathermap', 8094)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Local stand-in for the Twilio REST API's call creation endpoint.
+
+Accepts POST /2010-04-01/Accounts/<sid>/Calls.json like Twilio and, with
+--callbacks, later posts a status callback with a random outcome so busy and
+no-answer retries can be exercised end to end. Point the app at it with
+TWILIO_API_BASE_URL=http://127.0.0.1:8081.
+
+    python -m benchmarks.fake_twilio --port 8081 --callbacks --busy 0.2 --no-answer 0.1
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CALLS_PATH = re.compile(r'^/2010-04-01/Accounts/(?P<account>[^/]+)/Calls\.json$')
+
+
+class FakeTwilio:
+    def __init__(self, callbacks=False, busy=0.0, no_answer=0.0, callback_delay=1.0, latency=0.0):
+        self.callbacks = callbacks
+        self.busy = busy
+        self.no_answer = no_answer
+        self.callback_delay = callback_delay
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def outcome(self):
+        roll = random.random()
+        if roll < self.busy:
+            return 'busy'
+        if roll < self.busy + self.no_answer:
+            return 'no-answer'
+        return 'completed'
+
+    def create_call(self, account, form):
+        if self.latency:
+            time.sleep(self.latency)
+        call_sid = 'CA' + uuid.uuid4().hex
+        with self._lock:
+            self.calls.append((time.time(), form.get('To')))
+        if self.callbacks and form.get('StatusCallback'):
+            threading.Timer(
+                self.callback_delay,
+                self.send_status,
+                args=(form['StatusCallback'], call_sid, account, self.outcome())
+            ).start()
+        return {
+            'sid': call_sid,
+            'account_sid': account,
+            'to': form.get('To'),
+            'from': form.get('From'),
+            'status': 'queued',
+            'uri': f'/2010-04-01/Accounts/{account}/Calls/{call_sid}.json'
+        }
+
+    def send_status(self, url, call_sid, account, status):
+        body = urllib.parse.urlencode({
+            'CallSid': call_sid,
+            'AccountSid': account,
+            'CallStatus': status
+        }).encode()
+        try:
+            urllib.request.urlopen(urllib.request.Request(url, data=body), timeout=5).read()
+        except Exception as e:
+            print(f"Status callback to {url} failed: {e}")
+
+    def peak_rate(self, window=1.0):
+        """Most calls created inside any window-second interval"""
+        with self._lock:
+            times = sorted(t for t, _ in self.calls)
+        peak = start = 0
+        for end, t in enumerate(times):
+            while t - times[start] >= window:
+                start += 1
+            peak = max(peak, end - start + 1)
+        return peak
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            match = CALLS_PATH.match(urllib.parse.urlparse(self.path).path)
+            length = int(self.headers.get('Content-Length', 0))
+            form = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode()))
+            if not match:
+                self.send_error(404)
+                return
+            payload = json.dumps(fake.create_call(match.group('account'), form)).encode()
+            self.send_response(201)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(fake, host='127.0.0.1', port=8081):
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Twilio REST server for local testing")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--callbacks', action='store_true', help="Post status callbacks after each call")
+    parser.add_argument('--busy', type=float, default=0.0, help="Share of calls reported busy")
+    parser.add_argument('--no-answer', type=float, default=0.0, help="Share of calls reported no-answer")
+    parser.add_argument('--callback-delay', type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake = FakeTwilio(args.callbacks, args.busy, args.no_answer, args.callback_delay)
+    serve(fake, port=args.port)
+    print(f"Fake Twilio listening on http://127.0.0.1:{args.port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{len(fake.calls)} calls created, peak {fake.peak_rate()} calls/s")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Local stand-in for the weather APIs the weather service can use.
+
+Serves Open-Meteo's GET /v1/forecast and OpenWeatherMap's GET
+/data/2.5/forecast with made-up but stable forecasts, optionally slow or
+failing, and counts every request. Point the app at it with
+WEATHER_API_BASE_URL=http://127.0.0.1:8082 and WEATHER_PROVIDER set to either.
+
+    python -m benchmarks.fake_weather --port 8082 --latency 0.5 --failures 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeWeather:
+    def __init__(self, latency=0.0, failures=0.0):
+        self.latency = latency
+        self.failures = failures
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def rain(self, latitude, longitude, day):
+        # The same place and day always get the same weather
+        rng = random.Random(f"{round(float(latitude), 2)}:{round(float(longitude), 2)}:{day}")
+        return rng.choice([0.0, 0.0, 2.0, 8.0, 25.0]), rng.randint(5, 95), rng.uniform(18, 26)
+
+    def open_meteo(self, query):
+        today = datetime.now(timezone(timedelta(hours=5, minutes=30))).date()
+        days = [today + timedelta(days=i) for i in range(int(query.get('forecast_days', 5)))]
+        rows = [self.rain(query['latitude'], query['longitude'], day.isoformat()) for day in days]
+        return {'daily': {
+            'time': [day.isoformat() for day in days],
+            'precipitation_sum': [mm for mm, _, _ in rows],
+            'precipitation_probability_max': [chance for _, chance, _ in rows],
+            'temperature_2m_min': [round(low, 1) for _, _, low in rows],
+            'temperature_2m_max': [round(low + 9, 1) for _, _, low in rows]
+        }}
+
+    def open_weather_map(self, query):
+        start = int(time.time()) // 10800 * 10800
+        slots = []
+        for i in range(40):
+            at = start + i * 10800
+            day = datetime.fromtimestamp(at + 19800, timezone.utc).date().isoformat()
+            mm, chance, low = self.rain(query['lat'], query['lon'], day)
+            slot = {'dt': at, 'pop': chance / 100, 'main': {'temp_min': round(low, 1), 'temp_max': round(low + 9, 1)}}
+            if mm:
+                slot['rain'] = {'3h': round(mm / 8, 2)}
+            slots.append(slot)
+        return {'list': slots, 'city': {'timezone': 19800}}
+
+    def handle(self, path, query):
+        """Return (status, payload) for one request"""
+        with self._lock:
+            self.requests.append((time.time(), path))
+        if self.latency:
+            time.sleep(self.latency)
+        if random.random() < self.failures:
+            return 503, {'error': 'unavailable'}
+        if path == '/v1/forecast':
+            return 200, self.open_meteo(query)
+        if path == '/data/2.5/forecast':
+            if not query.get('appid'):
+                return 401, {'cod': 401, 'message': 'Invalid API key'}
+            return 200, self.open_weather_map(query)
+        return 404, {'error': 'not found'}
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            status, body = fake.handle(url.path, dict(urllib.parse.parse_qsl(url.query)))
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(fake, host='127.0.0.1', port=8082):
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake weather API server for local testing")
+    parser.add_argument('--port', type=int, default=8082)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before every response")
+    parser.add_argument('--failures', type=float, default=0.0, help="Share of requests answered 503")
+    args = parser.parse_args()
+
+    fake = FakeWeather(args.latency, args.failures)
+    serve(fake, port=args.port)
+    print(f"Fake weather API listening on http://127.0.0.1:{args.port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{len(fake.requests)} forecast requests served")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""Capacity benchmark: N simulated phone calls against gunicorn and the Gemini stub.
+
+Every simulated call behaves like Twilio: a signed /voice webhook for the
+welcome prompt, a signed /voice/set-language with the keypad digit, a few
+signed /voice turns carrying SpeechResult with think time between them, and
+a final /voice/status callback. The app runs with DEBUG off, so signatures
+are really checked where the app checks them.
+
+Results of a scenario are compared against benchmarks/baselines/load_calls.json;
+--save-baseline records the current run there.
+
+Run from the repository root:
+    python -m benchmarks.load_calls --scenario steady
+    python -m benchmarks.load_calls --scenario steady --save-baseline
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+
+import requests
+from twilio.request_validator import RequestValidator
+
+from benchmarks.load_concurrency import start_server
+
+AUTH_TOKEN = 'load-test-auth-token'
+ACCOUNT_SID = 'AC' + '0' * 32
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'language_samples.jsonl')
+BASELINES = os.path.join(os.path.dirname(__file__), 'baselines', 'load_calls.json')
+DIGITS = {'hi-IN': '1', 'mr-IN': '2', 'en-IN': '3'}
+
+# calls placed, how many at once, turns per call, think time range and Gemini stub latency
+SCENARIOS = {
+    'steady': {
+        'calls': 120, 'concurrency': 40, 'turns': 3, 'think': (1.0, 3.0),
+        'workers': 4, 'worker_class': 'gevent',
+        'latency': 1.0, 'distribution': 'lognormal', 'jitter': 0.4
+    },
+    'slow-llm': {
+        'calls': 60, 'concurrency': 30, 'turns': 2, 'think': (1.0, 3.0),
+        'workers': 4, 'worker_class': 'gevent',
+        'latency': 3.0, 'distribution': 'lognormal', 'jitter': 0.6
+    },
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class SimulatedCall:
+    """One Twilio call: signs every webhook and records each response"""
+
+    def __init__(self, url, samples, think, rng):
+        self.url = url
+        self.validator = RequestValidator(AUTH_TOKEN)
+        self.session = requests.Session()
+        self.sample = rng.choice(samples)
+        self.samples = [s for s in samples if s['language'] == self.sample['language']]
+        self.think = think
+        self.rng = rng
+        self.base = {
+            'AccountSid': ACCOUNT_SID,
+            'CallSid': 'CA' + uuid.uuid4().hex,
+            'From': f"+9198{rng.randint(10000000, 99999999)}",
+            'To': '+911234567890',
+            'Direction': 'inbound',
+            'ApiVersion': '2010-04-01',
+            'CallStatus': 'in-progress'
+        }
+
+    def post(self, path, **fields):
+        params = dict(self.base, **fields)
+        # Twilio signs the public URL it was configured with, which is the app's BASE_URL
+        signature = self.validator.compute_signature(self.url + path, params)
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                self.url + path,
+                data=params,
+                headers={'X-Twilio-Signature': signature, 'X-Forwarded-Proto': 'https'},
+                timeout=30
+            )
+            ok = response.status_code == 200 and b'authentication error' not in response.content
+            if path != '/voice/status':
+                ok = ok and b'<Response>' in response.content
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def run(self, turns, record):
+        record('welcome', *self.post('/voice'))
+        record('set_language', *self.post('/voice/set-language', Digits=DIGITS[self.sample['language']]))
+        for _ in range(turns):
+            time.sleep(self.rng.uniform(*self.think))
+            utterance = self.rng.choice(self.samples)['text']
+            record('turn', *self.post('/voice', SpeechResult=utterance, Confidence='0.92'))
+        record('status', *self.post('/voice/status', CallStatus='completed', CallDuration='60'))
+
+
+def run_scenario(url, scenario, seed):
+    with open(FIXTURES, encoding='utf-8') as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+    results = {}
+    lock = threading.Lock()
+    pending = list(range(scenario['calls']))
+
+    def record(kind, latency, ok):
+        with lock:
+            results.setdefault(kind, []).append((latency, ok))
+
+    def worker(index):
+        while True:
+            with lock:
+                if not pending:
+                    return
+                call = pending.pop()
+            rng = random.Random(seed * 100003 + call)
+            SimulatedCall(url, samples, scenario['think'], rng).run(scenario['turns'], record)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(scenario['concurrency'])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    requests_made = sum(len(values) for values in results.values())
+    errors = sum(1 for values in results.values() for _, ok in values if not ok)
+    turns = [latency for latency, ok in results.get('turn', []) if ok]
+    return {
+        'turn_p50': percentile(turns, 50),
+        'turn_p95': percentile(turns, 95),
+        'turn_p99': percentile(turns, 99),
+        'turns_per_second': len(turns) / elapsed,
+        'requests_per_second': requests_made / elapsed,
+        'error_rate': errors / requests_made if requests_made else 0.0,
+        'requests': requests_made,
+        'duration': elapsed
+    }
+
+
+def compare(name, result, baselines, tolerance):
+    """Print the run next to its baseline; returns False if latency or errors regressed"""
+    baseline = baselines.get(name, {}).get('result')
+    healthy = True
+    print(f"{'metric':>20} {'run':>9} {'baseline':>9}")
+    for metric in ('turn_p50', 'turn_p95', 'turn_p99', 'turns_per_second', 'error_rate'):
+        value = result[metric]
+        before = baseline.get(metric) if baseline else None
+        flag = ''
+        if before is not None and value is not None:
+            if metric.startswith('turn_p') and value > before * (1 + tolerance):
+                flag = '  REGRESSION'
+            if metric == 'error_rate' and value > before + 0.01:
+                flag = '  REGRESSION'
+        healthy = healthy and not flag
+        print(f"{metric:>20} {value if value is not None else float('nan'):>9.3f} "
+              f"{before if before is not None else float('nan'):>9.3f}{flag}")
+    return healthy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated Twilio calls against a local gunicorn")
+    parser.add_argument('--scenario', default='steady', choices=sorted(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed p50/p95/p99 growth over baseline")
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    scenario = SCENARIOS[args.scenario]
+    workdir = tempfile.mkdtemp(prefix='kisan-load-')
+    url = f'http://127.0.0.1:{args.port}'
+    server, url = start_server(
+        scenario['worker_class'], scenario['workers'], args.port, scenario['latency'],
+        LLM_STUB_DISTRIBUTION=scenario['distribution'],
+        LLM_STUB_JITTER=str(scenario['jitter']),
+        LLM_STUB_SEED=str(args.seed),
+        DEBUG='0',
+        TWILIO_AUTH_TOKEN=AUTH_TOKEN,
+        BASE_URL=url,
+        SESSION_STORE_URL=f"sqlite:///{os.path.join(workdir, 'sessions.db')}",
+        CAMPAIGN_DB=os.path.join(workdir, 'campaigns.db'),
+        TRANSCRIPT_DIR=os.path.join(workdir, 'transcripts'),
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'metrics')
+    )
+    try:
+        print(f"Scenario {args.scenario}: {scenario}")
+        result = run_scenario(url, scenario, args.seed)
+    finally:
+        server.terminate()
+        server.wait()
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES, encoding='utf-8') as f:
+            baselines = json.load(f)
+    healthy = compare(args.scenario, result, baselines, args.tolerance)
+    print(f"{result['requests']} requests in {result['duration']:.1f}s, "
+          f"{result['requests_per_second']:.1f} req/s")
+
+    if args.save_baseline:
+        baselines[args.scenario] = {'scenario': scenario, 'seed': args.seed, 'result': result}
+        os.makedirs(os.path.dirname(BASELINES), exist_ok=True)
+        with open(BASELINES, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline for {args.scenario} to {BASELINES}")
+    elif not healthy:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""How many simultaneous callers one node sustains with sync and gevent workers.
+
+Starts gunicorn with gunicorn.conf.py and the stub LLM backend (fixed latency
+instead of Gemini), then holds N callers each posting one /voice turn after
+another and raises N until p95 turn latency breaks the SLO or turns fail.
+
+Run from the repository root:
+    python -m benchmarks.load_concurrency --worker-class sync
+    python -m benchmarks.load_concurrency --worker-class gevent
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import requests
+
+SPEECH = "मुझे गेहूं की खेती के बारे में जानकारी चाहिए"
+
+
+def start_server(worker_class, workers, port, latency, **overrides):
+    env = dict(os.environ)
+    env.update(
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        LLM_BACKEND='stub',
+        LLM_STUB_LATENCY=str(latency),
+        STREAMING_ENABLED='0',
+        SESSION_STORE_URL='memory://',
+        # Capacity is measured with every turn reaching the stub
+        RATE_LIMIT_TURNS_PER_MINUTE='0'
+    )
+    env.update(overrides)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {server.returncode}; is port {port} free?")
+        try:
+            requests.get(url + '/', headers={'X-Forwarded-Proto': 'https'}, timeout=5)
+            return server, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("gunicorn did not start")
+
+
+def caller(url, stop, latencies, errors):
+    session = requests.Session()
+    call_sid = 'CA' + uuid.uuid4().hex
+    while not stop.is_set():
+        # A fresh utterance every turn so the response cache never answers for the stub
+        speech = f"{SPEECH} {uuid.uuid4().hex[:8]}"
+        start = time.perf_counter()
+        try:
+            response = session.post(
+                url + '/voice',
+                data={'CallSid': call_sid, 'SpeechResult': speech},
+                headers={'X-Forwarded-Proto': 'https'},
+                timeout=30
+            )
+            ok = response.status_code == 200 and b'<Say' in response.content
+        except requests.RequestException:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+
+
+def run_level(url, callers, duration):
+    stop = threading.Event()
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=caller, args=(url, stop, latencies, errors))
+        for _ in range(callers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else float('inf')
+    return {
+        'turns': len(latencies),
+        'errors': len(errors),
+        'throughput': len(latencies) / duration,
+        'p50': statistics.median(latencies) if latencies else float('inf'),
+        'p95': p95
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent callers sustained per node")
+    parser.add_argument('--worker-class', default='gevent', choices=['sync', 'gevent'])
+    parser.add_argument('--workers', type=int, default=4, help="Matches the systemd unit")
+    parser.add_argument('--latency', type=float, default=1.0, help="Stub Gemini latency in seconds")
+    parser.add_argument('--slo', type=float, default=2.0, help="Highest acceptable p95 turn latency")
+    parser.add_argument('--levels', default='2,4,8,16,32,64,128,256')
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per level")
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    server, url = start_server(args.worker_class, args.workers, args.port, args.latency)
+    sustained = 0
+    try:
+        print(f"{args.worker_class} x{args.workers}, stub latency {args.latency}s, SLO p95 <= {args.slo}s")
+        print(f"{'callers':>8} {'turns/s':>8} {'p50 s':>7} {'p95 s':>7} {'errors':>7}")
+        for callers in [int(level) for level in args.levels.split(',')]:
+            result = run_level(url, callers, args.duration)
+            print(f"{callers:>8} {result['throughput']:>8.1f} {result['p50']:>7.2f} "
+                  f"{result['p95']:>7.2f} {result['errors']:>7}")
+            if result['errors'] or result['p95'] > args.slo:
+                break
+            sustained = callers
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"Sustained concurrent callers: {sustained}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import logging
+
+from config import Config
+from app.services.audio_service import AudioAssetStore, ENGINES, build_assets
+from app.services.response_stream import FALLBACK_SENTENCE
+from app.services.twilio_service import TwilioService
+from app.utils.intents import RESPONSES
+from app.utils.twiml import (
+    BUSY_MESSAGE, CALLBACK_MESSAGE, CALLBACK_OFFER, ERROR_MESSAGE, GOODBYE_MESSAGE, HOLD_MESSAGE,
+    PROSODY, SLOW_DOWN_MESSAGE, TIMEOUT_MESSAGE, WELCOME_MESSAGE, split_answer
+)
+
+logging.basicConfig(level=logging.INFO)
+
+def fixed_prompts():
+    """Every prompt the service speaks verbatim, as (text, language, rate)"""
+    items = [
+        (WELCOME_MESSAGE, 'hi-IN', None),
+        (TIMEOUT_MESSAGE, 'hi-IN', None),
+        (ERROR_MESSAGE, 'hi-IN', None),
+        (CALLBACK_OFFER, 'hi-IN', None),
+        (CALLBACK_MESSAGE, 'hi-IN', None),
+        (GOODBYE_MESSAGE, 'hi-IN', None),
+        # These are spoken like answer sentences, with the answer prosody
+        (HOLD_MESSAGE, 'hi-IN', PROSODY['rate']),
+        (BUSY_MESSAGE, 'hi-IN', PROSODY['rate']),
+        (SLOW_DOWN_MESSAGE, 'hi-IN', PROSODY['rate']),
+        (FALLBACK_SENTENCE, 'hi-IN', PROSODY['rate'])
+    ]
+    # Fast-path answers to greetings and thanks, spoken like answers, in each call language
+    for languages in RESPONSES.values():
+        for language, sentences in languages.items():
+            for sentence in sentences:
+                items.append((sentence, language, PROSODY['rate']))
+    for language, prompts in TwilioService().language_prompts.items():
+        for text in prompts.values():
+            items.append((text, language, None))
+    return items
+
+def frequent_answers(path, top):
+    """Sentences of the most frequent answers in a JSONL file of {"text", "language", "count"} records,
+    as written by transcripts.py --export-answers"""
+    with open(path, encoding='utf-8') as f:
+        answers = [json.loads(line) for line in f if line.strip()]
+    answers.sort(key=lambda answer: answer.get('count', 1), reverse=True)
+    items = []
+    for answer in answers[:top]:
+        for sentence in split_answer(answer['text']):
+            items.append((sentence, answer.get('language', 'hi-IN'), PROSODY['rate']))
+    return items
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-synthesize prompts and frequent answers for <Play>")
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='polly')
+    parser.add_argument('--answers', help="JSONL of frequent answers from transcripts.py --export-answers")
+    parser.add_argument('--top', type=int, default=200, help="How many of the most frequent answers to render")
+    parser.add_argument('--output', default=Config.AUDIO_ASSET_DIR)
+    args = parser.parse_args()
+
+    store = AudioAssetStore(args.output, Config.BASE_URL)
+    items = fixed_prompts()
+    if args.answers:
+        items += frequent_answers(args.answers, args.top)
+
+    rendered = build_assets(store, ENGINES[args.engine](), items)
+    logging.info(f"Rendered {rendered} new assets, {len(store.assets)} total in {args.output}")
@@ -0,0 +1,19 @@
+import argparse
+import logging
+
+from config import Config
+from app.services.knowledge_index import build_index, load_documents
+
+logging.basicConfig(level=logging.INFO)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local farming knowledge index from curated documents")
+    parser.add_argument('--documents', default='knowledge', help="Directory of <topic>.jsonl document files")
+    parser.add_argument('--output', default=Config.KNOWLEDGE_INDEX_DIR)
+    parser.add_argument('--passage-chars', type=int, default=400)
+    args = parser.parse_args()
+
+    documents = load_documents(args.documents)
+    manifest = build_index(documents, args.output, max_chars=args.passage_chars)
+    logging.info(f"Indexed {len(documents)} documents as {manifest['passages']} passages, "
+                 f"{len(manifest['vocabulary'])} terms, build {manifest['build']} in {args.output}")
@@ -0,0 +1,66 @@
+import argparse
+import json
+import logging
+
+from config import Config
+from app.services.campaign_service import CampaignDialer, CampaignStore, parse_numbers
+from app.services.twilio_service import TwilioService
+
+logging.basicConfig(level=logging.INFO)
+
+def create(store, args):
+    with open(args.file, encoding='utf-8') as f:
+        numbers = parse_numbers(f.read(), args.file)
+    if not numbers:
+        print("No valid phone numbers found.")
+        return
+    campaign_id = store.create(args.name, numbers, args.cps, args.max_attempts, args.retry_delay)
+    print(f"Created campaign {campaign_id} with {len(numbers)} numbers")
+
+def run(store, args):
+    dialer = CampaignDialer(
+        store,
+        TwilioService(),
+        workers=args.workers,
+        result_timeout=Config.CAMPAIGN_RESULT_TIMEOUT,
+        lease_timeout=Config.CAMPAIGN_LEASE_TIMEOUT
+    )
+    token = dialer.acquire(args.campaign_id)
+    if not token:
+        print("The campaign is already being dialled; stop it there first.")
+        return
+    try:
+        dialer.run(args.campaign_id, token)
+    except KeyboardInterrupt:
+        print("Paused. Run the same command again to resume.")
+
+def status(store, args):
+    print(json.dumps({
+        'campaign': store.get(args.campaign_id),
+        'targets': store.progress(args.campaign_id)
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk outbound calling campaigns")
+    parser.add_argument('--db', default=Config.CAMPAIGN_DB)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create_parser = commands.add_parser('create', help="Create a campaign from a CSV or JSONL file")
+    create_parser.add_argument('file')
+    create_parser.add_argument('--name', default='campaign')
+    create_parser.add_argument('--cps', type=float, default=Config.CAMPAIGN_CALLS_PER_SECOND,
+                               help="Calls placed per second")
+    create_parser.add_argument('--max-attempts', type=int, default=Config.CAMPAIGN_MAX_ATTEMPTS)
+    create_parser.add_argument('--retry-delay', type=float, default=Config.CAMPAIGN_RETRY_DELAY,
+                               help="Seconds before retrying busy/no-answer, multiplied by the attempt")
+
+    run_parser = commands.add_parser('run', help="Dial a campaign, resuming where it stopped")
+    run_parser.add_argument('campaign_id', type=int)
+    run_parser.add_argument('--workers', type=int, default=Config.CAMPAIGN_WORKERS)
+
+    status_parser = commands.add_parser('status', help="Show campaign progress")
+    status_parser.add_argument('campaign_id', type=int)
+
+    args = parser.parse_args()
+    store = CampaignStore(args.db)
+    {'create': create, 'run': run, 'status': status}[args.command](store, args)
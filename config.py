@@ -7,21 +7,170 @@ class Config:
     TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+    TWILIO_API_BASE_URL = os.getenv('TWILIO_API_BASE_URL')
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT', 'rest')
+    # 'stub' replaces Gemini with a fixed-latency fake for load tests;
+    # 'package.module:factory' plugs in any other model object
+    LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+    LLM_STUB_LATENCY = float(os.getenv('LLM_STUB_LATENCY', 1.0))
+    LLM_STUB_DISTRIBUTION = os.getenv('LLM_STUB_DISTRIBUTION', 'fixed')
+    LLM_STUB_JITTER = float(os.getenv('LLM_STUB_JITTER', 0.5))
+    LLM_STUB_SEED = int(os.getenv('LLM_STUB_SEED', 0))
     
     BASE_URL = os.getenv('BASE_URL', 'http://your-ngrok-url')  
     
     SECRET_KEY = os.getenv('SECRET_KEY', os.urandom(24))
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted for
+    # the client address: 1 for the nginx deploy.py sets up, 0 when exposed directly
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 1))
+    # X-API-Key for the admin APIs (campaigns, the call ledger); unset keeps them closed
+    ADMIN_API_KEY = os.getenv('ADMIN_API_KEY')
     DEBUG = os.getenv('DEBUG', 'False').lower() in ('true', '1', 't')
     
     CACHE_TYPE = 'SimpleCache'
     CACHE_DEFAULT_TIMEOUT = 300
 
+    # redis://host:6379/0 for several nodes, sqlite:///path for a single box
+    SESSION_STORE_URL = os.getenv('SESSION_STORE_URL', 'sqlite:///sessions.db')
+    SESSION_TTL = int(os.getenv('SESSION_TTL', 3600))
+    # Call history budgets: the oldest turns of a call go past the first,
+    # the oldest lists of the in-process and SQLite stores past the second
+    HISTORY_CALL_MAX_BYTES = int(os.getenv('HISTORY_CALL_MAX_BYTES', 16384))
+    HISTORY_MAX_BYTES = int(os.getenv('HISTORY_MAX_BYTES', 256 * 1024 * 1024))
+
+    # Prompt context: recent exchanges verbatim, older ones folded into a summary
+    CONTEXT_RECENT_EXCHANGES = int(os.getenv('CONTEXT_RECENT_EXCHANGES', 4))
+    CONTEXT_MAX_CHARS = int(os.getenv('CONTEXT_MAX_CHARS', 2000))
+    CONTEXT_SUMMARY_CHARS = int(os.getenv('CONTEXT_SUMMARY_CHARS', 600))
+    # Live chat sessions per worker; idle ones are dropped and rebuilt from the history
+    CHAT_SESSIONS_MAX = int(os.getenv('CHAT_SESSIONS_MAX', 2000))
+    CHAT_SESSION_IDLE_TIMEOUT = float(os.getenv('CHAT_SESSION_IDLE_TIMEOUT', 600))
+
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 2 * 1024 * 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 86400))
+
+    # Per-turn budget, kept well under Twilio's 15 second webhook timeout
+    TURN_BUDGET = float(os.getenv('TURN_BUDGET', 10))
+    LLM_WORKERS = int(os.getenv('LLM_WORKERS', 16))
+    LLM_MAX_ATTEMPTS = int(os.getenv('LLM_MAX_ATTEMPTS', 2))
+    # Hedge delay until enough latencies are observed to use their p95
+    LLM_HEDGE_AFTER = float(os.getenv('LLM_HEDGE_AFTER', 4))
+    # Overload protection: the circuit opens when this share of the recent
+    # calls failed or outlasted the turn budget, and lets probes through
+    # again after the open period
+    LLM_CIRCUIT_FAILURE_RATE = float(os.getenv('LLM_CIRCUIT_FAILURE_RATE', 0.5))
+    LLM_CIRCUIT_WINDOW = int(os.getenv('LLM_CIRCUIT_WINDOW', 20))
+    LLM_CIRCUIT_MIN_CALLS = int(os.getenv('LLM_CIRCUIT_MIN_CALLS', 10))
+    LLM_CIRCUIT_OPEN_SECONDS = float(os.getenv('LLM_CIRCUIT_OPEN_SECONDS', 15))
+    LLM_CIRCUIT_PROBES = int(os.getenv('LLM_CIRCUIT_PROBES', 2))
+    # Concurrent Gemini calls per worker: grows while calls finish under the
+    # target latency, shrinks on errors and slower calls
+    LLM_CONCURRENCY_INITIAL = int(os.getenv('LLM_CONCURRENCY_INITIAL', 16))
+    LLM_CONCURRENCY_MIN = int(os.getenv('LLM_CONCURRENCY_MIN', 2))
+    LLM_CONCURRENCY_MAX = int(os.getenv('LLM_CONCURRENCY_MAX', 200))
+    LLM_TARGET_LATENCY = float(os.getenv('LLM_TARGET_LATENCY', 4))
+    # Turns Gemini cannot take: holding messages before offering a callback,
+    # and how long until the callback is dialled
+    OVERLOAD_HOLD_REDIRECTS = int(os.getenv('OVERLOAD_HOLD_REDIRECTS', 2))
+    CALLBACK_DELAY = float(os.getenv('CALLBACK_DELAY', 600))
+
+    # Token buckets in the session store, as (requests per minute, burst):
+    # per caller's phone number and across all callers for turns that go to
+    # Gemini, per API key (or client address) and across all clients for the
+    # API key and call endpoints, across all calls placed, and per client for
+    # the admin APIs. A rate of 0 turns a bucket off
+    RATE_LIMIT_CALLER_PER_MINUTE = float(os.getenv('RATE_LIMIT_CALLER_PER_MINUTE', 12))
+    RATE_LIMIT_CALLER_BURST = int(os.getenv('RATE_LIMIT_CALLER_BURST', 6))
+    RATE_LIMIT_TURNS_PER_MINUTE = float(os.getenv('RATE_LIMIT_TURNS_PER_MINUTE', 1200))
+    RATE_LIMIT_TURNS_BURST = int(os.getenv('RATE_LIMIT_TURNS_BURST', 200))
+    RATE_LIMIT_CLIENT_PER_MINUTE = float(os.getenv('RATE_LIMIT_CLIENT_PER_MINUTE', 6))
+    RATE_LIMIT_CLIENT_BURST = int(os.getenv('RATE_LIMIT_CLIENT_BURST', 3))
+    RATE_LIMIT_API_PER_MINUTE = float(os.getenv('RATE_LIMIT_API_PER_MINUTE', 120))
+    RATE_LIMIT_API_BURST = int(os.getenv('RATE_LIMIT_API_BURST', 20))
+    RATE_LIMIT_CALLS_PER_MINUTE = float(os.getenv('RATE_LIMIT_CALLS_PER_MINUTE', 60))
+    RATE_LIMIT_CALLS_BURST = int(os.getenv('RATE_LIMIT_CALLS_BURST', 10))
+    RATE_LIMIT_ADMIN_PER_MINUTE = float(os.getenv('RATE_LIMIT_ADMIN_PER_MINUTE', 60))
+    RATE_LIMIT_ADMIN_BURST = int(os.getenv('RATE_LIMIT_ADMIN_BURST', 20))
+
+    # Speculative answers (off by default): after an answer ending in a
+    # question, answer the caller's likeliest replies while it plays.
+    # 'rules' predicts yes and no to yes/no questions; 'model' also asks
+    # Gemini for replies to other questions, one extra call per turn.
+    # Pre-generations across all workers are a token bucket like the rate
+    # limits, and none start while more than SPECULATION_MAX_LOAD of the
+    # Gemini concurrency limit is in use
+    SPECULATION_ENABLED = os.getenv('SPECULATION_ENABLED', 'False').lower() in ('true', '1', 't')
+    SPECULATION_PREDICTOR = os.getenv('SPECULATION_PREDICTOR', 'rules')
+    SPECULATION_MAX_FOLLOWUPS = int(os.getenv('SPECULATION_MAX_FOLLOWUPS', 2))
+    SPECULATION_PER_MINUTE = float(os.getenv('SPECULATION_PER_MINUTE', 120))
+    SPECULATION_BURST = int(os.getenv('SPECULATION_BURST', 20))
+    SPECULATION_MAX_LOAD = float(os.getenv('SPECULATION_MAX_LOAD', 0.5))
+    SPECULATION_MATCH = float(os.getenv('SPECULATION_MATCH', 0.6))
+    SPECULATION_WORKERS = int(os.getenv('SPECULATION_WORKERS', 2))
+    SPECULATION_TTL = int(os.getenv('SPECULATION_TTL', 120))
+
+    # Streaming answers: speak the first sentence while the rest is generated
+    STREAMING_ENABLED = os.getenv('STREAMING_ENABLED', 'False').lower() in ('true', '1', 't')
+    STREAM_WORKERS = int(os.getenv('STREAM_WORKERS', 8))
+    STREAM_FIRST_SENTENCE_TIMEOUT = float(os.getenv('STREAM_FIRST_SENTENCE_TIMEOUT', 8))
+    STREAM_CONTINUE_WAIT = float(os.getenv('STREAM_CONTINUE_WAIT', 5))
+    STREAM_MAX_REDIRECTS = int(os.getenv('STREAM_MAX_REDIRECTS', 6))
+
+    # How long a turn's TwiML is kept to answer Twilio's retries of the same webhook
+    TURN_DEDUP_TTL = int(os.getenv('TURN_DEDUP_TTL', 120))
+
+    # Pre-synthesized prompts written by build_audio.py and served from /audio
+    AUDIO_ASSET_DIR = os.getenv('AUDIO_ASSET_DIR', 'audio_assets')
+
+    # Local knowledge index written by build_knowledge.py: passages that reach
+    # the coverage ground the prompt, a close enough curated question is answered directly
+    KNOWLEDGE_INDEX_DIR = os.getenv('KNOWLEDGE_INDEX_DIR', 'knowledge_index')
+    KNOWLEDGE_TOP_K = int(os.getenv('KNOWLEDGE_TOP_K', 2))
+    KNOWLEDGE_MIN_COVERAGE = float(os.getenv('KNOWLEDGE_MIN_COVERAGE', 0.5))
+    KNOWLEDGE_ANSWER_CONFIDENCE = float(os.getenv('KNOWLEDGE_ANSWER_CONFIDENCE', 0.8))
+    # A looser match is still answered while Gemini is unavailable
+    KNOWLEDGE_DEGRADED_CONFIDENCE = float(os.getenv('KNOWLEDGE_DEGRADED_CONFIDENCE', 0.5))
+
+    # Outbound calling campaigns
+    CAMPAIGN_DB = os.getenv('CAMPAIGN_DB', 'campaigns.db')
+    CAMPAIGN_CALLS_PER_SECOND = float(os.getenv('CAMPAIGN_CALLS_PER_SECOND', 1))
+    CAMPAIGN_WORKERS = int(os.getenv('CAMPAIGN_WORKERS', 4))
+    CAMPAIGN_MAX_ATTEMPTS = int(os.getenv('CAMPAIGN_MAX_ATTEMPTS', 3))
+    CAMPAIGN_RETRY_DELAY = float(os.getenv('CAMPAIGN_RETRY_DELAY', 600))
+    CAMPAIGN_RESULT_TIMEOUT = float(os.getenv('CAMPAIGN_RESULT_TIMEOUT', 1800))
+    # A dialer that has not checked in for this long is presumed dead and its campaign may be restarted
+    CAMPAIGN_LEASE_TIMEOUT = float(os.getenv('CAMPAIGN_LEASE_TIMEOUT', 300))
+
+    # Call transcripts and events, written as gzip JSONL segments off the request path
+    TRANSCRIPT_DIR = os.getenv('TRANSCRIPT_DIR', 'transcripts')
+    TRANSCRIPT_QUEUE_SIZE = int(os.getenv('TRANSCRIPT_QUEUE_SIZE', 10000))
+    # 'drop' never delays a caller; 'block' waits briefly for room before dropping
+    TRANSCRIPT_FULL_POLICY = os.getenv('TRANSCRIPT_FULL_POLICY', 'drop')
+    TRANSCRIPT_SEGMENT_BYTES = int(os.getenv('TRANSCRIPT_SEGMENT_BYTES', 8 * 1024 * 1024))
+    TRANSCRIPT_SEGMENT_SECONDS = float(os.getenv('TRANSCRIPT_SEGMENT_SECONDS', 300))
+
+    # Ledger of finished calls, written off the request path and served by /calls;
+    # daily and hourly stats are counted in this UTC offset (minutes, IST by default)
+    CALL_LEDGER_DB = os.getenv('CALL_LEDGER_DB', 'calls.db')
+    CALL_LEDGER_QUEUE_SIZE = int(os.getenv('CALL_LEDGER_QUEUE_SIZE', 10000))
+    CALL_LEDGER_UTC_OFFSET = int(os.getenv('CALL_LEDGER_UTC_OFFSET', 330))
+
     WEATHER_API_KEY = os.getenv('WEATHER_API_KEY')
+    # Forecasts for weather questions: 'openweathermap' needs WEATHER_API_KEY, 'open-meteo' no key.
+    # Cached per geohash cell and refreshed in the background, so turns never wait on the API
+    WEATHER_PROVIDER = os.getenv('WEATHER_PROVIDER', 'openweathermap' if WEATHER_API_KEY else 'open-meteo')
+    WEATHER_API_BASE_URL = os.getenv('WEATHER_API_BASE_URL')
+    WEATHER_TTL = int(os.getenv('WEATHER_TTL', 3 * 3600))
+    WEATHER_REFRESH_AFTER = int(os.getenv('WEATHER_REFRESH_AFTER', 1800))
+    WEATHER_GEOHASH_PRECISION = int(os.getenv('WEATHER_GEOHASH_PRECISION', 4))
+    # Comma-separated districts kept warm before anyone calls, and the one assumed when unknown
+    WEATHER_WARM_DISTRICTS = [d.strip() for d in os.getenv('WEATHER_WARM_DISTRICTS', '').split(',') if d.strip()]
+    WEATHER_DEFAULT_DISTRICT = os.getenv('WEATHER_DEFAULT_DISTRICT')
 
     DEFAULT_LANGUAGE = 'hi-IN'
     SUPPORTED_LANGUAGES = ['hi-IN', 'mr-IN', 'en-IN']
 
-    WEBHOOK_BASE_URL = os.getenv('BASE_URL')
-    if not WEBHOOK_BASE_URL:
-        raise ValueError("BASE_URL must be set in environment variables") 
\ No newline at end of file
+    # Outbound calls need it for their webhooks; checked when a call is placed, not at import
+    WEBHOOK_BASE_URL = os.getenv('BASE_URL') 
\ No newline at end of file
@@ -0,0 +1,56 @@
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# gevent workers yield while a request waits on Gemini, so one worker serves many
+# callers at once; set GUNICORN_WORKER_CLASS=sync to get the old one-call-per-worker mode
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
+
+# The master imports the app once and workers fork from it, sharing the imported
+# code; services are built per worker by post_worker_init below
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('true', '1', 't')
+warm_up = os.getenv('GUNICORN_WARM_UP', 'true').lower() in ('true', '1', 't')
+if worker_class == 'gevent' and preload_app:
+    # Patch before the master imports the app, or its module-level locks stay real threads' locks
+    from gevent import monkey
+    monkey.patch_all()
+
+# Every turn in flight holds an LLM pool slot, and a streamed one a stream pool
+# slot too; under gevent those threads are greenlets, so size both pools to the
+# connections a worker accepts
+if worker_class == 'gevent':
+    os.environ.setdefault('LLM_WORKERS', str(worker_connections))
+    os.environ.setdefault('STREAM_WORKERS', str(worker_connections))
+
+# Twilio gives up on a webhook after 15 seconds
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Workers write Prometheus samples here and /metrics sums them; it has to be
+# set before any worker imports prometheus_client
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'kisan-metrics')
+)
+
+def on_starting(server):
+    """Start every deployment with empty counters"""
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+def post_worker_init(worker):
+    """Build the worker's services and open its Gemini and Twilio connections before it takes calls"""
+    if warm_up:
+        from app.routes.voice_routes import warm_up as warm_up_worker
+        warm_up_worker()
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges; its counters keep counting toward the totals"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,172 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+
+from flask import Flask
+
+from config import Config
+from app import session_store
+from app.services.gemini_service import LLM_ERROR_ANSWER, GeminiService
+from app.services.transcript_sink import read_events
+from app.utils.cache import ResponseCache
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.history import Exchange
+from app.utils.overload import AdaptiveLimit, Overloaded
+
+logging.basicConfig(level=logging.WARNING)
+
+def load_histories(path):
+    """Recorded calls as (call_sid, language, [Exchange]).
+
+    A .jsonl file holds one call per line as {call_sid, language, history}
+    with history in the stored [user, ai, ts, turn] form; a directory is
+    read as transcript sink segments, pairing each caller message with the
+    answer that followed it.
+    """
+    if not os.path.isdir(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    call = json.loads(line)
+                    history = [Exchange.from_item(item, i) for i, item in enumerate(call['history'])]
+                    yield call['call_sid'], call.get('language', 'hi-IN'), history
+        return
+    calls = {}
+    for event in read_events(path):
+        if event['event'] == 'message':
+            calls.setdefault(event['call_sid'], []).append(event)
+    for call_sid, messages in calls.items():
+        messages.sort(key=lambda message: message['ts'])
+        history = []
+        for user, assistant in zip(messages, messages[1:]):
+            if user['role'] == 'user' and assistant['role'] == 'assistant':
+                history.append(Exchange(user['text'], assistant['text'], int(user['ts']), len(history) + 1))
+        if history:
+            yield call_sid, messages[-1]['language'], history
+
+class ReplayService(GeminiService):
+    """GeminiService that notes the size of the prompt each replayed turn built"""
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.turn = threading.local()
+
+    def build_contents(self, user_input, history=None, language='hi-IN', call_sid=None, passages=(), weather=None):
+        contents = super().build_contents(user_input, history, language, call_sid, passages, weather)
+        self.turn.prompt_chars = sum(len(part) for content in contents for part in content['parts'])
+        return contents
+
+def replay_turn(service, call_sid, language, history, index, budget):
+    """Answer one recorded utterance given the recorded conversation before it"""
+    exchange = history[index]
+    service.turn.prompt_chars = None
+    started = time.monotonic()
+    try:
+        # Each turn gets its own session, built from the recorded history like a fresh worker's
+        answer = service.get_response(
+            exchange.user,
+            history=history[:index],
+            language=language,
+            call_sid=f'replay-{call_sid}-{exchange.turn}',
+            deadline=Deadline(budget)
+        )
+        if answer == LLM_ERROR_ANSWER:
+            outcome = 'error'
+        else:
+            outcome = 'model' if service.turn.prompt_chars is not None else 'local'
+    except DeadlineExceeded as e:
+        try:
+            answer = e.pending.result()
+            outcome = 'late'
+        except Exception as error:
+            # Every hedged attempt failed after the deadline
+            logging.warning(f"Replayed turn {call_sid} #{exchange.turn} failed: {str(error)}")
+            answer = None
+            outcome = 'error'
+    except Overloaded as e:
+        answer = None
+        outcome = e.reason
+    return {
+        'call_sid': call_sid,
+        'turn': exchange.turn,
+        'language': language,
+        'user': exchange.user,
+        'recorded': exchange.ai,
+        'answer': answer,
+        'outcome': outcome,
+        'latency': time.monotonic() - started,
+        'prompt_chars': service.turn.prompt_chars,
+        'response_chars': len(answer) if answer else 0
+    }
+
+def distribution(values, scale=1, unit=''):
+    if not values:
+        return 'none'
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * scale
+    return (f"p50 {pick(0.5):.0f}{unit}, p90 {pick(0.9):.0f}{unit}, p99 {pick(0.99):.0f}{unit}, "
+            f"max {values[-1] * scale:.0f}{unit}, mean {statistics.mean(values) * scale:.0f}{unit}")
+
+def report(results, elapsed, workers, backend):
+    outcomes = {}
+    for result in results:
+        outcomes[result['outcome']] = outcomes.get(result['outcome'], 0) + 1
+    prompts = [result['prompt_chars'] for result in results if result['prompt_chars'] is not None]
+    print(f"Replayed {len(set(result['call_sid'] for result in results))} calls, {len(results)} turns "
+          f"in {elapsed:.2f} s on {workers} workers against {backend}: {len(results) / elapsed:.1f} turns/s")
+    print("  turns: " + ", ".join(f"{outcome} {count}" for outcome, count in sorted(outcomes.items())))
+    print(f"  latency:        {distribution([result['latency'] for result in results], 1000, ' ms')}")
+    print(f"  prompt chars:   {distribution(prompts)}, total {sum(prompts)}")
+    print(f"  response chars: {distribution([result['response_chars'] for result in results if result['answer']])}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay recorded calls through GeminiService to see a prompt change's cost and latency"
+    )
+    parser.add_argument('source', help="History .jsonl file or transcript segment directory")
+    parser.add_argument('--backend', default='stub',
+                        help="'stub' (default), 'gemini' or 'package.module:factory'")
+    parser.add_argument('--workers', type=int, default=8, help="Turns replayed at once")
+    parser.add_argument('--calls', type=int, help="Replay only the first N calls")
+    parser.add_argument('--budget', type=float, default=Config.TURN_BUDGET, help="Turn deadline in seconds")
+    parser.add_argument('--cache', action='store_true', help="Keep the response cache; off so every turn is built")
+    parser.add_argument('--output', help="Write every turn's answer and numbers to this .jsonl file")
+    args = parser.parse_args()
+
+    # Summaries and chat state stay in this process, away from the live session store
+    store_app = Flask(__name__)
+    store_app.config.update(SESSION_STORE_URL='memory://')
+    session_store.init_app(store_app)
+
+    service = ReplayService(args.backend)
+    if not args.cache:
+        service.response_cache = ResponseCache(max_entries=0)
+    # Sized to the pool, so turns wait on the model and not on admission
+    slots = args.workers * Config.LLM_MAX_ATTEMPTS
+    service.executor = ThreadPoolExecutor(max_workers=slots, thread_name_prefix='gemini')
+    service.limit = AdaptiveLimit(initial=slots, min_limit=slots, max_limit=slots)
+
+    calls = list(load_histories(args.source))[:args.calls]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='replay') as pool:
+        futures = [
+            pool.submit(replay_turn, service, call_sid, language, history, index, args.budget)
+            for call_sid, language, history in calls
+            for index in range(len(history))
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.monotonic() - started
+
+    if not results:
+        print(f"No recorded turns in {args.source}")
+    else:
+        report(results, elapsed, args.workers, args.backend)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
@@ -1,5 +1,4 @@
 from app import create_app
-import multiprocessing
 import logging
 
 logging.basicConfig(
@@ -8,5 +7,5 @@ logging.basicConfig(
 )
 app = create_app()
 if __name__ == '__main__':
-    workers = multiprocessing.cpu_count() * 2 + 1
+    # Development server only; production runs gunicorn with gunicorn.conf.py
     app.run(host='0.0.0.0', port=5000, threaded=True) 
\ No newline at end of file
@@ -0,0 +1,45 @@
+import argparse
+from collections import Counter
+import json
+
+from config import Config
+from app.services.transcript_sink import load_transcript, read_events
+
+def export_answers(directory, path):
+    """Write every answer Diksha gave, with how often, as the {"text", "language", "count"} JSONL build_audio.py reads"""
+    counts = Counter(
+        (event['text'], event.get('language', 'hi-IN'))
+        for event in read_events(directory)
+        if event['event'] == 'message' and event['role'] == 'assistant' and event.get('text')
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        for (text, language), count in counts.most_common():
+            f.write(json.dumps({'text': text, 'language': language, 'count': count}, ensure_ascii=False) + "\n")
+    return len(counts)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print a call's conversation from the transcript segments")
+    parser.add_argument('call_sid', nargs='?')
+    parser.add_argument('--dir', default=Config.TRANSCRIPT_DIR)
+    parser.add_argument('--export-answers', metavar='PATH',
+                        help="Instead, write answer counts across all calls for build_audio.py --answers")
+    args = parser.parse_args()
+
+    if args.export_answers:
+        exported = export_answers(args.dir, args.export_answers)
+        print(f"Wrote {exported} distinct answers to {args.export_answers}")
+        raise SystemExit
+    if not args.call_sid:
+        parser.error("a CallSid is needed unless --export-answers is given")
+
+    events = load_transcript(args.dir, args.call_sid)
+    if not events:
+        print(f"No transcript events for {args.call_sid}")
+    for event in events:
+        if event['event'] == 'message':
+            speaker = 'Diksha' if event['role'] == 'assistant' else 'User'
+            print(f"{speaker}: {event['text']}")
+        else:
+            details = ", ".join(f"{key}={value}" for key, value in event.items()
+                                if key not in ('ts', 'event', 'call_sid'))
+            print(f"[{event['event']}] {details}")